@@ -5,57 +5,90 @@ internals. It exposes some ethstaker-deposit-cli functions as easy to use comman
 on the CLI.
 """
 
+from __future__ import annotations
+
 import os
 import argparse
 import json
 import concurrent.futures
 import sys
 import time
+from contextlib import contextmanager, redirect_stdout
 from multiprocessing import freeze_support
 from typing import (
+    TYPE_CHECKING,
     Sequence,
     Dict,
     Any,
+    List,
     Optional,
 )
 
-from eth_typing import HexAddress
-
+# Only the lightweight modules needed by every subcommand are imported here. The credential stack
+# (py_ecc, ssz, eth_utils, click) takes most of the startup time, so it is imported by the functions
+# that need it, keeping create_mnemonic and validate_mnemonic fast.
 from ethstaker_deposit.key_handling.key_derivation.mnemonic import (
     get_mnemonic,
-    reconstruct_mnemonic
-)
-
-from eth_utils import is_hex_address, to_normalized_address
-
-from ethstaker_deposit.credentials import (
-    CredentialList,
-    Credential
+    reconstruct_mnemonic,
+    repair_mnemonic as search_mnemonic_repair,
 )
 
 from ethstaker_deposit.exceptions import ValidationError
-from ethstaker_deposit.utils.validation import (
-    validate_deposit,
-    validate_bls_to_execution_change,
-    validate_bls_withdrawal_credentials_matching,
-)
 from ethstaker_deposit.utils.constants import (
     ETH2GWEI,
 )
-from ethstaker_deposit.utils.deposit import export_deposit_data_json as export_deposit_data_json_util
-
-from ethstaker_deposit.settings import (
-    get_chain_setting,
-    BaseChainSetting,
-)
 
 from ethstaker_deposit.utils.file_handling import (
     sensitive_opener,
 )
 
-from ethstaker_deposit.utils.crypto import SHA256
+if TYPE_CHECKING:
+    from eth_typing import HexAddress
+
+    from ethstaker_deposit.credentials import Credential
+    from ethstaker_deposit.settings import BaseChainSetting
+
+# JSON-RPC 2.0 error codes used by the serve subcommand
+JSON_RPC_PARSE_ERROR = -32700
+JSON_RPC_INVALID_REQUEST = -32600
+JSON_RPC_METHOD_NOT_FOUND = -32601
+JSON_RPC_INVALID_PARAMS = -32602
+JSON_RPC_INTERNAL_ERROR = -32603
+JSON_RPC_VALIDATION_ERROR = -32000
+
+# Whether the serve subcommand keeps a warm worker pool alive
+_serving = False
+
+# Minimum number of seconds between two generate_keys progress events
+PROGRESS_EVENT_INTERVAL = 1.0
+
+# Writes the generate_keys events in place of stdout when set by the serve subcommand
+_event_sink = None
+
+def _emit_event(event):
+    """Write a generate_keys event as a single JSON line.
+    """
+    if _event_sink is not None:
+        _event_sink(event)
+    else:
+        print(json.dumps(event), flush=True)
+
+@contextmanager
+def _process_pool():
+    """Yield the serve subcommand's warm worker pool, or a new pool for one-shot subcommands.
+    """
+    if _serving:
+        # The session pool is started again if it breaks, so it is looked up for every request
+        from ethstaker_deposit.credentials import get_session_pool
+
+        yield get_session_pool()
+    else:
+        with concurrent.futures.ProcessPoolExecutor() as executor:
+            yield executor
 
 def _validate_credentials_match(kwargs: Dict[str, Any]) -> Optional[ValidationError]:
+    from ethstaker_deposit.utils.validation import validate_bls_withdrawal_credentials_matching
+
     credential: Credential = kwargs.pop('credential')
     bls_withdrawal_credentials: bytes = kwargs.pop('bls_withdrawal_credentials')
 
@@ -70,8 +103,66 @@ def _bls_to_execution_change_builder(kwargs: Dict[str, Any]) -> Dict[str, bytes]
     return credential.get_bls_to_execution_change_dict(**kwargs)
 
 def _bls_to_execution_change_validator(kwargs: Dict[str, Any]) -> bool:
+    from ethstaker_deposit.utils.validation import validate_bls_to_execution_change
+
     return validate_bls_to_execution_change(**kwargs)
 
+def _discover_bls_credentials(
+        mnemonic: str,
+        validator_start_index: int,
+        bls_withdrawal_credentials_list: Sequence[bytes],
+        chain_setting: BaseChainSetting,
+        hex_withdrawal_address: Optional[HexAddress],
+        inventory: Optional[str] = None,
+        ) -> List[Credential]:
+    """Scan the account indices of the mnemonic from the start index for the validators with the given BLS
+    withdrawal credentials, and return their credentials in the same order.
+
+    The account indices recorded in a validator inventory for these BLS withdrawal credentials are tried first,
+    and only the validators not found at them are scanned for. The inventory is not authenticated, a validator is
+    only found once its derived key has the given BLS withdrawal credentials.
+    """
+    from ethstaker_deposit.credentials import credentials_at_account_indices
+    from ethstaker_deposit.key_handling.key_derivation.path import discover_account_indices
+    from ethstaker_deposit.utils.crypto import SHA256
+    from ethstaker_deposit.utils.inventory import ValidatorInventory
+
+    found_credentials = {}
+
+    def _derive(account_indices: List[int]) -> None:
+        for credential in credentials_at_account_indices(
+                mnemonic=mnemonic,
+                mnemonic_password='',
+                account_indices=account_indices,
+                amounts=[chain_setting.MIN_ACTIVATION_AMOUNT * ETH2GWEI] * len(account_indices),
+                chain_setting=chain_setting,
+                hex_withdrawal_address=hex_withdrawal_address):
+            found_credentials[SHA256(credential.withdrawal_pk)[1:]] = credential
+
+    if inventory is not None:
+        with ValidatorInventory(inventory, create=False) as validator_inventory:
+            _derive(sorted({
+                entry.account_index
+                for bls_withdrawal_credentials in bls_withdrawal_credentials_list
+                for entry in validator_inventory.get_by_withdrawal_credentials(bls_withdrawal_credentials)
+            }))
+    missing_credentials = [
+        bls_withdrawal_credentials for bls_withdrawal_credentials in bls_withdrawal_credentials_list
+        if bls_withdrawal_credentials[1:] not in found_credentials
+    ]
+    if missing_credentials:
+        _derive(sorted(discover_account_indices(
+            mnemonic=mnemonic,
+            password='',
+            withdrawal_credentials=missing_credentials,
+            start_index=validator_start_index,
+        )))
+    try:
+        return [found_credentials[bls_withdrawal_credentials[1:]]
+                for bls_withdrawal_credentials in bls_withdrawal_credentials_list]
+    except KeyError:
+        raise ValidationError('err_not_matching')
+
 def generate_bls_to_execution_change(
         folder: str,
         chain: str,
@@ -81,6 +172,8 @@ def generate_bls_to_execution_change(
         bls_withdrawal_credentials_list: Sequence[bytes],
         withdrawal_address: HexAddress,
         devnet_chain_setting: Optional[BaseChainSetting] = None,
+        inventory: Optional[str] = None,
+        discover: bool = False,
         ) -> None:
     """Generate bls to execution change file.
 
@@ -94,7 +187,16 @@ def generate_bls_to_execution_change(
     bls_withdrawal_credentials_list -- a list of the old BLS withdrawal credentials of the given validator(s)
     withdrawal_address -- withdrawal address
     devnet_chain_setting -- optional custom chain setting
+    inventory -- optional validator inventory to look the account indices of the validators up in before
+                 scanning for them, with discover
+    discover -- scan for the account index of each validator from validator_start_index instead of expecting
+                them at consecutive account indices
     """
+    from eth_utils import is_hex_address, to_normalized_address
+
+    from ethstaker_deposit.credentials import CredentialList, credentials_from_mnemonic
+    from ethstaker_deposit.settings import get_chain_setting
+
     if not os.path.exists(folder):
         os.mkdir(folder)
 
@@ -105,6 +207,9 @@ def generate_bls_to_execution_change(
     eth1_withdrawal_address = to_normalized_address(withdrawal_address)
     withdrawal_address = eth1_withdrawal_address
 
+    if inventory is not None and not discover:
+        raise ValueError("The validator inventory is only used to discover the account indices of the validators.")
+
     # Get chain setting
     chain_setting = devnet_chain_setting if devnet_chain_setting is not None else get_chain_setting(chain)
 
@@ -131,25 +236,22 @@ def generate_bls_to_execution_change(
     compounding = False
     use_pbkdf2 = False
 
-    key_indices = range(start_index, start_index + num_keys)
-
-    credentials: list[Credential] = []
-    executor_kwargs = [{
-        'mnemonic': mnemonic,
-        'mnemonic_password': mnemonic_password,
-        'index': index,
-        'amount': amounts[index - start_index],
-        'chain_setting': chain_setting,
-        'hex_withdrawal_address': hex_withdrawal_address,
-        'compounding': compounding,
-        'use_pbkdf2': use_pbkdf2,
-    } for index in key_indices]
-
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        for credential in executor.map(_credential_builder, executor_kwargs):
-            credentials.append(credential)
-
-    credentials = CredentialList(credentials)
+    if discover:
+        credentials = CredentialList(_discover_bls_credentials(
+            mnemonic, start_index, bls_withdrawal_credentials_list, chain_setting, hex_withdrawal_address,
+            inventory=inventory))
+    else:
+        credentials = CredentialList(list(credentials_from_mnemonic(
+            mnemonic=mnemonic,
+            mnemonic_password=mnemonic_password,
+            num_keys=num_keys,
+            amounts=amounts,
+            chain_setting=chain_setting,
+            start_index=start_index,
+            hex_withdrawal_address=hex_withdrawal_address,
+            compounding=compounding,
+            use_pbkdf2=use_pbkdf2,
+        )))
 
     # Check if the given old bls_withdrawal_credentials is as same as the mnemonic generated
     executor_kwargs = [{
@@ -157,7 +259,7 @@ def generate_bls_to_execution_change(
         'bls_withdrawal_credentials': bls_withdrawal_credentials_list[i],
     } for i, credential in enumerate(credentials.credentials)]
 
-    with concurrent.futures.ProcessPoolExecutor() as executor:
+    with _process_pool() as executor:
         for e in executor.map(_validate_credentials_match, executor_kwargs):
             if e is not None:
                 raise ValidationError('err_not_matching')
@@ -169,7 +271,7 @@ def generate_bls_to_execution_change(
         'validator_index': validator_indices[i],
     } for i, credential in enumerate(credentials.credentials)]
 
-    with concurrent.futures.ProcessPoolExecutor() as executor:
+    with _process_pool() as executor:
         for bls_to_execution_change in executor.map(_bls_to_execution_change_builder, executor_kwargs):
             bls_to_execution_changes.append(bls_to_execution_change)
 
@@ -192,7 +294,7 @@ def generate_bls_to_execution_change(
         'chain_setting': chain_setting,
     } for btec, credential, input_validator_index in zip(btec_json, credentials.credentials, validator_indices)]
 
-    with concurrent.futures.ProcessPoolExecutor() as executor:
+    with _process_pool() as executor:
         for valid_bls_change in executor.map(_bls_to_execution_change_validator, executor_kwargs):
             all_valid_bls_changes &= valid_bls_change
 
@@ -205,6 +307,8 @@ def validate_bls_credentials(
         validator_start_index: int,
         bls_withdrawal_credentials_list: Sequence[bytes],
         devnet_chain_setting: Optional[BaseChainSetting] = None,
+        inventory: Optional[str] = None,
+        discover: bool = False,
         ) -> None:
     """Validate BLS credentials against what was generated from a mnemonic.
 
@@ -215,7 +319,16 @@ def validate_bls_credentials(
     validator_start_index -- index position for the keys to start generating withdrawal credentials
     bls_withdrawal_credentials_list -- a list of the old BLS withdrawal credentials of the given validator(s)
     devnet_chain_setting -- optional custom chain setting
+    inventory -- optional validator inventory to look the account indices of the validators up in before
+                 scanning for them, with discover
+    discover -- scan for the account index of each validator from validator_start_index instead of expecting
+                them at consecutive account indices
     """
+    from ethstaker_deposit.credentials import CredentialList, credentials_from_mnemonic
+    from ethstaker_deposit.settings import get_chain_setting
+
+    if inventory is not None and not discover:
+        raise ValueError("The validator inventory is only used to discover the account indices of the validators.")
 
     # Get chain setting
     chain_setting = devnet_chain_setting if devnet_chain_setting is not None else get_chain_setting(chain)
@@ -231,25 +344,21 @@ def validate_bls_credentials(
     compounding = False
     use_pbkdf2 = False
 
-    key_indices = range(start_index, start_index + num_keys)
-
-    credentials: list[Credential] = []
-    executor_kwargs = [{
-        'mnemonic': mnemonic,
-        'mnemonic_password': mnemonic_password,
-        'index': index,
-        'amount': amounts[index - start_index],
-        'chain_setting': chain_setting,
-        'hex_withdrawal_address': None,
-        'compounding': compounding,
-        'use_pbkdf2': use_pbkdf2,
-    } for index in key_indices]
-
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        for credential in executor.map(_credential_builder, executor_kwargs):
-            credentials.append(credential)
-
-    credentials = CredentialList(credentials)
+    if discover:
+        credentials = CredentialList(_discover_bls_credentials(
+            mnemonic, start_index, bls_withdrawal_credentials_list, chain_setting, None, inventory=inventory))
+    else:
+        credentials = CredentialList(list(credentials_from_mnemonic(
+            mnemonic=mnemonic,
+            mnemonic_password=mnemonic_password,
+            num_keys=num_keys,
+            amounts=amounts,
+            chain_setting=chain_setting,
+            start_index=start_index,
+            hex_withdrawal_address=None,
+            compounding=compounding,
+            use_pbkdf2=use_pbkdf2,
+        )))
 
     # Check if the given old bls_withdrawal_credentials is as same as the mnemonic generated
     executor_kwargs = [{
@@ -257,7 +366,7 @@ def validate_bls_credentials(
         'bls_withdrawal_credentials': bls_withdrawal_credentials_list[i],
     } for i, credential in enumerate(credentials.credentials)]
 
-    with concurrent.futures.ProcessPoolExecutor() as executor:
+    with _process_pool() as executor:
         for e in executor.map(_validate_credentials_match, executor_kwargs):
             if e is not None:
                 raise ValidationError('err_not_matching')
@@ -277,6 +386,25 @@ def validate_mnemonic(mnemonic: str, word_lists_path: str, language: Optional[st
     else:
         raise ValidationError('That is not a valid mnemonic, please check for typos.')
 
+def repair_mnemonic(mnemonic: str, word_lists_path: str, pubkey: Optional[bytes] = None,
+                    withdrawal_credentials: Optional[bytes] = None, account_indices: Sequence[int] = (0,)) -> str:
+    """Search the corrections of a mnemonic rejected by validate_mnemonic, with a mistyped, swapped or missing
+    word, for the one deriving a known key of one of its validators, and return it.
+
+    Keyword arguments:
+    mnemonic -- the mnemonic to repair
+    word_lists_path -- path to the word lists directory
+    pubkey -- the signing pubkey of a validator of the mnemonic
+    withdrawal_credentials -- the BLS withdrawal credentials of a validator of the mnemonic
+    account_indices -- the account indices the validator may have been generated at (default (0,))
+    """
+    repaired_mnemonic = search_mnemonic_repair(mnemonic, word_lists_path, pubkey=pubkey,
+                                               withdrawal_credentials=withdrawal_credentials,
+                                               account_indices=account_indices)
+    if repaired_mnemonic is None:
+        raise ValidationError('No correction of the mnemonic derives the given validator key.')
+    return repaired_mnemonic
+
 def create_mnemonic(word_list, language='english'):
     """Returns a new random mnemonic.
 
@@ -288,20 +416,6 @@ def create_mnemonic(word_list, language='english'):
     """
     return get_mnemonic(language=language, words_path=word_list)
 
-def _credential_builder(kwargs: Dict[str, Any]) -> Credential:
-    return Credential(**kwargs)
-
-def _keystore_exporter(kwargs: Dict[str, Any]) -> str:
-    credential: Credential = kwargs.pop('credential')
-    return credential.save_signing_keystore(**kwargs)
-
-def _deposit_data_builder(credential: Credential) -> Dict[str, bytes]:
-    return credential.deposit_datum_dict
-
-def _keystore_verifier(kwargs: Dict[str, Any]) -> bool:
-    credential: Credential = kwargs.pop('credential')
-    return credential.verify_keystore(**kwargs)
-
 def generate_keys(args):
     """Generate validator keys.
 
@@ -320,7 +434,34 @@ def generate_keys(args):
                                        withdrawal credentials
             - compounding: (Optional) if the user wants compounding (0x02) credentials. Requires
                                        withdrawal address to be defined
+            - max_kdf_memory: (Optional) maximum memory in MiB used by the keystore encryptions running
+                              at the same time, defaults to the available memory
+            - events: (Optional) 'ndjson' to write one JSON line on stdout for every completed stage of
+                      every validator, periodic progress lines with the keys/sec and ETA, and a final line
+                      with the resulting files, pubkeys and deposit roots
+            - resume: (Optional) resume the interrupted key generation with the same arguments in the
+                      folder, skipping the keys that were already generated
+            - shard: (Optional) 'k/N' to only generate the k-th of N contiguous shards of the account
+                     indices, whose deposit data files can then be merged with merge_deposit_data
+            - inventory: (Optional) path of the validator inventory (SQLite) to add the generated keys to
+            - additional_network: (Optional) networks to also create the deposit data for, without deriving
+                                  and encrypting the keys again, each saved to a folder named after the network
+            - top_up_amount: (Optional) amounts of the top-up deposits to also sign for every validator after
+                             its deposit, saved to their own top_up_deposit_data file, requires compounding
+                             credentials
     """
+    from eth_utils import is_hex_address, to_normalized_address
+
+    from ethstaker_deposit.credentials import (
+        generate_keys_pipeline,
+        get_signing_pubkey,
+        open_key_generation_journal,
+        verify_journal_deposit_data,
+    )
+    from ethstaker_deposit.settings import get_chain_setting
+    from ethstaker_deposit.utils.deposit import export_deposit_data_json, get_deposit_data_shard, parse_shard
+    from ethstaker_deposit.utils.inventory import ValidatorInventoryEntry, export_inventory
+    from ethstaker_deposit.utils.validation import verify_deposit_data_json_matching
 
     eth1_withdrawal_address = None
     if args.eth1_withdrawal_address:
@@ -332,14 +473,24 @@ def generate_keys(args):
 
     mnemonic = validate_mnemonic(args.mnemonic, args.wordlist)
     mnemonic_password = ''
-    amounts = [args.amount] * args.count
+    start_index = args.index
+    num_keys=args.count
+    shard = None
+    if args.shard is not None:
+        first_pubkey = get_signing_pubkey(mnemonic=mnemonic, mnemonic_password=mnemonic_password, index=start_index)
+        shard = get_deposit_data_shard(start_index, num_keys, parse_shard(args.shard), first_pubkey)
+        start_index, num_keys = shard.index_range.start, len(shard.index_range)
+
+    amounts = [args.amount] * num_keys
+    top_up_amounts = args.top_up_amount or []
+    if top_up_amounts and not (args.compounding and eth1_withdrawal_address):
+        raise ValueError("The top-up deposits can only be generated for compounding validators.")
     folder = args.folder
     chain_setting = get_chain_setting(args.network)
+    additional_chain_settings = [get_chain_setting(network) for network in args.additional_network or []]
     if not os.path.exists(folder):
         os.mkdir(folder)
 
-    start_index = args.index
-    num_keys=args.count
     hex_withdrawal_address=eth1_withdrawal_address
     password=args.password
 
@@ -348,77 +499,178 @@ def generate_keys(args):
             f"The number of keys ({num_keys}) doesn't equal to the corresponding deposit amounts ({len(amounts)})."
         )
 
-    timestamp = time.time()
+    start_time = time.time()
     use_pbkdf2 = False
+    events = args.events == 'ndjson'
+    max_kdf_memory = args.max_kdf_memory * 2**20 if args.max_kdf_memory is not None else None
+
+    journal = open_key_generation_journal(
+        mnemonic=mnemonic,
+        mnemonic_password=mnemonic_password,
+        num_keys=num_keys,
+        amounts=amounts,
+        chain_setting=chain_setting,
+        start_index=start_index,
+        hex_withdrawal_address=hex_withdrawal_address,
+        compounding=args.compounding,
+        use_pbkdf2=use_pbkdf2,
+        password=password,
+        folder=folder,
+        timestamp=start_time,
+        max_kdf_memory=max_kdf_memory,
+        resume=args.resume,
+        additional_chain_settings=additional_chain_settings,
+        top_up_amounts=top_up_amounts,
+    )
+    pipeline = generate_keys_pipeline(
+        mnemonic=mnemonic,
+        mnemonic_password=mnemonic_password,
+        num_keys=num_keys,
+        amounts=amounts,
+        chain_setting=chain_setting,
+        start_index=start_index,
+        hex_withdrawal_address=hex_withdrawal_address,
+        compounding=args.compounding,
+        use_pbkdf2=use_pbkdf2,
+        password=password,
+        folder=folder,
+        timestamp=journal.timestamp,
+        max_kdf_memory=max_kdf_memory,
+        skip_indices=journal.completed_indices,
+        additional_chain_settings=additional_chain_settings,
+        top_up_amounts=top_up_amounts,
+    )
+    resumed = len(journal.completed_indices)
+    completed = resumed
+    last_progress_event = start_time
+    for result in pipeline:
+        completed += 1
+        if events:
+            _emit_event({
+                'event': 'stage',
+                'stage': 'keystore',
+                'index': result.key_index,
+                'path': result.keystore_filefolder,
+                'valid': result.valid_keystore,
+            })
+            _emit_event({
+                'event': 'stage',
+                'stage': 'deposit',
+                'index': result.key_index,
+                'pubkey': result.deposit_datum['pubkey'].hex(),
+                'deposit_data_root': result.deposit_datum['deposit_data_root'].hex(),
+                'valid': result.valid_deposit,
+            })
+
+        if not result.valid_keystore:
+            raise ValidationError("Failed to verify the keystores.")
+
+        if not result.valid_deposit:
+            raise ValidationError("Failed to verify the deposit data JSON files.")
+
+        journal.record(result.key_index, result.keystore_filefolder, result.deposit_datum,
+                       result.additional_deposit_data, result.top_up_deposit_data)
+        if not events:
+            continue
+
+        now = time.time()
+        if now - last_progress_event >= PROGRESS_EVENT_INTERVAL or completed == num_keys:
+            last_progress_event = now
+            keys_per_second = (completed - resumed) / max(now - start_time, 1e-9)
+            _emit_event({
+                'event': 'progress',
+                'completed': completed,
+                'total': num_keys,
+                'keys_per_second': keys_per_second,
+                'eta_seconds': (num_keys - completed) / keys_per_second,
+            })
+
+    # The journal also holds the keys of a resumed key generation, whose deposits are only derived and verified
+    # again if they were recorded before the journal tail verified when resuming
+    if not verify_journal_deposit_data(
+        journal,
+        mnemonic=mnemonic,
+        mnemonic_password=mnemonic_password,
+        num_keys=num_keys,
+        amounts=amounts,
+        chain_setting=chain_setting,
+        start_index=start_index,
+        hex_withdrawal_address=hex_withdrawal_address,
+        compounding=args.compounding,
+        use_pbkdf2=use_pbkdf2,
+        additional_chain_settings=additional_chain_settings,
+        top_up_amounts=top_up_amounts,
+    ):
+        raise ValidationError("Failed to verify the deposit data JSON files.")
 
-    key_indices = range(start_index, start_index + num_keys)
-
-    credentials: list[Credential] = []
-    executor_kwargs = [{
-        'mnemonic': mnemonic,
-        'mnemonic_password': mnemonic_password,
-        'index': index,
-        'amount': amounts[index - start_index],
-        'chain_setting': chain_setting,
-        'hex_withdrawal_address': hex_withdrawal_address,
-        'compounding': args.compounding,
-        'use_pbkdf2': use_pbkdf2,
-    } for index in key_indices]
-
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        for credential in executor.map(_credential_builder, executor_kwargs):
-            credentials.append(credential)
-
-    credentials = CredentialList(credentials)
-
-    keystore_filefolders: list[str] = []
-    executor_kwargs = [{
-        'credential': credential,
-        'password': password,
-        'folder': folder,
-        'timestamp': timestamp,
-    } for credential in credentials.credentials]
-
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        for filefolder in executor.map(_keystore_exporter, executor_kwargs):
-            keystore_filefolders.append(filefolder)
-
-    deposit_data = []
-
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        for datum_dict in executor.map(_deposit_data_builder, credentials.credentials):
-            deposit_data.append(datum_dict)
-
-    deposits_file = export_deposit_data_json_util(folder, timestamp, deposit_data)
-
-    items = zip(credentials.credentials, keystore_filefolders)
-
-    all_valid_keystores = True
-    executor_kwargs = [{
-        'credential': credential,
-        'keystore_filefolder': fileholder,
-        'password': password,
-    } for credential, fileholder in items]
-
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        for valid_keystore in executor.map(_keystore_verifier, executor_kwargs):
-            all_valid_keystores &= valid_keystore
-
-    if not all_valid_keystores:
-        raise ValidationError("Failed to verify the keystores.")
-
-    all_valid_deposits = True
-    deposit_json = []
-    with open(deposits_file, 'r', encoding='utf-8') as f:
-        deposit_json = json.load(f)
+    # The deposit data file is only written once every key has been verified, the top-up deposits being saved to
+    # their own file so that the deposit data file has one deposit for every key
+    deposit_data_filefolder = export_deposit_data_json(folder, journal.timestamp, journal.deposit_data(), shard)
+    top_up_deposit_data_filefolder = None
+    if top_up_amounts:
+        top_up_deposit_data_filefolder = export_deposit_data_json(
+            folder, journal.timestamp, journal.top_up_deposit_data(), shard, top_ups=True)
+    additional_deposit_data_filefolders = {}
+    additional_top_up_deposit_data_filefolders = {}
+    for network, additional_chain_setting in enumerate(additional_chain_settings, start=1):
+        network_folder = os.path.join(folder, additional_chain_setting.NETWORK_NAME)
+        if not os.path.exists(network_folder):
+            os.mkdir(network_folder)
+        additional_deposit_data_filefolders[additional_chain_setting.NETWORK_NAME] = export_deposit_data_json(
+            network_folder, journal.timestamp, journal.deposit_data(network), shard)
+        if top_up_amounts:
+            additional_top_up_deposit_data_filefolders[additional_chain_setting.NETWORK_NAME] = \
+                export_deposit_data_json(network_folder, journal.timestamp, journal.top_up_deposit_data(network),
+                                         shard, top_ups=True)
+
+    # The files are read back and compared with the verified deposit data of the journal
+    deposits_files = [(deposit_data_filefolder, journal.deposit_data())] + [
+        (additional_deposit_data_filefolders[setting.NETWORK_NAME], journal.deposit_data(network))
+        for network, setting in enumerate(additional_chain_settings, start=1)]
+    if top_up_amounts:
+        deposits_files += [(top_up_deposit_data_filefolder, journal.top_up_deposit_data())] + [
+            (additional_top_up_deposit_data_filefolders[setting.NETWORK_NAME], journal.top_up_deposit_data(network))
+            for network, setting in enumerate(additional_chain_settings, start=1)]
+    for deposits_file, deposit_data in deposits_files:
+        if not verify_deposit_data_json_matching(deposits_file, deposit_data, shard):
+            raise ValidationError("Failed to verify the deposit data JSON files.")
+    if args.inventory is not None:
+        for network in range(1 + len(additional_chain_settings)):
+            export_inventory(args.inventory, (
+                ValidatorInventoryEntry.from_deposit_datum(*key) for key in journal.completed_keys(network)))
+    if events:
+        _emit_event({
+            'event': 'done',
+            'deposit_data': deposit_data_filefolder,
+            'additional_deposit_data': additional_deposit_data_filefolders,
+            'top_up_deposit_data': top_up_deposit_data_filefolder,
+            'additional_top_up_deposit_data': additional_top_up_deposit_data_filefolders,
+            'keys': [{
+                'index': index,
+                'keystore': keystore_filefolder,
+                'pubkey': deposit_datum['pubkey'],
+                'deposit_data_root': deposit_datum['deposit_data_root'],
+            } for index, keystore_filefolder, deposit_datum in journal.completed_keys()],
+        })
+    journal.remove()
+
+def merge_deposit_data(folder, deposit_data):
+    """Merge the deposit data files of the shards of a key generation into a single deposit data file.
 
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        chain_settings = [chain_setting] * len(deposit_json)
-        for valid_deposit in executor.map(validate_deposit, deposit_json, chain_settings, credentials.credentials):
-            all_valid_deposits &= valid_deposit
+    Keyword arguments:
+    folder -- folder path for the resulting deposit data file
+    deposit_data -- paths of the deposit data files of the shards, generated with generate_keys --shard
+    """
+    from ethstaker_deposit.utils.deposit import merge_deposit_data_json
 
-    if not all_valid_deposits:
-        raise ValidationError("Failed to verify the deposit data JSON files.")
+    if not os.path.exists(folder):
+        os.mkdir(folder)
+    filefolder, index_range = merge_deposit_data_json(deposit_data, folder, time.time())
+    return {
+        'deposit_data': filefolder,
+        'first_index': index_range.start,
+        'last_index': index_range.stop - 1,
+    }
 
 def decode_bytes(value):
     if value.startswith('0x'):
@@ -435,7 +687,9 @@ def parse_bls_change(args):
         args.index,
         [int(i) for i in args.indices.split(',')],
         [decode_bytes(i) for i in args.withdrawal_credentials.split(',')],
-        args.execution_address)
+        args.execution_address,
+        inventory=args.inventory,
+        discover=args.discover)
 
 def parse_validate_bls_credentials(args):
     """Parse CLI arguments to call the validate_bls_credentials function.
@@ -444,7 +698,9 @@ def parse_validate_bls_credentials(args):
         args.chain,
         args.mnemonic,
         args.index,
-        [decode_bytes(i) for i in args.withdrawal_credentials.split(',')])
+        [decode_bytes(i) for i in args.withdrawal_credentials.split(',')],
+        inventory=args.inventory,
+        discover=args.discover)
 
 def parse_create_mnemonic(args):
     """Parse CLI arguments to call the create_mnemonic function.
@@ -455,24 +711,116 @@ def parse_create_mnemonic(args):
     else:
         mnemonic = create_mnemonic(args.wordlist)
 
-    print(json.dumps({
+    return {
         'mnemonic': mnemonic
-    }))
+    }
 
 def parse_generate_keys(args):
     """Parse CLI arguments to call the generate_keys function.
     """
     generate_keys(args)
 
+def parse_merge_deposit_data(args):
+    """Parse CLI arguments to call the merge_deposit_data function.
+    """
+    return merge_deposit_data(args.folder, args.deposit_data)
+
 def parse_validate_mnemonic(args):
     """Parse CLI arguments to call the validate_mnemonic function.
     """
     validate_mnemonic(args.mnemonic, args.wordlist)
 
-def main():
-    """The application starting point.
+def parse_repair_mnemonic(args):
+    """Parse CLI arguments to call the repair_mnemonic function.
+    """
+    if args.pubkey is None and args.withdrawal_credentials is None:
+        raise ValueError("Either the pubkey or the BLS withdrawal credentials of a validator should be given.")
+    return {
+        'mnemonic': repair_mnemonic(
+            args.mnemonic,
+            args.wordlist,
+            pubkey=decode_bytes(args.pubkey) if args.pubkey is not None else None,
+            withdrawal_credentials=(
+                decode_bytes(args.withdrawal_credentials) if args.withdrawal_credentials is not None else None),
+            account_indices=[int(i) for i in args.indices.split(',')])
+    }
+
+def _json_rpc_error(request_id, code, message):
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+def handle_json_rpc_request(parser, line):
+    """Run a single JSON-RPC 2.0 request and return its response, or None for a notification.
+
+    The method is the name of a subcommand and the params are its command line arguments, eg.
+    {"jsonrpc": "2.0", "id": 1, "method": "validate_mnemonic", "params": ["<word lists path>", "<mnemonic>"]}
+    """
+    try:
+        request = json.loads(line)
+    except ValueError as exc:
+        return _json_rpc_error(None, JSON_RPC_PARSE_ERROR, str(exc))
+
+    if not isinstance(request, dict):
+        return _json_rpc_error(None, JSON_RPC_INVALID_REQUEST, 'The request should be an object.')
+    request_id = request.get('id')
+    method = request.get('method')
+    params = request.get('params', [])
+    if not isinstance(params, list) or not all(isinstance(param, str) for param in params):
+        response = _json_rpc_error(request_id, JSON_RPC_INVALID_REQUEST, 'The params should be a list of strings.')
+    elif method not in SUBCOMMANDS:
+        response = _json_rpc_error(request_id, JSON_RPC_METHOD_NOT_FOUND, f'Unknown method {method}.')
+    else:
+        try:
+            # stdout only carries the responses, argparse errors and anything else printed go to stderr
+            with redirect_stdout(sys.stderr):
+                args = parser.parse_args([method, *params])
+                result = args.func(args)
+        except SystemExit:
+            response = _json_rpc_error(request_id, JSON_RPC_INVALID_PARAMS, f'Invalid params for {method}.')
+        except (ValidationError, ValueError) as exc:
+            response = _json_rpc_error(request_id, JSON_RPC_VALIDATION_ERROR, str(exc))
+        except Exception as exc:
+            response = _json_rpc_error(request_id, JSON_RPC_INTERNAL_ERROR, str(exc))
+        else:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+    return response if 'id' in request else None
+
+def serve(parser, max_kdf_memory=None):
+    """Serve the subcommands as line-delimited JSON-RPC 2.0 over stdin and stdout until stdin is closed.
+
+    The interpreter, its caches and a warm worker pool stay alive between requests, avoiding the startup cost of a
+    new process for every call. The generate_keys events are sent as "event" notifications. The keystore
+    encryptions of every request only use max_kdf_memory bytes at the same time, which defaults to the available
+    memory, on top of the max_kdf_memory of the request.
+    """
+    from ethstaker_deposit.credentials import credential_pool_session
+    from ethstaker_deposit.key_handling.key_derivation.path import get_derivation_context
+
+    global _serving, _event_sink
+    stdout = sys.stdout
+
+    def send_event(event):
+        print(json.dumps({'jsonrpc': '2.0', 'method': 'event', 'params': event}), file=stdout, flush=True)
+
+    with credential_pool_session(max_kdf_memory):
+        _serving = True
+        _event_sink = send_event
+        try:
+            for line in sys.stdin:
+                if not line.strip():
+                    continue
+                response = handle_json_rpc_request(parser, line)
+                # The seed of the last mnemonic is not kept around once its request is done
+                get_derivation_context.cache_clear()
+                if response is not None:
+                    print(json.dumps(response), flush=True)
+        finally:
+            _serving = False
+            _event_sink = None
+
+def build_parser():
+    """Return the command line parser of the application.
     """
-    freeze_support()  # Needed when running under Windows in a frozen bundle
     main_parser = argparse.ArgumentParser()
 
     subparsers = main_parser.add_subparsers(title="subcommands")
@@ -493,6 +841,13 @@ def main():
     generate_parser.add_argument("password", help="Password for the keystore files", type=str)
     generate_parser.add_argument("--eth1_withdrawal_address", help="Optional eth1 withdrawal address", type=str)
     generate_parser.add_argument("--compounding", action="store_true", help="Optional compounding argument")
+    generate_parser.add_argument("--max_kdf_memory", help="Optional memory limit in MiB for concurrent keystore encryptions", type=int)
+    generate_parser.add_argument("--events", help="Optional progress and result events format", choices=["ndjson"])
+    generate_parser.add_argument("--resume", action="store_true", help="Optional resume of an interrupted key generation in the folder")
+    generate_parser.add_argument("--shard", help="Optional shard k/N of the keys to generate", type=str)
+    generate_parser.add_argument("--inventory", help="Optional validator inventory to add the keys to", type=str)
+    generate_parser.add_argument("--additional_network", help="Optional other network to also create the deposit data for", action="append")
+    generate_parser.add_argument("--top_up_amount", help="Optional top-up deposit amount to also sign for every validator", type=int, action="append")
     generate_parser.set_defaults(func=parse_generate_keys)
 
     validate_parser = subparsers.add_parser("validate_mnemonic")
@@ -500,6 +855,19 @@ def main():
     validate_parser.add_argument("mnemonic", help="Mnemonic", type=str)
     validate_parser.set_defaults(func=parse_validate_mnemonic)
 
+    repair_parser = subparsers.add_parser("repair_mnemonic")
+    repair_parser.add_argument("wordlist", help="Path to word list directory", type=str)
+    repair_parser.add_argument("mnemonic", help="Mnemonic to repair", type=str)
+    repair_parser.add_argument("--pubkey", help="Signing pubkey of a validator of the mnemonic", type=str)
+    repair_parser.add_argument("--withdrawal_credentials", help="BLS withdrawal credentials of a validator of the mnemonic", type=str)
+    repair_parser.add_argument("--indices", help="Account index number(s) the validator may have (comma separated)", type=str, default="0")
+    repair_parser.set_defaults(func=parse_repair_mnemonic)
+
+    merge_parser = subparsers.add_parser("merge_deposit_data")
+    merge_parser.add_argument("folder", help="Where to put the merged deposit data file", type=str)
+    merge_parser.add_argument("deposit_data", help="Deposit data files of the shards", type=str, nargs="+")
+    merge_parser.set_defaults(func=parse_merge_deposit_data)
+
     generate_parser = subparsers.add_parser("bls_change")
     generate_parser.add_argument("folder", help="Where to put the bls change files", type=str)
     generate_parser.add_argument("chain", help="For which network to create the change", type=str)
@@ -508,6 +876,8 @@ def main():
     generate_parser.add_argument("indices", help="Validator index number(s) as identified on the beacon chain (comma separated)", type=str)
     generate_parser.add_argument("withdrawal_credentials", help="Old BLS withdrawal credentials of the given validator(s) (comma separated)", type=str)
     generate_parser.add_argument("execution_address", help="withdrawal address", type=str)
+    generate_parser.add_argument("--inventory", help="Optional validator inventory to look the validators up in with --discover", type=str)
+    generate_parser.add_argument("--discover", help="Scan for the account index of each validator from the start index", action="store_true")
     generate_parser.set_defaults(func=parse_bls_change)
 
     generate_parser = subparsers.add_parser("validate_bls_credentials")
@@ -515,17 +885,39 @@ def main():
     generate_parser.add_argument("mnemonic", help="Mnemonic", type=str)
     generate_parser.add_argument("index", help="Validator start index", type=int)
     generate_parser.add_argument("withdrawal_credentials", help="Old BLS withdrawal credentials of the given validator(s) (comma separated)", type=str)
+    generate_parser.add_argument("--inventory", help="Optional validator inventory to look the validators up in with --discover", type=str)
+    generate_parser.add_argument("--discover", help="Scan for the account index of each validator from the start index", action="store_true")
     generate_parser.set_defaults(func=parse_validate_bls_credentials)
 
+    serve_parser = subparsers.add_parser("serve", help="Serve the other subcommands as JSON-RPC over stdin/stdout")
+    serve_parser.add_argument("--max_kdf_memory", help="Optional memory limit in MiB for concurrent keystore encryptions of every request", type=int)
+    serve_parser.set_defaults(func=None)
+
+    return main_parser
+
+# Subcommands that can be called as JSON-RPC methods by the serve subcommand
+SUBCOMMANDS = ("create_mnemonic", "generate_keys", "validate_mnemonic", "repair_mnemonic", "merge_deposit_data",
+               "bls_change", "validate_bls_credentials")
+
+def main():
+    """The application starting point.
+    """
+    freeze_support()  # Needed when running under Windows in a frozen bundle
+    main_parser = build_parser()
+
     args = main_parser.parse_args()
     if not args or 'func' not in args:
         main_parser.parse_args(['-h'])
+    elif args.func is None:
+        serve(main_parser, args.max_kdf_memory * 2**20 if args.max_kdf_memory is not None else None)
     else:
         try:
-            args.func(args)
+            result = args.func(args)
         except (ValidationError, ValueError) as exc:
             print(str(exc), file=sys.stderr)
             sys.exit(1)
+        if result is not None:
+            print(json.dumps(result))
 
 if __name__ == "__main__":
     main()
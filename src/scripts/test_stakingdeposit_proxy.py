@@ -0,0 +1,355 @@
+"""Tests for the stakingdeposit_proxy application: import time budgets and the serve subcommand.
+
+The ethstaker-deposit-cli sources, and the packages installed next to them by the application, are put on
+the path the same way the application does when calling the proxy, so the tests run with a plain:
+
+    python -m pytest src/scripts
+"""
+
+import glob
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+SCRIPTS_PATH = os.path.dirname(os.path.abspath(__file__))
+PROXY_PATH = os.path.join(SCRIPTS_PATH, 'stakingdeposit_proxy.py')
+DEPOSIT_CLI_PATH = os.path.join(SCRIPTS_PATH, '..', 'vendors', 'ethstaker-deposit-cli-1.2.2')
+REQUIREMENT_PACKAGES_PATH = os.path.join(SCRIPTS_PATH, '..', '..', 'dist', 'packages')
+# Environment of the proxy processes, whose path starts like the one of the proxy called by the application
+PROXY_ENV = {**os.environ, 'PYTHONPATH': os.pathsep.join(
+    [REQUIREMENT_PACKAGES_PATH, DEPOSIT_CLI_PATH] + ([os.environ['PYTHONPATH']] if 'PYTHONPATH' in os.environ else []))}
+sys.path[:0] = [REQUIREMENT_PACKAGES_PATH, DEPOSIT_CLI_PATH]
+
+import stakingdeposit_proxy  # noqa: E402
+
+WORD_LISTS_PATH = os.path.join(DEPOSIT_CLI_PATH, 'ethstaker_deposit', 'key_handling', 'key_derivation', 'word_lists')
+MNEMONIC = 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about'
+BLS_WITHDRAWAL_CREDENTIALS = '0x00' + '11' * 31
+WITHDRAWAL_ADDRESS = '0x00000000219ab540356cbb839cbe05303d7705fa'
+
+# Modules that the lightweight subcommands should never load
+HEAVY_MODULES = ('py_ecc', 'ssz', 'click', 'eth_utils', 'ethstaker_deposit.credentials')
+
+# Budgets in milliseconds for the `-X importtime` total of each subcommand. They leave plenty of
+# headroom for slow machines, the lightweight ones are about 10x faster than the others.
+LIGHT_IMPORT_TIME_BUDGET = 300
+HEAVY_IMPORT_TIME_BUDGET = 4000
+
+
+def _import_time(args: list[str]) -> tuple[float, set[str]]:
+    """Run the proxy with `args` and return its total import time in milliseconds and the imported modules.
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', PROXY_PATH, *args],
+        capture_output=True, text=True, env=PROXY_ENV,
+    )
+    total = 0
+    modules = set()
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_time, _, module = line[len('import time:'):].split('|')
+        if not self_time.strip().isdigit():
+            continue  # Header line
+        total += int(self_time)
+        modules.add(module.strip())
+    return total / 1000, modules
+
+
+def _subcommand_args(subcommand: str, folder: str) -> list[str]:
+    return {
+        'create_mnemonic': [subcommand, WORD_LISTS_PATH],
+        'validate_mnemonic': [subcommand, WORD_LISTS_PATH, MNEMONIC],
+        'merge_deposit_data': [
+            subcommand, folder, os.path.join(folder, 'deposit_data-0-shard-1-of-1-indices-0-0-run-00000000.json')],
+        'generate_keys': [subcommand, WORD_LISTS_PATH, MNEMONIC, '0', '32000000000', '0', folder, 'hoodi',
+                          'testpassword123'],
+        'bls_change': [subcommand, folder, 'hoodi', MNEMONIC, '0', '1', BLS_WITHDRAWAL_CREDENTIALS,
+                       WITHDRAWAL_ADDRESS],
+        'validate_bls_credentials': [subcommand, 'hoodi', MNEMONIC, '0', BLS_WITHDRAWAL_CREDENTIALS],
+    }[subcommand]
+
+
+@pytest.mark.parametrize('subcommand', ['create_mnemonic', 'validate_mnemonic', 'merge_deposit_data'])
+def test_light_subcommand_import_time(subcommand: str, tmp_path) -> None:
+    import_time, modules = _import_time(_subcommand_args(subcommand, str(tmp_path)))
+    assert import_time < LIGHT_IMPORT_TIME_BUDGET
+    assert not [module for module in modules if module.split('.')[0] in HEAVY_MODULES or module in HEAVY_MODULES]
+
+
+@pytest.mark.parametrize('subcommand', ['generate_keys', 'bls_change', 'validate_bls_credentials'])
+def test_heavy_subcommand_import_time(subcommand: str, tmp_path) -> None:
+    import_time, modules = _import_time(_subcommand_args(subcommand, str(tmp_path)))
+    assert import_time < HEAVY_IMPORT_TIME_BUDGET
+    # Make sure the subcommand did run and load what it needs
+    assert 'ethstaker_deposit.credentials' in modules
+
+
+def test_generate_keys_ndjson_events(tmp_path) -> None:
+    folder = str(tmp_path)
+    process = subprocess.run(
+        [sys.executable, PROXY_PATH, 'generate_keys', WORD_LISTS_PATH, MNEMONIC, '3', '32000000000', '2', folder,
+         'hoodi', 'testpassword123', '--eth1_withdrawal_address', WITHDRAWAL_ADDRESS, '--events', 'ndjson'],
+        capture_output=True, text=True, cwd=DEPOSIT_CLI_PATH, env=PROXY_ENV,
+    )
+    assert process.returncode == 0, process.stderr
+
+    # Every line of stdout is an event
+    events = [json.loads(line) for line in process.stdout.splitlines()]
+    [deposit_data_file] = glob.glob(os.path.join(folder, 'deposit_data-*.json'))
+    with open(deposit_data_file, 'r', encoding='utf-8') as f:
+        deposit_data = json.load(f)
+
+    # A keystore and a deposit stage for every key, in index order
+    stages = [event for event in events if event['event'] == 'stage']
+    assert [(event['stage'], event['index']) for event in stages] == [
+        ('keystore', 3), ('deposit', 3), ('keystore', 4), ('deposit', 4)]
+    assert all(event['valid'] for event in stages)
+    keystores = [event['path'] for event in stages if event['stage'] == 'keystore']
+    assert [os.path.basename(path).split('-')[1] for path in keystores] == ['m_12381_3600_3_0_0', 'm_12381_3600_4_0_0']
+    assert all(os.path.exists(path) for path in keystores)
+    assert [(event['pubkey'], event['deposit_data_root']) for event in stages if event['stage'] == 'deposit'] == [
+        (deposit_datum['pubkey'], deposit_datum['deposit_data_root']) for deposit_datum in deposit_data]
+
+    # The progress of the last key is always reported, and the run ends with the resulting files
+    progress = [event for event in events if event['event'] == 'progress']
+    assert progress and progress[-1]['completed'] == progress[-1]['total'] == 2
+    assert progress[-1]['eta_seconds'] == 0 and progress[-1]['keys_per_second'] > 0
+    assert events[-1] == {
+        'event': 'done',
+        'deposit_data': deposit_data_file,
+        'additional_deposit_data': {},
+        'top_up_deposit_data': None,
+        'additional_top_up_deposit_data': {},
+        'keys': [{
+            'index': index,
+            'keystore': keystore,
+            'pubkey': deposit_datum['pubkey'],
+            'deposit_data_root': deposit_datum['deposit_data_root'],
+        } for index, keystore, deposit_datum in zip((3, 4), keystores, deposit_data)],
+    }
+    assert [event['event'] for event in events].count('done') == 1
+
+
+def test_generate_keys_top_ups(tmp_path) -> None:
+    folder = str(tmp_path)
+    process = subprocess.run(
+        [sys.executable, PROXY_PATH, 'generate_keys', WORD_LISTS_PATH, MNEMONIC, '0', '32000000000', '2', folder,
+         'hoodi', 'testpassword123', '--eth1_withdrawal_address', WITHDRAWAL_ADDRESS, '--compounding',
+         '--top_up_amount', '1000000000', '--top_up_amount', '2000000000'],
+        capture_output=True, text=True, cwd=DEPOSIT_CLI_PATH, env=PROXY_ENV,
+    )
+    assert process.returncode == 0, process.stderr
+
+    # The deposit data file has one deposit for every key, their top-up deposits are in their own file
+    [deposit_data_file] = glob.glob(os.path.join(folder, 'deposit_data-*.json'))
+    with open(deposit_data_file, 'r', encoding='utf-8') as f:
+        deposit_data = json.load(f)
+    [top_up_deposit_data_file] = glob.glob(os.path.join(folder, 'top_up_deposit_data-*.json'))
+    with open(top_up_deposit_data_file, 'r', encoding='utf-8') as f:
+        top_up_deposit_data = json.load(f)
+    assert [deposit_datum['amount'] for deposit_datum in deposit_data] == [32000000000] * 2
+    assert [deposit_datum['amount'] for deposit_datum in top_up_deposit_data] == [1000000000, 2000000000] * 2
+    pubkeys = [deposit_datum['pubkey'] for deposit_datum in deposit_data]
+    assert pubkeys[0] != pubkeys[1]
+    assert [deposit_datum['pubkey'] for deposit_datum in top_up_deposit_data] == [
+        pubkey for pubkey in pubkeys for _ in range(2)]
+
+    # Top-ups are refused without compounding credentials
+    process = subprocess.run(
+        [sys.executable, PROXY_PATH, 'generate_keys', WORD_LISTS_PATH, MNEMONIC, '0', '32000000000', '1',
+         os.path.join(folder, 'other'), 'hoodi', 'testpassword123', '--eth1_withdrawal_address', WITHDRAWAL_ADDRESS,
+         '--top_up_amount', '1000000000'],
+        capture_output=True, text=True, cwd=DEPOSIT_CLI_PATH, env=PROXY_ENV,
+    )
+    assert process.returncode != 0
+    assert 'compounding' in process.stderr
+
+
+def _json_rpc_request(request_id, method, params):
+    return json.dumps({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params})
+
+
+@pytest.mark.parametrize(
+    'line, code',
+    [
+        ('{"jsonrpc": "2.0", "id": 1', stakingdeposit_proxy.JSON_RPC_PARSE_ERROR),
+        ('[1, 2]', stakingdeposit_proxy.JSON_RPC_INVALID_REQUEST),
+        (_json_rpc_request(1, 'validate_mnemonic', [WORD_LISTS_PATH, 1]),
+         stakingdeposit_proxy.JSON_RPC_INVALID_REQUEST),
+        (_json_rpc_request(1, 'serve', []), stakingdeposit_proxy.JSON_RPC_METHOD_NOT_FOUND),
+        (_json_rpc_request(1, 'validate_mnemonic', [WORD_LISTS_PATH]), stakingdeposit_proxy.JSON_RPC_INVALID_PARAMS),
+        (_json_rpc_request(1, 'validate_mnemonic', [WORD_LISTS_PATH, 'abandon about']),
+         stakingdeposit_proxy.JSON_RPC_VALIDATION_ERROR),
+    ]
+)
+def test_handle_json_rpc_request_error(line: str, code: int) -> None:
+    response = stakingdeposit_proxy.handle_json_rpc_request(stakingdeposit_proxy.build_parser(), line)
+    assert response['jsonrpc'] == '2.0'
+    assert response['error']['code'] == code
+    assert 'result' not in response
+
+
+def test_handle_json_rpc_request() -> None:
+    parser = stakingdeposit_proxy.build_parser()
+    response = stakingdeposit_proxy.handle_json_rpc_request(
+        parser, _json_rpc_request('a', 'validate_mnemonic', [WORD_LISTS_PATH, MNEMONIC]))
+    assert response == {'jsonrpc': '2.0', 'id': 'a', 'result': None}
+
+    # Notifications have no response
+    notification = {'jsonrpc': '2.0', 'method': 'validate_mnemonic', 'params': [WORD_LISTS_PATH, MNEMONIC]}
+    assert stakingdeposit_proxy.handle_json_rpc_request(parser, json.dumps(notification)) is None
+
+
+def test_repair_mnemonic() -> None:
+    from py_ecc.bls import G2ProofOfPossession as bls
+    from ethstaker_deposit.exceptions import ValidationError
+    from ethstaker_deposit.key_handling.key_derivation.path import mnemonic_and_path_to_key
+
+    mnemonic = 'abandon amount liar amount expire adjust cage candy arch gather drum buyer'
+    broken_mnemonic = mnemonic.replace('cage', 'cge')
+    pubkey = bls.SkToPk(mnemonic_and_path_to_key(mnemonic=mnemonic, path='m/12381/3600/1/0/0', password=''))
+    parser = stakingdeposit_proxy.build_parser()
+
+    args = parser.parse_args(
+        ['repair_mnemonic', WORD_LISTS_PATH, broken_mnemonic, '--pubkey', '0x' + pubkey.hex(), '--indices', '0,1'])
+    assert args.func(args) == {'mnemonic': mnemonic}
+
+    # The key is not derived at the searched index
+    args = parser.parse_args(['repair_mnemonic', WORD_LISTS_PATH, broken_mnemonic, '--pubkey', '0x' + pubkey.hex()])
+    with pytest.raises(ValidationError):
+        args.func(args)
+
+    args = parser.parse_args(['repair_mnemonic', WORD_LISTS_PATH, broken_mnemonic])
+    with pytest.raises(ValueError):
+        args.func(args)
+
+
+def test_serve(tmp_path) -> None:
+    folders = [str(tmp_path / str(index)) for index in range(2)]
+    requests = [
+        _json_rpc_request(1, 'validate_mnemonic', [WORD_LISTS_PATH, MNEMONIC]),
+        '',
+        # Two key generations are served by the same worker pool
+        _json_rpc_request(2, 'generate_keys', [WORD_LISTS_PATH, MNEMONIC, '0', '32000000000', '1', folders[0],
+                                               'hoodi', 'testpassword123', '--events', 'ndjson']),
+        _json_rpc_request(3, 'generate_keys', [WORD_LISTS_PATH, MNEMONIC, '1', '32000000000', '1', folders[1],
+                                               'hoodi', 'testpassword123']),
+        _json_rpc_request(4, 'generate_keys', [WORD_LISTS_PATH, MNEMONIC]),
+    ]
+    # The internationalisation files are looked up from the working directory
+    process = subprocess.run(
+        [sys.executable, PROXY_PATH, 'serve'],
+        input='\n'.join(requests) + '\n', capture_output=True, text=True, cwd=DEPOSIT_CLI_PATH,
+        env=PROXY_ENV,
+    )
+    assert process.returncode == 0, process.stderr
+
+    # stdout only carries JSON-RPC messages
+    messages = [json.loads(line) for line in process.stdout.splitlines()]
+    responses = [message for message in messages if 'id' in message]
+    assert [response['id'] for response in responses] == [1, 2, 3, 4]
+    assert [response['result'] for response in responses[:3]] == [None, None, None]
+    assert responses[3]['error']['code'] == stakingdeposit_proxy.JSON_RPC_INVALID_PARAMS
+
+    # The events of the first key generation are sent as notifications before its response
+    events = [message['params'] for message in messages[:messages.index(responses[1])] if 'id' not in message]
+    assert all(message['method'] == 'event' for message in messages if 'id' not in message)
+    assert [event['event'] for event in events] == ['stage', 'stage', 'progress', 'done']
+
+    for index, folder in enumerate(folders):
+        [deposit_data_file] = glob.glob(os.path.join(folder, 'deposit_data-*.json'))
+        with open(deposit_data_file, 'r', encoding='utf-8') as f:
+            [deposit_datum] = json.load(f)
+        assert len(glob.glob(os.path.join(folder, 'keystore-m_12381_3600_%i_0_0-*.json' % index))) == 1
+        assert deposit_datum['network_name'] == 'hoodi'
+
+
+def test_bls_credentials_discover(tmp_path, monkeypatch) -> None:
+    from ethstaker_deposit.credentials import credentials_at_account_indices
+    from ethstaker_deposit.exceptions import ValidationError
+    from ethstaker_deposit.settings import get_chain_setting
+
+    credentials = list(credentials_at_account_indices(
+        mnemonic=MNEMONIC, mnemonic_password='', account_indices=[5, 2], amounts=[32 * 10**9] * 2,
+        chain_setting=get_chain_setting('hoodi'), hex_withdrawal_address=None))
+    withdrawal_credentials = [credential.withdrawal_credentials for credential in credentials]
+    # The internationalisation files are looked up from the working directory
+    monkeypatch.chdir(DEPOSIT_CLI_PATH)
+
+    with pytest.raises(ValidationError):
+        stakingdeposit_proxy.validate_bls_credentials('hoodi', MNEMONIC, 1, withdrawal_credentials)
+    stakingdeposit_proxy.validate_bls_credentials('hoodi', MNEMONIC, 1, withdrawal_credentials, discover=True)
+    with pytest.raises(ValidationError):
+        stakingdeposit_proxy.validate_bls_credentials(
+            'hoodi', MNEMONIC, 1, [withdrawal_credentials[0], bytes.fromhex(BLS_WITHDRAWAL_CREDENTIALS[2:])],
+            discover=True)
+
+    folder = str(tmp_path / 'bls_change')
+    stakingdeposit_proxy.generate_bls_to_execution_change(
+        folder, 'hoodi', MNEMONIC, 1, [7, 8], withdrawal_credentials, '0x' + '22' * 20, discover=True)
+    (btec_file,) = glob.glob(os.path.join(folder, 'bls_to_execution_change-*.json'))
+    with open(btec_file, encoding='utf-8') as f:
+        btec_json = json.load(f)
+    assert [btec['message']['from_bls_pubkey'] for btec in btec_json] == [
+        '0x' + credential.withdrawal_pk.hex() for credential in credentials]
+
+
+def test_validate_bls_credentials_inventory(tmp_path, monkeypatch) -> None:
+    from ethstaker_deposit.credentials import credentials_at_account_indices
+    from ethstaker_deposit.exceptions import ValidationError
+    from ethstaker_deposit.key_handling.key_derivation import path as path_module
+    from ethstaker_deposit.settings import get_chain_setting
+    from ethstaker_deposit.utils.inventory import ValidatorInventoryEntry, export_inventory
+
+    account_indices = [5, 2]
+    credentials = list(credentials_at_account_indices(
+        mnemonic=MNEMONIC, mnemonic_password='', account_indices=account_indices, amounts=[32 * 10**9] * 2,
+        chain_setting=get_chain_setting('hoodi'), hex_withdrawal_address=None))
+    withdrawal_credentials = [credential.withdrawal_credentials for credential in credentials]
+    wrong_withdrawal_credentials = [withdrawal_credentials[0], bytes.fromhex(BLS_WITHDRAWAL_CREDENTIALS[2:])]
+    # The internationalisation files are looked up from the working directory
+    monkeypatch.chdir(DEPOSIT_CLI_PATH)
+
+    def _export(inventory: str, recorded_indices: list[int], recorded_credentials: list[bytes]) -> None:
+        export_inventory(inventory, (
+            ValidatorInventoryEntry.from_deposit_datum(
+                index, None, {**credential.deposit_datum_dict, 'withdrawal_credentials': recorded})
+            for index, credential, recorded in zip(recorded_indices, credentials, recorded_credentials)
+        ))
+
+    scanned_credentials = []
+
+    def _discover_account_indices(**kwargs):
+        scanned_credentials.append(list(kwargs['withdrawal_credentials']))
+        return discover_account_indices(**kwargs)
+
+    discover_account_indices = path_module.discover_account_indices
+    monkeypatch.setattr(path_module, 'discover_account_indices', _discover_account_indices)
+
+    # The validators found in the inventory are not scanned for
+    inventory = str(tmp_path / 'inventory.sqlite')
+    _export(inventory, account_indices, withdrawal_credentials)
+    stakingdeposit_proxy.validate_bls_credentials(
+        'hoodi', MNEMONIC, 0, withdrawal_credentials, inventory=inventory, discover=True)
+    assert scanned_credentials == []
+    with pytest.raises(ValidationError):
+        stakingdeposit_proxy.validate_bls_credentials(
+            'hoodi', MNEMONIC, 0, wrong_withdrawal_credentials, inventory=inventory, discover=True)
+    assert scanned_credentials == [wrong_withdrawal_credentials[1:]]
+    with pytest.raises(ValueError):
+        stakingdeposit_proxy.validate_bls_credentials('hoodi', MNEMONIC, 0, withdrawal_credentials, inventory=inventory)
+
+    # An inventory recording the wrong account index or BLS withdrawal credentials does not let them through
+    scanned_credentials.clear()
+    tampered_inventory = str(tmp_path / 'tampered.sqlite')
+    _export(tampered_inventory, [1, 2], [withdrawal_credentials[0], wrong_withdrawal_credentials[1]])
+    stakingdeposit_proxy.validate_bls_credentials(
+        'hoodi', MNEMONIC, 0, withdrawal_credentials, inventory=tampered_inventory, discover=True)
+    assert scanned_credentials == [withdrawal_credentials]
+    with pytest.raises(ValidationError):
+        stakingdeposit_proxy.validate_bls_credentials(
+            'hoodi', MNEMONIC, 0, wrong_withdrawal_credentials, inventory=tampered_inventory, discover=True)
\ No newline at end of file
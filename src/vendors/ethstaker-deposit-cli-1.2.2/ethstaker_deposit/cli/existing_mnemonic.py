@@ -22,7 +22,7 @@ from ethstaker_deposit.utils.click import (
     prompt_if_none,
 )
 from ethstaker_deposit.utils.intl import fuzzy_reverse_dict_lookup, get_first_options, load_text
-from ethstaker_deposit.utils.validation import validate_int_range
+from ethstaker_deposit.utils.validation import validate_int_range, validate_shard
 from .generate_keys import (
     generate_keys,
     generate_keys_arguments_decorator,
@@ -114,6 +114,18 @@ def validate_mnemonic_language(ctx: click.Context, param: Any, language: str) ->
     param_decls="--validator_start_index",
     prompt=False,  # the callback handles the prompt
 )
+@jit_option(
+    default=False,
+    help=lambda: load_text(['arg_resume', 'help'], func='existing_mnemonic'),
+    is_flag=True,
+    param_decls='--resume',
+)
+@jit_option(
+    callback=validate_shard,
+    default=None,
+    help=lambda: load_text(['arg_shard', 'help'], func='existing_mnemonic'),
+    param_decls='--shard',
+)
 @generate_keys_arguments_decorator
 @click.pass_context
 def existing_mnemonic(ctx: click.Context, mnemonic: str, mnemonic_password: str, **kwargs: Any) -> None:
@@ -0,0 +1,191 @@
+import click
+import os
+import sys
+import time
+from typing import Any, Optional
+
+from ethstaker_deposit.credentials import sign_keystore_exits
+from ethstaker_deposit.exceptions import ValidationError
+from ethstaker_deposit.settings import (
+    MAINNET,
+    ALL_CHAIN_KEYS,
+    get_chain_setting,
+    BaseChainSetting,
+)
+from ethstaker_deposit.utils import config
+from ethstaker_deposit.utils.click import (
+    captive_prompt_callback,
+    choice_prompt_func,
+    jit_option,
+    prompt_if_other_is_none,
+)
+from ethstaker_deposit.utils.constants import DEFAULT_EXIT_TRANSACTION_FOLDER_NAME
+from ethstaker_deposit.utils.exit_transaction import (
+    export_exit_transaction_json,
+    export_exit_transactions_json,
+    find_keystore_files,
+    load_validator_indices,
+)
+from ethstaker_deposit.utils.intl import (
+    closest_match,
+    load_text,
+)
+from ethstaker_deposit.utils.validation import (
+    validate_keystore_file,
+    verify_signed_exits_json,
+    validate_devnet_chain_setting,
+)
+
+
+FUNC_NAME = 'exit_transaction_keystores'
+
+
+@click.command(
+    help=load_text(['arg_exit_transaction_keystores', 'help'], func=FUNC_NAME),
+)
+@jit_option(
+    callback=captive_prompt_callback(
+        lambda x, _: closest_match(x, ALL_CHAIN_KEYS),
+        choice_prompt_func(
+            lambda: load_text(['arg_exit_transaction_keystores_chain', 'prompt'], func=FUNC_NAME),
+            ALL_CHAIN_KEYS
+        ),
+        prompt_if=prompt_if_other_is_none('devnet_chain_setting'),
+        default=MAINNET,
+    ),
+    default=MAINNET,
+    help=lambda: load_text(['arg_exit_transaction_keystores_chain', 'help'], func=FUNC_NAME),
+    param_decls='--chain',
+    prompt=False,  # the callback handles the prompt
+)
+@jit_option(
+    help=lambda: load_text(['arg_exit_transaction_keystores_keystores', 'help'], func=FUNC_NAME),
+    param_decls='--keystores',
+    required=True,
+)
+@jit_option(
+    help=lambda: load_text(['arg_exit_transaction_keystores_password_file', 'help'], func=FUNC_NAME),
+    param_decls='--keystore_password_file',
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False),
+)
+@jit_option(
+    help=lambda: load_text(['arg_exit_transaction_keystores_validator_indices', 'help'], func=FUNC_NAME),
+    param_decls='--validator_indices_file',
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False),
+)
+@jit_option(
+    default=0,
+    help=lambda: load_text(['arg_exit_transaction_keystores_epoch', 'help'], func=FUNC_NAME),
+    param_decls='--epoch',
+)
+@jit_option(
+    default=os.getcwd(),
+    help=lambda: load_text(['arg_exit_transaction_keystores_output_folder', 'help'], func=FUNC_NAME),
+    param_decls='--output_folder',
+    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+)
+@jit_option(
+    default=False,
+    help=lambda: load_text(['arg_per_validator_files', 'help'], func=FUNC_NAME),
+    is_flag=True,
+    param_decls='--per_validator_files',
+)
+@jit_option(
+    default=None,
+    help=lambda: load_text(['arg_max_kdf_memory', 'help'], func=FUNC_NAME),
+    param_decls='--max_kdf_memory',
+    type=click.IntRange(min=1),
+)
+@jit_option(
+    callback=validate_devnet_chain_setting,
+    default=None,
+    help=lambda: load_text(['arg_devnet_chain_setting', 'help'], func=FUNC_NAME),
+    param_decls='--devnet_chain_setting',
+    is_eager=True,
+)
+@click.pass_context
+def exit_transaction_keystores(
+        ctx: click.Context,
+        chain: str,
+        keystores: str,
+        keystore_password_file: str,
+        validator_indices_file: str,
+        epoch: int,
+        output_folder: str,
+        per_validator_files: bool,
+        max_kdf_memory: Optional[int],
+        devnet_chain_setting: Optional[BaseChainSetting],
+        **kwargs: Any) -> None:
+    try:
+        keystore_filefolders = find_keystore_files(keystores)
+    except ValueError:
+        click.echo(load_text(['err_no_keystores']).format(keystores=keystores), err=True)
+        sys.exit(1)
+    with open(keystore_password_file, 'r', encoding='utf-8') as f:
+        keystore_password = f.readline().rstrip('\r\n')
+    try:
+        known_validator_indices = load_validator_indices(validator_indices_file)
+    except ValueError:
+        click.echo(load_text(['err_invalid_validator_indices']).format(
+            validator_indices_file=validator_indices_file), err=True)
+        sys.exit(1)
+
+    # Match every keystore with its validator before decrypting any of them
+    pubkeys = []
+    validator_indices = []
+    for filefolder in keystore_filefolders:
+        pubkey = validate_keystore_file(filefolder).pubkey.lower()
+        if pubkey in pubkeys:
+            click.echo(load_text(['err_duplicate_keystore']).format(keystore=filefolder), err=True)
+            sys.exit(1)
+        if pubkey not in known_validator_indices:
+            click.echo(load_text(['err_unknown_validator_index']).format(keystore=filefolder), err=True)
+            sys.exit(1)
+        pubkeys.append(pubkey)
+        validator_indices.append(known_validator_indices[pubkey])
+
+    # Get chain setting
+    chain_setting = devnet_chain_setting if devnet_chain_setting is not None else get_chain_setting(chain)
+
+    folder = os.path.join(output_folder, DEFAULT_EXIT_TRANSACTION_FOLDER_NAME)
+    if not os.path.exists(folder):
+        os.mkdir(folder)
+
+    signed_exits = []
+    with click.progressbar(length=len(keystore_filefolders),  # type: ignore[var-annotated]
+                           label=load_text(['msg_exit_transaction_creation']),
+                           show_percent=False, show_pos=True) as bar:
+        try:
+            for signed_exit in sign_keystore_exits(
+                keystore_filefolders=keystore_filefolders,
+                password=keystore_password,
+                validator_indices=validator_indices,
+                epoch=epoch,
+                chain_setting=chain_setting,
+                max_kdf_memory=max_kdf_memory * 2**20 if max_kdf_memory is not None else None,
+            ):
+                signed_exits.append(signed_exit)
+                bar.update(1)
+        except ValueError:
+            # The exits are signed in the order of the keystores, the next one could not be decrypted
+            keystore = keystore_filefolders[len(signed_exits)]
+            click.echo(load_text(['err_keystore_password']).format(keystore=keystore), err=True)
+            sys.exit(1)
+
+    timestamp = time.time()
+    saved_folder = export_exit_transactions_json(folder, signed_exits, timestamp)
+
+    click.echo(load_text(['msg_verify_exit_transactions']))
+    if not all(verify_signed_exits_json(saved_folder, pubkeys, chain_setting)):
+        os.remove(saved_folder)
+        raise ValidationError(load_text(['err_verify_exit_transactions']))
+
+    if per_validator_files:
+        for signed_exit in signed_exits:
+            export_exit_transaction_json(folder, signed_exit, timestamp)
+
+    click.echo(load_text(['msg_creation_success']).format(num_exits=len(signed_exits)) + saved_folder)
+    if not config.non_interactive:
+        click.pause(load_text(['msg_pause']))
@@ -21,6 +21,7 @@ from ethstaker_deposit.utils.click import (
     prompt_if_other_is_none,
 )
 from ethstaker_deposit.utils.constants import DEFAULT_EXIT_TRANSACTION_FOLDER_NAME
+from ethstaker_deposit.utils.exit_transaction import export_exit_transactions_json
 from ethstaker_deposit.utils.intl import (
     closest_match,
     load_text,
@@ -29,8 +30,13 @@ from ethstaker_deposit.utils.validation import (
     validate_int_range,
     validate_validator_indices,
     verify_signed_exit_json,
+    verify_signed_exits_json,
     validate_devnet_chain_setting,
 )
+from ethstaker_deposit.utils.ssz import (
+    SignedVoluntaryExit,
+    VoluntaryExit,
+)
 from ethstaker_deposit.utils.terminal import clear_terminal
 
 
@@ -43,6 +49,12 @@ def _exit_exporter(kwargs: Dict[str, Any]) -> str:
     return credential.save_exit_transaction(**kwargs)
 
 
+def _exit_signer(kwargs: Dict[str, Any]) -> bytes:
+    credential: Credential = kwargs.pop('credential')
+    signature: bytes = credential.get_exit_transaction(**kwargs).signature  # type: ignore[attr-defined]
+    return signature
+
+
 def _exit_verifier(kwargs: Dict[str, Any]) -> bool:
     credential: Credential = kwargs.pop('credential')
     kwargs['pubkey'] = credential.signing_pk.hex()
@@ -102,6 +114,12 @@ FUNC_NAME = 'exit_transaction_mnemonic'
     param_decls='--output_folder',
     type=click.Path(exists=True, file_okay=False, dir_okay=True),
 )
+@jit_option(
+    default=False,
+    help=lambda: load_text(['arg_combined_output', 'help'], func=FUNC_NAME),
+    is_flag=True,
+    param_decls='--combined_output',
+)
 @jit_option(
     callback=validate_devnet_chain_setting,
     default=None,
@@ -119,6 +137,7 @@ def exit_transaction_mnemonic(
         validator_indices: Sequence[int],
         epoch: int,
         output_folder: str,
+        combined_output: bool,
         devnet_chain_setting: Optional[BaseChainSetting],
         **kwargs: Any) -> None:
 
@@ -153,6 +172,39 @@ def exit_transaction_mnemonic(
                 credentials.append(credential)
                 bar.update(1)
 
+    if combined_output:
+        signed_exits = []
+        with click.progressbar(length=num_keys,  # type: ignore[var-annotated]
+                               label=load_text(['msg_exit_transaction_creation']),
+                               show_percent=False, show_pos=True) as bar:
+
+            executor_kwargs = [{
+                'credential': credential,
+                'validator_index': validator_index,
+                'epoch': epoch,
+            } for credential, validator_index in zip(credentials, validator_indices)]
+
+            with concurrent.futures.ProcessPoolExecutor() as executor:
+                for validator_index, signature in zip(validator_indices, executor.map(_exit_signer, executor_kwargs)):
+                    signed_exits.append(SignedVoluntaryExit(  # type: ignore[no-untyped-call]
+                        message=VoluntaryExit(epoch=epoch, validator_index=validator_index),  # type: ignore[no-untyped-call]
+                        signature=signature,
+                    ))
+                    bar.update(1)
+
+        saved_folder = export_exit_transactions_json(folder, signed_exits, time.time())
+
+        click.echo(load_text(['msg_verify_exit_transactions']))
+        pubkeys = [credential.signing_pk.hex() for credential in credentials]
+        if not all(verify_signed_exits_json(saved_folder, pubkeys, chain_setting)):
+            os.remove(saved_folder)
+            raise ValidationError(load_text(['err_verify_exit_transactions']))
+
+        click.echo(load_text(['msg_creation_success']) + saved_folder)
+        if not config.non_interactive:
+            click.pause(load_text(['msg_pause']))
+        return
+
     transaction_filefolders = []
     with click.progressbar(length=num_keys,  # type: ignore[var-annotated]
                            label=load_text(['msg_exit_transaction_creation']),
@@ -5,22 +5,30 @@ from typing import (
     Any,
     Callable,
     Optional,
+    Sequence,
 )
 
 from eth_typing import HexAddress
 from ethstaker_deposit.credentials import (
-    CredentialList,
+    generate_keys_pipeline,
+    get_signing_pubkey,
+    open_key_generation_journal,
+    verify_journal_deposit_data,
 )
 from ethstaker_deposit.exceptions import ValidationError
 from ethstaker_deposit.utils import config
+from ethstaker_deposit.utils.deposit import export_deposit_data_json, get_deposit_data_shard
+from ethstaker_deposit.utils.inventory import ValidatorInventoryEntry, export_inventory
 from ethstaker_deposit.utils.validation import (
-    verify_deposit_data_json,
+    validate_additional_chains,
     validate_int_range,
     validate_password_strength,
     validate_withdrawal_address,
     validate_yesno,
     validate_deposit_amount,
     validate_devnet_chain_setting,
+    validate_top_up_amounts,
+    verify_deposit_data_json_matching,
 )
 from ethstaker_deposit.utils.constants import (
     DEFAULT_VALIDATOR_KEYS_FOLDER_NAME,
@@ -140,12 +148,36 @@ def generate_keys_arguments_decorator(function: Callable[..., Any]) -> Callable[
             prompt=False,  # the callback handles the prompt
             show_default=True,
         ),
+        jit_option(
+            callback=validate_top_up_amounts,
+            help=lambda: load_text(['arg_top_up_amount', 'help'], func='generate_keys_arguments_decorator'),
+            multiple=True,
+            param_decls='--top_up_amount',
+        ),
         jit_option(
             default=False,
             is_flag=True,
             param_decls='--pbkdf2',
             help=lambda: load_text(['arg_pbkdf2', 'help'], func='generate_keys_arguments_decorator'),
         ),
+        jit_option(
+            default=None,
+            help=lambda: load_text(['arg_max_kdf_memory', 'help'], func='generate_keys_arguments_decorator'),
+            param_decls='--max_kdf_memory',
+            type=click.IntRange(min=1),
+        ),
+        jit_option(
+            default=None,
+            help=lambda: load_text(['arg_inventory', 'help'], func='generate_keys_arguments_decorator'),
+            param_decls='--inventory',
+            type=click.Path(file_okay=True, dir_okay=False),
+        ),
+        jit_option(
+            callback=validate_additional_chains,
+            help=lambda: load_text(['arg_additional_chain', 'help'], func='generate_keys_arguments_decorator'),
+            multiple=True,
+            param_decls='--additional_chain',
+        ),
         jit_option(
             callback=validate_devnet_chain_setting,
             default=None,
@@ -188,7 +220,9 @@ def get_default_amount() -> str:
 @click.pass_context
 def generate_keys(ctx: click.Context, validator_start_index: int,
                   num_validators: int, folder: str, chain: str, keystore_password: str,
-                  withdrawal_address: HexAddress, compounding: bool, amount: float, pbkdf2: bool,
+                  withdrawal_address: HexAddress, compounding: bool, amount: float, top_up_amount: Sequence[int],
+                  pbkdf2: bool, max_kdf_memory: Optional[int], inventory: Optional[str],
+                  additional_chain: Sequence[BaseChainSetting],
                   devnet_chain_setting: Optional[BaseChainSetting], **kwargs: Any) -> None:
     mnemonic = ctx.obj['mnemonic']
     mnemonic_password = ctx.obj['mnemonic_password']
@@ -196,19 +230,30 @@ def generate_keys(ctx: click.Context, validator_start_index: int,
     # Get chain setting
     chain_setting = devnet_chain_setting if devnet_chain_setting is not None else get_chain_setting(chain)
 
+    # `existing_mnemonic` can only generate the account indices of one shard of the keys
+    shard = None
+    if kwargs.get('shard') is not None:
+        shard = get_deposit_data_shard(validator_start_index, num_validators, kwargs['shard'], get_signing_pubkey(
+            mnemonic=mnemonic, mnemonic_password=mnemonic_password, index=validator_start_index))
+        validator_start_index, num_validators = shard.index_range.start, len(shard.index_range)
+
     if withdrawal_address is None or not compounding:
+        if top_up_amount:
+            raise ValidationError(load_text(['err_top_up_amount_compounding']))
         amount = chain_setting.MIN_ACTIVATION_AMOUNT * ETH2GWEI
     amounts = [amount] * num_validators
     folder = os.path.join(folder, DEFAULT_VALIDATOR_KEYS_FOLDER_NAME)
 
     amounts = [amount * chain_setting.MULTIPLIER for amount in amounts]
+    top_up_amounts = [top_up * chain_setting.MULTIPLIER for top_up in top_up_amount]
 
     if not os.path.exists(folder):
         os.mkdir(folder)
     clear_terminal()
     click.echo(RHINO_0)
     click.echo(load_text(['msg_key_creation']))
-    credentials = CredentialList.from_mnemonic(
+    # `existing_mnemonic` can resume an interrupted key generation from the journal in the output folder
+    journal = open_key_generation_journal(
         mnemonic=mnemonic,
         mnemonic_password=mnemonic_password,
         num_keys=num_validators,
@@ -217,17 +262,96 @@ def generate_keys(ctx: click.Context, validator_start_index: int,
         start_index=validator_start_index,
         hex_withdrawal_address=withdrawal_address,
         compounding=compounding,
-        use_pbkdf2=pbkdf2
+        use_pbkdf2=pbkdf2,
+        password=keystore_password,
+        folder=folder,
+        timestamp=time.time(),
+        max_kdf_memory=max_kdf_memory * 2**20 if max_kdf_memory is not None else None,
+        resume=kwargs.get('resume', False),
+        additional_chain_settings=additional_chain,
+        top_up_amounts=top_up_amounts,
     )
 
-    timestamp = time.time()
+    with click.progressbar(length=num_validators,  # type: ignore[var-annotated]
+                           show_percent=False, show_pos=True) as bar:
+        bar.update(len(journal.completed_indices))
+        for result in generate_keys_pipeline(
+            mnemonic=mnemonic,
+            mnemonic_password=mnemonic_password,
+            num_keys=num_validators,
+            amounts=amounts,
+            chain_setting=chain_setting,
+            start_index=validator_start_index,
+            hex_withdrawal_address=withdrawal_address,
+            compounding=compounding,
+            use_pbkdf2=pbkdf2,
+            password=keystore_password,
+            folder=folder,
+            timestamp=journal.timestamp,
+            max_kdf_memory=max_kdf_memory * 2**20 if max_kdf_memory is not None else None,
+            skip_indices=journal.completed_indices,
+            additional_chain_settings=additional_chain,
+            top_up_amounts=top_up_amounts,
+        ):
+            if not result.valid_keystore:
+                raise ValidationError(load_text(['err_verify_keystores']))
+            if not result.valid_deposit:
+                raise ValidationError(load_text(['err_verify_deposit']))
+            journal.record(result.key_index, result.keystore_filefolder, result.deposit_datum,
+                           result.additional_deposit_data, result.top_up_deposit_data)
+            bar.update(1)
 
-    keystore_filefolders = credentials.export_keystores(password=keystore_password, folder=folder, timestamp=timestamp)
-    deposits_file = credentials.export_deposit_data_json(folder=folder, timestamp=timestamp)
-    if not credentials.verify_keystores(keystore_filefolders=keystore_filefolders, password=keystore_password):
-        raise ValidationError(load_text(['err_verify_keystores']))
-    if not verify_deposit_data_json(deposits_file, credentials.credentials, chain_setting):
+    # The journal also holds the keys of a resumed key generation, whose deposits are only derived and verified
+    # again if they were recorded before the journal tail verified when resuming
+    if not verify_journal_deposit_data(
+        journal,
+        mnemonic=mnemonic,
+        mnemonic_password=mnemonic_password,
+        num_keys=num_validators,
+        amounts=amounts,
+        chain_setting=chain_setting,
+        start_index=validator_start_index,
+        hex_withdrawal_address=withdrawal_address,
+        compounding=compounding,
+        use_pbkdf2=pbkdf2,
+        additional_chain_settings=additional_chain,
+        top_up_amounts=top_up_amounts,
+    ):
         raise ValidationError(load_text(['err_verify_deposit']))
+
+    # The deposit data files are only written once every key has been verified. The deposit data files of the
+    # additional chains are kept apart, in a folder named after their network
+    network_folders = [folder]
+    for additional_chain_setting in additional_chain:
+        network_folder = os.path.join(folder, additional_chain_setting.NETWORK_NAME)
+        if not os.path.exists(network_folder):
+            os.mkdir(network_folder)
+        network_folders.append(network_folder)
+    deposits_files = []
+    for network, network_folder in enumerate(network_folders):
+        deposits_files.append((
+            export_deposit_data_json(network_folder, journal.timestamp, journal.deposit_data(network), shard),
+            journal.deposit_data(network),
+        ))
+        # The top-up deposits are saved to their own file, the deposit data file having one deposit for every key
+        if top_up_amounts:
+            deposits_files.append((
+                export_deposit_data_json(network_folder, journal.timestamp, journal.top_up_deposit_data(network),
+                                         shard, top_ups=True),
+                journal.top_up_deposit_data(network),
+            ))
+
+    # The files are read back and compared with the verified deposit data of the journal
+    for deposits_file, deposit_data in deposits_files:
+        if not verify_deposit_data_json_matching(deposits_file, deposit_data, shard):
+            raise ValidationError(load_text(['err_verify_deposit']))
+
+    if inventory is not None:
+        for network in range(1 + len(additional_chain)):
+            export_inventory(inventory, (
+                ValidatorInventoryEntry.from_deposit_datum(*key) for key in journal.completed_keys(network)))
+    journal.remove()
+
     click.echo(load_text(['msg_creation_success']) + folder)
     if not config.non_interactive:
         click.pause(load_text(['msg_pause']))
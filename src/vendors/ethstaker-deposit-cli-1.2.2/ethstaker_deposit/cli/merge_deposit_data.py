@@ -0,0 +1,49 @@
+import click
+import os
+import time
+from typing import Any
+
+from ethstaker_deposit.utils import config
+from ethstaker_deposit.utils.click import jit_option
+from ethstaker_deposit.utils.constants import DEFAULT_VALIDATOR_KEYS_FOLDER_NAME
+from ethstaker_deposit.utils.deposit import merge_deposit_data_json
+from ethstaker_deposit.utils.intl import load_text
+
+
+FUNC_NAME = 'merge_deposit_data'
+
+
+@click.command(
+    help=load_text(['arg_merge_deposit_data', 'help'], func=FUNC_NAME),
+)
+@jit_option(
+    help=lambda: load_text(['arg_deposit_data', 'help'], func=FUNC_NAME),
+    multiple=True,
+    param_decls='--deposit_data',
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False),
+)
+@jit_option(
+    default=os.getcwd(),
+    help=lambda: load_text(['arg_output_folder', 'help'], func=FUNC_NAME),
+    param_decls='--output_folder',
+    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+)
+@click.pass_context
+def merge_deposit_data(
+        ctx: click.Context,
+        deposit_data: tuple[str, ...],
+        output_folder: str,
+        **kwargs: Any) -> None:
+    folder = os.path.join(output_folder, DEFAULT_VALIDATOR_KEYS_FOLDER_NAME)
+    if not os.path.exists(folder):
+        os.mkdir(folder)
+
+    click.echo(load_text(['msg_merge_deposit_data']))
+    saved_folder, index_range = merge_deposit_data_json(deposit_data, folder, time.time())
+
+    click.echo(load_text(['msg_merge_success']).format(
+        num_deposits=len(index_range), first_index=index_range.start, last_index=index_range.stop - 1,
+    ) + saved_folder)
+    if not config.non_interactive:
+        click.pause(load_text(['msg_pause']))
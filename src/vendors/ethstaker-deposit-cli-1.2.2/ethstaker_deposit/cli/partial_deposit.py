@@ -19,6 +19,7 @@ from ethstaker_deposit.settings import (
     BaseChainSetting,
 )
 from ethstaker_deposit.utils import config
+from ethstaker_deposit.utils.bls import SkToPk
 from ethstaker_deposit.utils.click import (
     captive_prompt_callback,
     choice_prompt_func,
@@ -42,6 +43,7 @@ from ethstaker_deposit.utils.ssz import (
     DepositMessage,
     compute_deposit_domain,
     compute_signing_root,
+    hash_tree_root,
 )
 from ethstaker_deposit.utils.validation import (
     validate_deposit,
@@ -181,7 +183,7 @@ def partial_deposit(
     withdrawal_credentials += to_canonical_address(withdrawal_address)
 
     deposit_message = DepositMessage(  # type: ignore[no-untyped-call]
-        pubkey=bls.SkToPk(signing_key),
+        pubkey=SkToPk(signing_key),
         withdrawal_credentials=withdrawal_credentials,
         amount=amount
     )
@@ -202,8 +204,8 @@ def partial_deposit(
 
     click.echo(load_text(['msg_partial_deposit_creation']))
     deposit_data = signed_deposit.as_dict()  # type: ignore[no-untyped-call]
-    deposit_data.update({'deposit_message_root': deposit_message.hash_tree_root})
-    deposit_data.update({'deposit_data_root': signed_deposit.hash_tree_root})
+    deposit_data.update({'deposit_message_root': hash_tree_root(deposit_message)})
+    deposit_data.update({'deposit_data_root': hash_tree_root(signed_deposit)})
     deposit_data.update({'fork_version': chain_setting.GENESIS_FORK_VERSION})
     deposit_data.update({'network_name': chain_setting.NETWORK_NAME})
     deposit_data.update({'deposit_cli_version': DEPOSIT_CLI_VERSION})
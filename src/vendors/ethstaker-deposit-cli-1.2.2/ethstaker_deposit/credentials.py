@@ -4,7 +4,14 @@ from enum import Enum
 import time
 import json
 import concurrent.futures
-from typing import Dict, Optional, Any, Sequence
+import itertools
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from multiprocessing.synchronize import Barrier, BoundedSemaphore
+from typing import Collection, Dict, Iterator, NamedTuple, Optional, Any, Sequence, Tuple
 
 from eth_typing import Address, HexAddress
 from eth_utils import to_canonical_address
@@ -12,7 +19,7 @@ from py_ecc.bls import G2ProofOfPossession as bls
 
 from ethstaker_deposit.exceptions import ValidationError
 from ethstaker_deposit.utils.exit_transaction import exit_transaction_generation, export_exit_transaction_json
-from ethstaker_deposit.key_handling.key_derivation.path import mnemonic_and_path_to_key
+from ethstaker_deposit.key_handling.key_derivation.path import get_derivation_context
 from ethstaker_deposit.key_handling.keystore import (
     Keystore,
     Pbkdf2Keystore,
@@ -22,28 +29,35 @@ from ethstaker_deposit.settings import (
     DEPOSIT_CLI_VERSION,
     BaseChainSetting,
 )
+from ethstaker_deposit.utils.bls import SkToPk
 from ethstaker_deposit.utils.constants import (
     BLS_WITHDRAWAL_PREFIX,
     EXECUTION_ADDRESS_WITHDRAWAL_PREFIX,
     COMPOUNDING_WITHDRAWAL_PREFIX,
     ETH2GWEI,
     MAX_DEPOSIT_AMOUNT,
+    VALIDATOR_KEY_PATH_PREFIX,
 )
 from ethstaker_deposit.utils.crypto import SHA256
 from ethstaker_deposit.utils.deposit import export_deposit_data_json as export_deposit_data_json_util
 from ethstaker_deposit.utils.intl import load_text
+from ethstaker_deposit.utils.journal import KeyGenerationJournal
 from ethstaker_deposit.utils.ssz import (
     compute_deposit_domain,
     compute_bls_to_execution_change_domain,
     compute_signing_root,
+    hash_tree_root,
     BLSToExecutionChange,
     DepositData,
     DepositMessage,
     SignedBLSToExecutionChange,
+    SignedVoluntaryExit,
+    VoluntaryExit,
 )
 from ethstaker_deposit.utils.file_handling import (
     sensitive_opener,
 )
+from ethstaker_deposit.utils.validation import validate_deposits
 
 
 class WithdrawalType(Enum):
@@ -52,11 +66,118 @@ class WithdrawalType(Enum):
     COMPOUNDING_WITHDRAWAL = 2
 
 
+def _scrypt_kdf_memory() -> int:
+    params = ScryptKeystore().crypto.kdf.params
+    return 128 * params['r'] * params['n']
+
+
+# Memory used by a single scrypt keystore KDF (256 MiB with the EIP-2335 default parameters)
+SCRYPT_KDF_MEMORY = _scrypt_kdf_memory()
+
+
+def get_available_memory() -> Optional[int]:
+    """
+    Return the memory available for starting new applications in bytes as reported by `/proc/meminfo`,
+    or None where it cannot be determined.
+    """
+    try:
+        with open('/proc/meminfo', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def max_concurrent_kdfs(*, use_pbkdf2: Optional[bool] = False, max_kdf_memory: Optional[int] = None) -> Optional[int]:
+    """
+    Return how many keystore KDFs can run at the same time within `max_kdf_memory` bytes, which defaults to
+    the available memory. None means the KDFs do not need to be limited.
+    """
+    if use_pbkdf2:
+        # PBKDF2 is CPU-bound only
+        return None
+    if max_kdf_memory is None:
+        max_kdf_memory = get_available_memory()
+        if max_kdf_memory is None:
+            return None
+    return max(1, max_kdf_memory // SCRYPT_KDF_MEMORY)
+
+
+# Semaphore shared by the workers of a pool to cap the number of concurrent KDFs, installed by `_init_kdf_worker`
+_kdf_slots: Optional[BoundedSemaphore] = None
+
+
+@contextmanager
+def _kdf_slot() -> Iterator[None]:
+    if _kdf_slots is None:
+        yield
+    else:
+        with _kdf_slots:
+            yield
+
+
+def _kdf_semaphore(max_kdfs: Optional[int]) -> Optional[BoundedSemaphore]:
+    # Every worker of a default sized pool can run its KDF at the same time
+    if max_kdfs is None or max_kdfs >= (os.cpu_count() or 1):
+        return None
+    return multiprocessing.BoundedSemaphore(max_kdfs)
+
+
+def _init_kdf_worker(kdf_slots: Optional[BoundedSemaphore]) -> None:
+    global _kdf_slots
+    _kdf_slots = kdf_slots
+
+
+def _kdf_limited_pool(max_kdfs: Optional[int]) -> concurrent.futures.ProcessPoolExecutor:
+    """
+    Return a pool using every core whose workers only run `max_kdfs` keystore KDFs at the same time.
+    """
+    return concurrent.futures.ProcessPoolExecutor(initializer=_init_kdf_worker, initargs=(_kdf_semaphore(max_kdfs),))
+
+
+def _deposit_datum_dict(signed_deposit: DepositData, deposit_message_root: bytes, deposit_data_root: bytes,
+                        chain_setting: BaseChainSetting) -> Dict[str, bytes]:
+    datum_dict = signed_deposit.as_dict()  # type: ignore[no-untyped-call]
+    datum_dict.update({'deposit_message_root': deposit_message_root})
+    datum_dict.update({'deposit_data_root': deposit_data_root})
+    datum_dict.update({'fork_version': chain_setting.GENESIS_FORK_VERSION})
+    datum_dict.update({'network_name': chain_setting.NETWORK_NAME})
+    datum_dict.update({'deposit_cli_version': DEPOSIT_CLI_VERSION})
+    return datum_dict
+
+
 class Credential:
     """
     A Credential object contains all of the information for a single validator and the corresponding functionality.
     Once created, it is the only object that should be required to perform any processing for a validator.
+
+    Credentials are treated as immutable: derived artifacts (pubkeys, withdrawal credentials, SSZ roots and the
+    deposit signature) are computed on first access and cached for the lifetime of the object.
     """
+    __slots__ = (
+        'withdrawal_key_path',
+        'signing_key_path',
+        'signing_sk',
+        'withdrawal_sk',
+        'amount',
+        'chain_setting',
+        'hex_withdrawal_address',
+        'compounding',
+        'use_pbkdf2',
+        '_signing_pk',
+        '_withdrawal_pk',
+        '_withdrawal_credentials',
+        '_deposit_message',
+        '_deposit_message_root',
+        '_deposit_signature',
+        '_signed_deposit',
+        '_deposit_data_root',
+    )
+    # Cached SSZ containers are cheap to rebuild from the cached bytes, so they are not sent to other processes
+    _UNPICKLED_SLOTS = ('_deposit_message', '_signed_deposit')
+
     def __init__(self, *, mnemonic: str, mnemonic_password: str,
                  index: int, amount: int, chain_setting: BaseChainSetting,
                  hex_withdrawal_address: Optional[HexAddress],
@@ -64,29 +185,50 @@ class Credential:
                  use_pbkdf2: Optional[bool] = False):
         # Set path as EIP-2334 format
         # https://eips.ethereum.org/EIPS/eip-2334
-        purpose = '12381'
-        coin_type = '3600'
         account = str(index)
-        withdrawal_key_path = f'm/{purpose}/{coin_type}/{account}/0'
-        self.signing_key_path = f'{withdrawal_key_path}/0'
+        self.withdrawal_key_path = f'{VALIDATOR_KEY_PATH_PREFIX}/{account}/0'
+        self.signing_key_path = f'{self.withdrawal_key_path}/0'
 
-        self.withdrawal_sk = mnemonic_and_path_to_key(
-            mnemonic=mnemonic, path=withdrawal_key_path, password=mnemonic_password)
-        self.signing_sk = mnemonic_and_path_to_key(
-            mnemonic=mnemonic, path=self.signing_key_path, password=mnemonic_password)
+        # The withdrawal node is cached while walking down to the signing key, so the withdrawal key
+        # is taken from the shared context without another derivation step
+        derivation_context = get_derivation_context(mnemonic=mnemonic, password=mnemonic_password)
+        self.signing_sk = derivation_context.derive(self.signing_key_path)
+        self.withdrawal_sk = derivation_context.derive(self.withdrawal_key_path)
         self.amount = amount
         self.chain_setting = chain_setting
         self.hex_withdrawal_address = hex_withdrawal_address
         self.compounding = compounding
         self.use_pbkdf2 = use_pbkdf2
 
+        self._signing_pk: Optional[bytes] = None
+        self._withdrawal_pk: Optional[bytes] = None
+        self._withdrawal_credentials: Optional[bytes] = None
+        self._deposit_message: Optional[DepositMessage] = None
+        self._deposit_message_root: Optional[bytes] = None
+        self._deposit_signature: Optional[bytes] = None
+        self._signed_deposit: Optional[DepositData] = None
+        self._deposit_data_root: Optional[bytes] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__ if slot not in self._UNPICKLED_SLOTS}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for slot in self._UNPICKLED_SLOTS:
+            setattr(self, slot, None)
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
     @property
     def signing_pk(self) -> bytes:
-        return bls.SkToPk(self.signing_sk)
+        if self._signing_pk is None:
+            self._signing_pk = SkToPk(self.signing_sk)
+        return self._signing_pk
 
     @property
     def withdrawal_pk(self) -> bytes:
-        return bls.SkToPk(self.withdrawal_sk)
+        if self._withdrawal_pk is None:
+            self._withdrawal_pk = SkToPk(self.withdrawal_sk)
+        return self._withdrawal_pk
 
     @property
     def withdrawal_address(self) -> Optional[Address]:
@@ -117,6 +259,8 @@ class Credential:
 
     @property
     def withdrawal_credentials(self) -> bytes:
+        if self._withdrawal_credentials is not None:
+            return self._withdrawal_credentials
         if self.withdrawal_type == WithdrawalType.BLS_WITHDRAWAL:
             withdrawal_credentials = BLS_WITHDRAWAL_PREFIX
             withdrawal_credentials += SHA256(self.withdrawal_pk)[1:]
@@ -136,30 +280,50 @@ class Credential:
             withdrawal_credentials += self.withdrawal_address
         else:
             raise ValueError(f"Invalid withdrawal_type {self.withdrawal_type}")
+        self._withdrawal_credentials = withdrawal_credentials
         return withdrawal_credentials
 
     @property
     def deposit_message(self) -> DepositMessage:
+        if self._deposit_message is not None:
+            return self._deposit_message
         # on deposit message, the amount should be multiplied by the multiplier
         min_amount = self.chain_setting.MIN_DEPOSIT_AMOUNT * self.chain_setting.MULTIPLIER * ETH2GWEI
         max_amount = MAX_DEPOSIT_AMOUNT
         if not min_amount <= self.amount <= max_amount:
             raise ValidationError(f"{self.amount / ETH2GWEI} ETH deposits are not within the bounds of this cli.")
-        return DepositMessage(  # type: ignore[no-untyped-call]
+        self._deposit_message = DepositMessage(  # type: ignore[no-untyped-call]
             pubkey=self.signing_pk,
             withdrawal_credentials=self.withdrawal_credentials,
             amount=self.amount,
         )
+        return self._deposit_message
+
+    @property
+    def deposit_message_root(self) -> bytes:
+        if self._deposit_message_root is None:
+            self._deposit_message_root = hash_tree_root(self.deposit_message)
+        return self._deposit_message_root
 
     @property
     def signed_deposit(self) -> DepositData:
-        domain = compute_deposit_domain(fork_version=self.chain_setting.GENESIS_FORK_VERSION)
-        signing_root = compute_signing_root(self.deposit_message, domain)
-        signed_deposit = DepositData(  # type: ignore[no-untyped-call]
+        if self._signed_deposit is not None:
+            return self._signed_deposit
+        if self._deposit_signature is None:
+            domain = compute_deposit_domain(fork_version=self.chain_setting.GENESIS_FORK_VERSION)
+            signing_root = compute_signing_root(self.deposit_message, domain)
+            self._deposit_signature = bls.Sign(self.signing_sk, signing_root)
+        self._signed_deposit = DepositData(  # type: ignore[no-untyped-call]
             **self.deposit_message.as_dict(),  # type: ignore[no-untyped-call]
-            signature=bls.Sign(self.signing_sk, signing_root)
+            signature=self._deposit_signature,
         )
-        return signed_deposit
+        return self._signed_deposit
+
+    @property
+    def deposit_data_root(self) -> bytes:
+        if self._deposit_data_root is None:
+            self._deposit_data_root = hash_tree_root(self.signed_deposit)
+        return self._deposit_data_root
 
     @property
     def deposit_datum_dict(self) -> Dict[str, bytes]:
@@ -167,31 +331,84 @@ class Credential:
         Return a single deposit datum for 1 validator including all
         the information needed to verify and process the deposit.
         """
-        signed_deposit_datum = self.signed_deposit
-        datum_dict = signed_deposit_datum.as_dict()  # type: ignore[no-untyped-call]
-        datum_dict.update({'deposit_message_root': self.deposit_message.hash_tree_root})
-        datum_dict.update({'deposit_data_root': signed_deposit_datum.hash_tree_root})
-        datum_dict.update({'fork_version': self.chain_setting.GENESIS_FORK_VERSION})
-        datum_dict.update({'network_name': self.chain_setting.NETWORK_NAME})
-        datum_dict.update({'deposit_cli_version': DEPOSIT_CLI_VERSION})
-        return datum_dict
+        return _deposit_datum_dict(
+            self.signed_deposit, self.deposit_message_root, self.deposit_data_root, self.chain_setting)
+
+    def get_deposit_datum_dict(self, chain_setting: Optional[BaseChainSetting] = None,
+                               amount: Optional[int] = None) -> Dict[str, bytes]:
+        """
+        Return the deposit datum of another deposit of this validator, of `amount` on the chain of `chain_setting`,
+        which default to the ones of the credential. The cached pubkey and withdrawal credentials are reused, only
+        the deposit message of another amount and the signature are computed again.
+        """
+        chain_setting = self.chain_setting if chain_setting is None else chain_setting
+        amount = self.amount if amount is None else amount
+        if chain_setting == self.chain_setting and amount == self.amount:
+            return self.deposit_datum_dict
+        if chain_setting.MULTIPLIER != self.chain_setting.MULTIPLIER:
+            raise ValueError(f"The deposits on {chain_setting.NETWORK_NAME} and {self.chain_setting.NETWORK_NAME} "
+                             "are not in the same unit.")
+        min_amount = chain_setting.MIN_DEPOSIT_AMOUNT * chain_setting.MULTIPLIER * ETH2GWEI
+        if not min_amount <= amount <= MAX_DEPOSIT_AMOUNT:
+            raise ValidationError(f"{amount / ETH2GWEI} ETH deposits are not within the bounds of this cli.")
+        if amount == self.amount:
+            deposit_message = self.deposit_message
+            deposit_message_root = self.deposit_message_root
+        else:
+            deposit_message = DepositMessage(  # type: ignore[no-untyped-call]
+                pubkey=self.signing_pk,
+                withdrawal_credentials=self.withdrawal_credentials,
+                amount=amount,
+            )
+            deposit_message_root = hash_tree_root(deposit_message)
+        domain = compute_deposit_domain(fork_version=chain_setting.GENESIS_FORK_VERSION)
+        signed_deposit = DepositData(  # type: ignore[no-untyped-call]
+            **deposit_message.as_dict(),  # type: ignore[no-untyped-call]
+            signature=bls.Sign(self.signing_sk, compute_signing_root(deposit_message, domain)),
+        )
+        return _deposit_datum_dict(signed_deposit, deposit_message_root, hash_tree_root(signed_deposit),
+                                   chain_setting)
 
     def signing_keystore(self, password: str) -> Keystore:
+        keystore, _ = self._signing_keystore_with_decryption_key(password)
+        return keystore
+
+    def _signing_keystore_with_decryption_key(self, password: str) -> Tuple[Keystore, bytes]:
         secret = self.signing_sk.to_bytes(32, 'big')
-        if self.use_pbkdf2:
-            return Pbkdf2Keystore.encrypt(secret=secret, password=password, path=self.signing_key_path)
-        else:
-            return ScryptKeystore.encrypt(secret=secret, password=password, path=self.signing_key_path)
+        keystore_class = Pbkdf2Keystore if self.use_pbkdf2 else ScryptKeystore
+        with _kdf_slot():
+            return keystore_class.encrypt_with_decryption_key(secret=secret, password=password,
+                                                              path=self.signing_key_path)
+
+    def _signing_keystore_filefolder(self, folder: str, timestamp: float) -> str:
+        return os.path.join(folder, 'keystore-%s-%i.json' % (self.signing_key_path.replace('/', '_'), timestamp))
 
     def save_signing_keystore(self, password: str, folder: str, timestamp: float) -> str:
         keystore = self.signing_keystore(password)
-        filefolder = os.path.join(folder, 'keystore-%s-%i.json' % (keystore.path.replace('/', '_'), timestamp))
+        filefolder = self._signing_keystore_filefolder(folder, timestamp)
         keystore.save(filefolder)
         return filefolder
 
+    def save_and_verify_signing_keystore(self, password: str, folder: str, timestamp: float) -> Tuple[str, bool]:
+        """
+        Save the signing keystore, then read the written file back and decrypt it with the decryption key
+        derived while encrypting, so that the keystore is verified without running its KDF a second time.
+        """
+        keystore, decryption_key = self._signing_keystore_with_decryption_key(password)
+        filefolder = self._signing_keystore_filefolder(folder, timestamp)
+        keystore.save(filefolder)
+
+        saved_keystore = Keystore.from_file(filefolder)
+        # The decryption key can only be reused if the saved KDF function, parameters and salt are unchanged
+        if saved_keystore.crypto.kdf != keystore.crypto.kdf:
+            return filefolder, False
+        secret_bytes = saved_keystore.decrypt_with_decryption_key(decryption_key)
+        return filefolder, self.signing_sk == int.from_bytes(secret_bytes, 'big')
+
     def verify_keystore(self, keystore_filefolder: str, password: str) -> bool:
         saved_keystore = Keystore.from_file(keystore_filefolder)
-        secret_bytes = saved_keystore.decrypt(password)
+        with _kdf_slot():
+            secret_bytes = saved_keystore.decrypt(password)
         return self.signing_sk == int.from_bytes(secret_bytes, 'big')
 
     def get_bls_to_execution_change(self, validator_index: int) -> SignedBLSToExecutionChange:
@@ -243,16 +460,16 @@ class Credential:
         result_dict.update({'metadata': metadata})
         return result_dict
 
-    def save_exit_transaction(self, validator_index: int, epoch: int, folder: str, timestamp: float) -> str:
-        signing_key = self.signing_sk
-
-        signed_voluntary_exit = exit_transaction_generation(
+    def get_exit_transaction(self, validator_index: int, epoch: int) -> SignedVoluntaryExit:
+        return exit_transaction_generation(
             chain_setting=self.chain_setting,
-            signing_key=signing_key,
+            signing_key=self.signing_sk,
             validator_index=validator_index,
             epoch=epoch
         )
 
+    def save_exit_transaction(self, validator_index: int, epoch: int, folder: str, timestamp: float) -> str:
+        signed_voluntary_exit = self.get_exit_transaction(validator_index, epoch)
         return export_exit_transaction_json(folder=folder, signed_exit=signed_voluntary_exit, timestamp=timestamp)
 
 
@@ -279,6 +496,312 @@ def _bls_to_execution_change_builder(kwargs: Dict[str, Any]) -> Dict[str, bytes]
     return credential.get_bls_to_execution_change_dict(**kwargs)
 
 
+# Arguments shared by every task of a credential worker pool, installed once per worker process by `_init_worker`
+_worker_kwargs: Dict[str, Any] = {}
+
+
+def _init_worker(shared_kwargs: Dict[str, Any], kdf_slots: Optional[BoundedSemaphore] = None) -> None:
+    """
+    Pool initializer that keeps the arguments shared by every validator in process-local state and
+    derives the seed and the `m/12381/3600` node once per worker, so that tasks only need to carry
+    the account index and the amount.
+    """
+    _init_kdf_worker(kdf_slots)
+    _worker_kwargs.clear()
+    _worker_kwargs.update(shared_kwargs)
+    get_derivation_context(
+        mnemonic=shared_kwargs['mnemonic'],
+        password=shared_kwargs['mnemonic_password'],
+    ).derive(VALIDATOR_KEY_PATH_PREFIX)
+
+
+def _credential_pool(shared_kwargs: Dict[str, Any],
+                     max_kdfs: Optional[int] = None) -> concurrent.futures.ProcessPoolExecutor:
+    return concurrent.futures.ProcessPoolExecutor(
+        initializer=_init_worker,
+        initargs=(shared_kwargs, _kdf_semaphore(max_kdfs)),
+    )
+
+
+def _pooled_credential_builder(task: Tuple[int, float]) -> Credential:
+    index, amount = task
+    return Credential(**_worker_kwargs, index=index, amount=int(amount))
+
+
+def get_signing_pubkey(*, mnemonic: str, mnemonic_password: str, index: int) -> bytes:
+    """
+    Return the signing pubkey of the account `index`, without building its Credential.
+    """
+    signing_sk = get_derivation_context(mnemonic=mnemonic, password=mnemonic_password).derive(
+        f'{VALIDATOR_KEY_PATH_PREFIX}/{index}/0/0')
+    return SkToPk(signing_sk)
+
+
+def credentials_from_mnemonic(*,
+                              mnemonic: str,
+                              mnemonic_password: str,
+                              num_keys: int,
+                              amounts: list[float],
+                              chain_setting: BaseChainSetting,
+                              start_index: int,
+                              hex_withdrawal_address: Optional[HexAddress],
+                              compounding: Optional[bool] = False,
+                              use_pbkdf2: Optional[bool] = False) -> Iterator[Credential]:
+    """
+    Build the Credentials for `num_keys` consecutive account indices in a worker pool, yielding them in index order.
+    """
+    if len(amounts) != num_keys:
+        raise ValueError(
+            f"The number of keys ({num_keys}) doesn't equal to the corresponding deposit amounts ({len(amounts)})."
+        )
+    return credentials_at_account_indices(
+        mnemonic=mnemonic,
+        mnemonic_password=mnemonic_password,
+        account_indices=range(start_index, start_index + num_keys),
+        amounts=amounts,
+        chain_setting=chain_setting,
+        hex_withdrawal_address=hex_withdrawal_address,
+        compounding=compounding,
+        use_pbkdf2=use_pbkdf2,
+    )
+
+
+def credentials_at_account_indices(*,
+                                   mnemonic: str,
+                                   mnemonic_password: str,
+                                   account_indices: Sequence[int],
+                                   amounts: list[float],
+                                   chain_setting: BaseChainSetting,
+                                   hex_withdrawal_address: Optional[HexAddress],
+                                   compounding: Optional[bool] = False,
+                                   use_pbkdf2: Optional[bool] = False) -> Iterator[Credential]:
+    """
+    Build the Credentials for the given account indices in a worker pool, yielding them in the same order.
+    """
+    if len(amounts) != len(account_indices):
+        raise ValueError(
+            f"The number of keys ({len(account_indices)}) doesn't equal to the corresponding deposit amounts "
+            f"({len(amounts)})."
+        )
+    shared_kwargs = {
+        'mnemonic': mnemonic,
+        'mnemonic_password': mnemonic_password,
+        'chain_setting': chain_setting,
+        'hex_withdrawal_address': hex_withdrawal_address,
+        'compounding': compounding,
+        'use_pbkdf2': use_pbkdf2,
+    }
+    tasks = list(zip(account_indices, amounts))
+    return _run_in_credential_pool(_pooled_credential_builder, shared_kwargs, tasks)
+
+
+# Long-lived pool used by the credential helpers while a `credential_pool_session` is open, its worker count and
+# KDF limit
+_session_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_session_workers = 0
+_session_max_kdfs: Optional[int] = None
+# Ids of the requests run in the session pool
+_session_requests = itertools.count()
+
+# Barrier shared by the workers of a session pool, installed by `_init_session_worker`
+_session_barrier: Optional[Barrier] = None
+# Seconds a session worker waits for the other workers to switch requests, which covers the KDFs of the previous
+# request still running in them
+SESSION_BARRIER_TIMEOUT = 300.0
+# Id of the session request whose shared arguments are installed in `_worker_kwargs`
+_worker_request: Optional[int] = None
+
+
+def _init_session_worker(kdf_slots: Optional[BoundedSemaphore], barrier: Barrier) -> None:
+    global _session_barrier
+    _init_kdf_worker(kdf_slots)
+    _session_barrier = barrier
+
+
+def _start_session_pool() -> None:
+    global _session_pool
+    _session_pool = concurrent.futures.ProcessPoolExecutor(
+        max_workers=_session_workers,
+        initializer=_init_session_worker,
+        initargs=(_kdf_semaphore(_session_max_kdfs), multiprocessing.Barrier(_session_workers)),
+    )
+
+
+def _restart_session_pool() -> None:
+    """
+    Replace a session pool whose barrier is broken, or one of whose workers died, by a new pool. The workers
+    of the old pool may hold the arguments of different requests, they exit once their current task is done.
+    """
+    assert _session_pool is not None
+    _session_pool.shutdown(wait=False, cancel_futures=True)
+    _start_session_pool()
+
+
+def get_session_pool() -> Optional[concurrent.futures.ProcessPoolExecutor]:
+    """
+    Return the worker pool of the open `credential_pool_session`, or None outside of a session. The pool is
+    replaced when it breaks, so it should not be kept across requests.
+    """
+    return _session_pool
+
+
+@contextmanager
+def credential_pool_session(max_kdf_memory: Optional[int] = None) -> Iterator[concurrent.futures.ProcessPoolExecutor]:
+    """
+    Keep a single warm worker pool alive for every credential helper called until the context exits, instead of
+    starting a pool per call. The KDF limit of the session is computed once, for scrypt keystores.
+    """
+    global _session_pool, _session_workers, _session_max_kdfs
+    _session_workers = os.cpu_count() or 1
+    _session_max_kdfs = max_concurrent_kdfs(max_kdf_memory=max_kdf_memory)
+    _start_session_pool()
+    assert _session_pool is not None
+    try:
+        yield _session_pool
+    finally:
+        _session_pool.shutdown()
+        _session_pool, _session_workers, _session_max_kdfs = None, 0, None
+
+
+def _switch_session_request(session_request: Tuple[Optional[int], Dict[str, Any]]) -> None:
+    """
+    Install the shared arguments of a session request in a session worker or, without a request, drop the
+    arguments and the keys derived from them. The worker then waits for every other worker to do the same,
+    so that each of them runs exactly one of the tasks broadcasting the request.
+    """
+    global _worker_request
+    assert _session_barrier is not None
+    request_id, shared_kwargs = session_request
+    try:
+        _worker_request = None
+        if request_id is None:
+            _worker_kwargs.clear()
+            get_derivation_context.cache_clear()
+        else:
+            _init_worker(shared_kwargs, _kdf_slots)
+        _worker_request = request_id
+    except BaseException:
+        # Release the other workers instead of leaving them waiting for this one
+        _session_barrier.abort()
+        raise
+    # The barrier breaks for every worker if one of them does not arrive in time
+    _session_barrier.wait(SESSION_BARRIER_TIMEOUT)
+
+
+def _broadcast_session_request(request_id: Optional[int], shared_kwargs: Dict[str, Any]) -> None:
+    assert _session_pool is not None
+    tasks = [(request_id, shared_kwargs)] * _session_workers
+    try:
+        for _ in _session_pool.map(_switch_session_request, tasks):
+            pass
+    except (threading.BrokenBarrierError, BrokenProcessPool) as e:
+        _restart_session_pool()
+        raise RuntimeError("The session workers failed to switch requests and were started again.") from e
+    except Exception:
+        # A worker that failed broke the barrier of the pool
+        _restart_session_pool()
+        raise
+
+
+def _run_session_task(session_task: Tuple[Any, int, Tuple[int, float]]) -> Any:
+    func, request_id, task = session_task
+    if request_id != _worker_request:
+        raise ValueError(f"The session worker holds the arguments of request {_worker_request}, not {request_id}.")
+    return func(task)
+
+
+def _map_in_flight(executor: concurrent.futures.Executor, func: Any, tasks: Sequence[Any],
+                   max_in_flight: Optional[int]) -> Iterator[Any]:
+    """
+    Like `executor.map`, but with at most `max_in_flight` tasks submitted to the executor at the same time.
+    """
+    if max_in_flight is None:
+        yield from executor.map(func, tasks)
+        return
+    futures: deque[concurrent.futures.Future[Any]] = deque()
+    try:
+        for task in tasks:
+            if len(futures) == max_in_flight:
+                yield futures.popleft().result()
+            futures.append(executor.submit(func, task))
+        while futures:
+            yield futures.popleft().result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _run_in_credential_pool(func: Any, shared_kwargs: Dict[str, Any], tasks: list[Tuple[int, float]],
+                            max_kdfs: Optional[int] = None) -> Iterator[Any]:
+    if _session_pool is None:
+        with _credential_pool(shared_kwargs, max_kdfs) as executor:
+            yield from executor.map(func, tasks)
+        return
+    # The session workers serve many requests, so the shared arguments of this one, which hold the mnemonic
+    # and the keystore password, are sent once to every worker and dropped again once the request is done.
+    # Only `max_kdfs` tasks run at once, as the session KDF limit may be above the limit of the request.
+    request_id = next(_session_requests)
+    _broadcast_session_request(request_id, shared_kwargs)
+    try:
+        yield from _map_in_flight(_session_pool, _run_session_task,
+                                  [(func, request_id, task) for task in tasks], max_kdfs)
+    finally:
+        _broadcast_session_request(None, {})
+
+
+class KeyGenerationResult(NamedTuple):
+    """
+    The compact outcome of generating, saving and self-verifying the keys of a single validator.
+    """
+    key_index: int
+    keystore_filefolder: str
+    deposit_datum: Dict[str, bytes]
+    valid_keystore: bool
+    valid_deposit: bool
+    # The deposit datum on every additional chain of the key generation
+    additional_deposit_data: Tuple[Dict[str, bytes], ...] = ()
+    # The top-up deposit data on the main chain, then on every additional chain
+    top_up_deposit_data: Tuple[Tuple[Dict[str, bytes], ...], ...] = ()
+
+
+def _key_generation_pipeline(task: Tuple[int, float]) -> KeyGenerationResult:
+    kwargs = dict(_worker_kwargs)
+    password: str = kwargs.pop('password')
+    folder: str = kwargs.pop('folder')
+    timestamp: float = kwargs.pop('timestamp')
+    additional_chain_settings: Sequence[BaseChainSetting] = kwargs.pop('additional_chain_settings', ())
+    top_up_amounts: Sequence[int] = kwargs.pop('top_up_amounts', ())
+    index, amount = task
+    credential = Credential(**kwargs, index=index, amount=int(amount))
+
+    keystore_filefolder, valid_keystore = credential.save_and_verify_signing_keystore(
+        password=password, folder=folder, timestamp=timestamp)
+    # Every deposit of the key on every chain is signed with the same signing key, pubkey and withdrawal credentials
+    chain_settings = [credential.chain_setting, *additional_chain_settings]
+    deposit_data = [
+        [credential.get_deposit_datum_dict(chain_setting)]
+        + [credential.get_deposit_datum_dict(chain_setting, top_up_amount) for top_up_amount in top_up_amounts]
+        for chain_setting in chain_settings
+    ]
+    # Verify the data as they will be encoded in the deposit data JSON files, the deposits of a chain at once
+    valid_deposit = all(
+        all(validate_deposits(json.loads(json.dumps(chain_deposit_data, default=lambda x: x.hex())),
+                              chain_setting, [credential] * len(chain_deposit_data)))
+        for chain_deposit_data, chain_setting in zip(deposit_data, chain_settings)
+    )
+
+    return KeyGenerationResult(
+        key_index=index,
+        keystore_filefolder=keystore_filefolder,
+        deposit_datum=deposit_data[0][0],
+        valid_keystore=valid_keystore,
+        valid_deposit=valid_deposit,
+        additional_deposit_data=tuple(chain_deposit_data[0] for chain_deposit_data in deposit_data[1:]),
+        top_up_deposit_data=tuple(tuple(chain_deposit_data[1:]) for chain_deposit_data in deposit_data)
+        if top_up_amounts else (),
+    )
+
+
 class CredentialList:
     """
     A collection of multiple Credentials, one for each validator.
@@ -302,29 +825,26 @@ class CredentialList:
             raise ValueError(
                 f"The number of keys ({num_keys}) doesn't equal to the corresponding deposit amounts ({len(amounts)})."
             )
-        key_indices = range(start_index, start_index + num_keys)
-
         credentials: list[Credential] = []
         with click.progressbar(length=num_keys, label=load_text(['msg_key_creation']),  # type: ignore[var-annotated]
                                show_percent=False, show_pos=True) as bar:
-            executor_kwargs = [{
-                'mnemonic': mnemonic,
-                'mnemonic_password': mnemonic_password,
-                'index': index,
-                'amount': amounts[index - start_index],
-                'chain_setting': chain_setting,
-                'hex_withdrawal_address': hex_withdrawal_address,
-                'compounding': compounding,
-                'use_pbkdf2': use_pbkdf2,
-            } for index in key_indices]
-
-            with concurrent.futures.ProcessPoolExecutor() as executor:
-                for credential in executor.map(_credential_builder, executor_kwargs):
-                    credentials.append(credential)
-                    bar.update(1)
+            for credential in credentials_from_mnemonic(
+                mnemonic=mnemonic,
+                mnemonic_password=mnemonic_password,
+                num_keys=num_keys,
+                amounts=amounts,
+                chain_setting=chain_setting,
+                start_index=start_index,
+                hex_withdrawal_address=hex_withdrawal_address,
+                compounding=compounding,
+                use_pbkdf2=use_pbkdf2,
+            ):
+                credentials.append(credential)
+                bar.update(1)
         return cls(credentials)
 
-    def export_keystores(self, password: str, folder: str, timestamp: float) -> list[str]:
+    def export_keystores(self, password: str, folder: str, timestamp: float,
+                         max_kdf_memory: Optional[int] = None) -> list[str]:
         filefolders: list[str] = []
         with click.progressbar(length=len(self.credentials),  # type: ignore[var-annotated]
                                label=load_text(['msg_keystore_creation']),
@@ -336,12 +856,16 @@ class CredentialList:
                 'timestamp': timestamp,
             } for credential in self.credentials]
 
-            with concurrent.futures.ProcessPoolExecutor() as executor:
+            with _kdf_limited_pool(self._max_concurrent_kdfs(max_kdf_memory)) as executor:
                 for filefolder in executor.map(_keystore_exporter, executor_kwargs):
                     filefolders.append(filefolder)
                     bar.update(1)
         return filefolders
 
+    def _max_concurrent_kdfs(self, max_kdf_memory: Optional[int]) -> Optional[int]:
+        use_pbkdf2 = all(credential.use_pbkdf2 for credential in self.credentials)
+        return max_concurrent_kdfs(use_pbkdf2=use_pbkdf2, max_kdf_memory=max_kdf_memory)
+
     def export_deposit_data_json(self, folder: str, timestamp: float) -> str:
         deposit_data = []
         with click.progressbar(length=len(self.credentials),  # type: ignore[var-annotated]
@@ -355,7 +879,8 @@ class CredentialList:
 
         return export_deposit_data_json_util(folder, timestamp, deposit_data)
 
-    def verify_keystores(self, keystore_filefolders: list[str], password: str) -> bool:
+    def verify_keystores(self, keystore_filefolders: list[str], password: str,
+                         max_kdf_memory: Optional[int] = None) -> bool:
         all_valid_keystores = True
         with click.progressbar(length=len(self.credentials),  # type: ignore[var-annotated]
                                label=load_text(['msg_keystore_verification']),
@@ -366,7 +891,7 @@ class CredentialList:
                 'password': password,
             } for credential, fileholder in zip(self.credentials, keystore_filefolders)]
 
-            with concurrent.futures.ProcessPoolExecutor() as executor:
+            with _kdf_limited_pool(self._max_concurrent_kdfs(max_kdf_memory)) as executor:
                 for valid_keystore in executor.map(_keystore_verifier, executor_kwargs):
                     all_valid_keystores &= valid_keystore
                     bar.update(1)
@@ -393,3 +918,311 @@ class CredentialList:
         with open(filefolder, 'w', encoding='utf-8', opener=sensitive_opener) as f:
             json.dump(bls_to_execution_changes, f)
         return filefolder
+
+
+def _validate_additional_chain_settings(chain_setting: BaseChainSetting,
+                                        additional_chain_settings: Sequence[BaseChainSetting]) -> None:
+    network_names = [chain_setting.NETWORK_NAME] + [setting.NETWORK_NAME for setting in additional_chain_settings]
+    if len(set(network_names)) != len(network_names):
+        raise ValueError(f"The deposits can only be generated once per network, got {', '.join(network_names)}.")
+    for additional_chain_setting in additional_chain_settings:
+        if additional_chain_setting.MULTIPLIER != chain_setting.MULTIPLIER:
+            raise ValueError(f"The deposits on {additional_chain_setting.NETWORK_NAME} and "
+                             f"{chain_setting.NETWORK_NAME} are not in the same unit.")
+
+
+def generate_keys_pipeline(*,
+                           mnemonic: str,
+                           mnemonic_password: str,
+                           num_keys: int,
+                           amounts: list[float],
+                           chain_setting: BaseChainSetting,
+                           start_index: int,
+                           hex_withdrawal_address: Optional[HexAddress],
+                           compounding: Optional[bool] = False,
+                           use_pbkdf2: Optional[bool] = False,
+                           password: str,
+                           folder: str,
+                           timestamp: float,
+                           max_kdf_memory: Optional[int] = None,
+                           skip_indices: Collection[int] = (),
+                           additional_chain_settings: Sequence[BaseChainSetting] = (),
+                           top_up_amounts: Sequence[float] = ()) -> Iterator[KeyGenerationResult]:
+    """
+    Derive, encrypt, save, sign and self-verify every validator key in a single worker task per key,
+    yielding the results in index order as they complete. Only the compact `KeyGenerationResult`
+    travels back from the workers, keeping the pool busy from the first key to the last.
+
+    The workers use every core, but only as many of them run a keystore KDF at the same time as fit in
+    `max_kdf_memory` bytes, which defaults to the available memory. The account indices in `skip_indices`,
+    already generated by a resumed key generation, are left out.
+
+    The keys are only derived and encrypted once for the `additional_chain_settings`, whose deposits are
+    signed by the same worker task and returned in `KeyGenerationResult.additional_deposit_data`.
+
+    Every key can also be given top-up deposits of `top_up_amounts`, after its deposit of `amounts`, e.g. for
+    compounding validators. They are signed on every chain by the same worker task, verified with the other
+    deposits of the key and returned in `KeyGenerationResult.top_up_deposit_data`.
+    """
+    if len(amounts) != num_keys:
+        raise ValueError(
+            f"The number of keys ({num_keys}) doesn't equal to the corresponding deposit amounts ({len(amounts)})."
+        )
+    _validate_additional_chain_settings(chain_setting, additional_chain_settings)
+    shared_kwargs = {
+        'mnemonic': mnemonic,
+        'mnemonic_password': mnemonic_password,
+        'chain_setting': chain_setting,
+        'hex_withdrawal_address': hex_withdrawal_address,
+        'compounding': compounding,
+        'use_pbkdf2': use_pbkdf2,
+        'password': password,
+        'folder': folder,
+        'timestamp': timestamp,
+        'additional_chain_settings': tuple(additional_chain_settings),
+        'top_up_amounts': tuple(int(top_up_amount) for top_up_amount in top_up_amounts),
+    }
+    skip_indices = set(skip_indices)
+    tasks = [task for task in zip(range(start_index, start_index + num_keys), amounts) if task[0] not in skip_indices]
+    max_kdfs = max_concurrent_kdfs(use_pbkdf2=use_pbkdf2, max_kdf_memory=max_kdf_memory)
+    return _run_in_credential_pool(_key_generation_pipeline, shared_kwargs, tasks, max_kdfs)
+
+
+# Number of the last completed keys of a resumed key generation whose keystore and deposit are verified again
+RESUME_VERIFICATION_TAIL = 64
+
+
+def _verify_journal_deposit_data(credential: Credential, deposit_data: Sequence[Sequence[Dict[str, Any]]],
+                                 additional_chain_settings: Sequence[BaseChainSetting],
+                                 top_up_amounts: Sequence[int]) -> bool:
+    chain_settings = [credential.chain_setting, *additional_chain_settings]
+    amounts = [credential.amount, *top_up_amounts]
+    for journal_deposit_data, chain_setting in zip(deposit_data, chain_settings):
+        if len(journal_deposit_data) != len(amounts):
+            return False
+        for journal_datum, deposit_amount in zip(journal_deposit_data, amounts):
+            journal_datum = dict(journal_datum)
+            deposit_datum = json.loads(json.dumps(credential.get_deposit_datum_dict(chain_setting, deposit_amount),
+                                                  default=lambda x: x.hex()))
+            if journal_datum['pubkey'] != deposit_datum['pubkey']:
+                raise ValueError("The key generation to resume was started with a different mnemonic.")
+            # The deposit data of a resumed key generation may have been written by an older version
+            journal_datum.pop('deposit_cli_version')
+            deposit_datum.pop('deposit_cli_version')
+            if journal_datum != deposit_datum:
+                return False
+    return True
+
+
+def _journal_deposit_verifier(task: Tuple[int, float]) -> bool:
+    kwargs = dict(_worker_kwargs)
+    deposit_data: Dict[int, list[list[Dict[str, Any]]]] = kwargs.pop('deposit_data')
+    additional_chain_settings: Sequence[BaseChainSetting] = kwargs.pop('additional_chain_settings')
+    top_up_amounts: Sequence[int] = kwargs.pop('top_up_amounts')
+    index, amount = task
+    credential = Credential(**kwargs, index=index, amount=int(amount))
+    return _verify_journal_deposit_data(credential, deposit_data[index], additional_chain_settings, top_up_amounts)
+
+
+def _journal_entry_verifier(task: Tuple[int, float]) -> bool:
+    kwargs = dict(_worker_kwargs)
+    password: str = kwargs.pop('password')
+    keystore_filefolders: Dict[int, str] = kwargs.pop('keystore_filefolders')
+    deposit_data: Dict[int, list[list[Dict[str, Any]]]] = kwargs.pop('deposit_data')
+    additional_chain_settings: Sequence[BaseChainSetting] = kwargs.pop('additional_chain_settings')
+    top_up_amounts: Sequence[int] = kwargs.pop('top_up_amounts')
+    index, amount = task
+    credential = Credential(**kwargs, index=index, amount=int(amount))
+
+    if not _verify_journal_deposit_data(credential, deposit_data[index], additional_chain_settings, top_up_amounts):
+        return False
+
+    try:
+        saved_keystore = Keystore.from_file(keystore_filefolders[index])
+    except (OSError, ValueError, KeyError, TypeError):
+        # The keystore file was lost or only partially written
+        return False
+    try:
+        with _kdf_slot():
+            secret_bytes = saved_keystore.decrypt(password)
+    except ValueError:
+        # The password was checked against an older keystore of the journal, so this one is corrupted
+        return False
+    return credential.signing_sk == int.from_bytes(secret_bytes, 'big')
+
+
+def _check_journal_keystore_password(journal: KeyGenerationJournal, password: str) -> None:
+    """
+    Check that the key generation to resume was started with `password`, by decrypting the first readable
+    keystore of the journal. A keystore which fails to decrypt is either corrupted or encrypted with another
+    password, and the first keystores were written long before any interruption.
+    """
+    for index in journal.completed_indices:
+        try:
+            saved_keystore = Keystore.from_file(journal.keystore_filefolders[index])
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+        try:
+            saved_keystore.decrypt(password)
+        except ValueError:
+            raise ValueError("The key generation to resume was started with a different keystore password.")
+        return
+
+
+def open_key_generation_journal(*,
+                                mnemonic: str,
+                                mnemonic_password: str,
+                                num_keys: int,
+                                amounts: list[float],
+                                chain_setting: BaseChainSetting,
+                                start_index: int,
+                                hex_withdrawal_address: Optional[HexAddress],
+                                compounding: Optional[bool] = False,
+                                use_pbkdf2: Optional[bool] = False,
+                                password: str,
+                                folder: str,
+                                timestamp: float,
+                                max_kdf_memory: Optional[int] = None,
+                                resume: bool = False,
+                                additional_chain_settings: Sequence[BaseChainSetting] = (),
+                                top_up_amounts: Sequence[float] = ()) -> KeyGenerationJournal:
+    """
+    Start the journal of a key generation in `folder`, or with `resume`, load the journal of the interrupted key
+    generation with the same settings. The keystore files of the keys that were not completed are removed, and
+    the keystores and deposits of the last `RESUME_VERIFICATION_TAIL` completed keys, which may not have been
+    fully written to disk, are verified again. The keys that fail are generated again, while a keystore password
+    which does not decrypt the first keystore of the journal is refused.
+    """
+    _validate_additional_chain_settings(chain_setting, additional_chain_settings)
+    settings = {
+        'start_index': start_index,
+        'num_keys': num_keys,
+        'amounts': amounts,
+        'network_name': chain_setting.NETWORK_NAME,
+        'fork_version': chain_setting.GENESIS_FORK_VERSION,
+        'withdrawal_address': hex_withdrawal_address,
+        'compounding': compounding,
+        'use_pbkdf2': use_pbkdf2,
+    }
+    if additional_chain_settings:
+        settings['additional_networks'] = [(setting.NETWORK_NAME, setting.GENESIS_FORK_VERSION)
+                                           for setting in additional_chain_settings]
+    if top_up_amounts:
+        settings['top_up_amounts'] = [int(top_up_amount) for top_up_amount in top_up_amounts]
+    if not resume:
+        return KeyGenerationJournal.create(folder, settings, timestamp)
+
+    journal = KeyGenerationJournal.resume(folder, settings)
+    journal.remove_unrecorded_keystores(folder)
+    journal.discard(index for index, keystore_filefolder in journal.keystore_filefolders.items()
+                    if not os.path.exists(keystore_filefolder))
+    _check_journal_keystore_password(journal, password)
+
+    tail = journal.completed_indices[-RESUME_VERIFICATION_TAIL:]
+    amounts_by_index = dict(zip(range(start_index, start_index + num_keys), amounts))
+    shared_kwargs = {
+        'mnemonic': mnemonic,
+        'mnemonic_password': mnemonic_password,
+        'chain_setting': chain_setting,
+        'hex_withdrawal_address': hex_withdrawal_address,
+        'compounding': compounding,
+        'use_pbkdf2': use_pbkdf2,
+        'password': password,
+        'keystore_filefolders': {index: journal.keystore_filefolders[index] for index in tail},
+        'deposit_data': {index: [journal.key_deposit_data(index, network)
+                                 for network in range(1 + len(additional_chain_settings))] for index in tail},
+        'additional_chain_settings': tuple(additional_chain_settings),
+        'top_up_amounts': tuple(int(top_up_amount) for top_up_amount in top_up_amounts),
+    }
+    tasks = [(index, amounts_by_index[index]) for index in tail]
+    max_kdfs = max_concurrent_kdfs(use_pbkdf2=use_pbkdf2, max_kdf_memory=max_kdf_memory)
+    valid_entries = list(_run_in_credential_pool(_journal_entry_verifier, shared_kwargs, tasks, max_kdfs))
+    journal.discard([index for index, valid in zip(tail, valid_entries) if not valid])
+    journal.mark_verified(index for index, valid in zip(tail, valid_entries) if valid)
+    return journal
+
+
+def verify_journal_deposit_data(journal: KeyGenerationJournal,
+                                *,
+                                mnemonic: str,
+                                mnemonic_password: str,
+                                num_keys: int,
+                                amounts: list[float],
+                                chain_setting: BaseChainSetting,
+                                start_index: int,
+                                hex_withdrawal_address: Optional[HexAddress],
+                                compounding: Optional[bool] = False,
+                                use_pbkdf2: Optional[bool] = False,
+                                additional_chain_settings: Sequence[BaseChainSetting] = (),
+                                top_up_amounts: Sequence[float] = ()) -> bool:
+    """
+    Verify the deposits of the completed keys of a resumed key generation that were recorded before the journal
+    tail verified by `open_key_generation_journal`, against the keys derived from the mnemonic. Every other key
+    of the journal was verified by this key generation, so only these keys are derived again, and their keystores
+    are not decrypted.
+    """
+    unverified_indices = journal.unverified_indices
+    if not unverified_indices:
+        return True
+    amounts_by_index = dict(zip(range(start_index, start_index + num_keys), amounts))
+    shared_kwargs = {
+        'mnemonic': mnemonic,
+        'mnemonic_password': mnemonic_password,
+        'chain_setting': chain_setting,
+        'hex_withdrawal_address': hex_withdrawal_address,
+        'compounding': compounding,
+        'use_pbkdf2': use_pbkdf2,
+        'deposit_data': {index: [journal.key_deposit_data(index, network)
+                                 for network in range(1 + len(additional_chain_settings))]
+                         for index in unverified_indices},
+        'additional_chain_settings': tuple(additional_chain_settings),
+        'top_up_amounts': tuple(int(top_up_amount) for top_up_amount in top_up_amounts),
+    }
+    tasks = [(index, amounts_by_index[index]) for index in unverified_indices]
+    valid_entries = list(_run_in_credential_pool(_journal_deposit_verifier, shared_kwargs, tasks))
+    journal.mark_verified(index for index, valid in zip(unverified_indices, valid_entries) if valid)
+    return all(valid_entries)
+
+
+def _keystore_exit_signer(task: Tuple[str, str, int, int, BaseChainSetting]) -> bytes:
+    filefolder, password, validator_index, epoch, chain_setting = task
+    keystore = Keystore.from_file(filefolder)
+    with _kdf_slot():
+        decryption_key = keystore.derive_decryption_key(password)
+    try:
+        secret = keystore.decrypt_with_decryption_key(decryption_key)
+    except ValueError:
+        raise ValueError(f"The keystore password is unable to decrypt {filefolder}.")
+    signed_exit = exit_transaction_generation(
+        chain_setting=chain_setting,
+        signing_key=int.from_bytes(secret, 'big'),
+        validator_index=validator_index,
+        epoch=epoch,
+    )
+    signature: bytes = signed_exit.signature  # type: ignore[attr-defined]
+    return signature
+
+
+def sign_keystore_exits(*,
+                        keystore_filefolders: Sequence[str],
+                        password: str,
+                        validator_indices: Sequence[int],
+                        epoch: int,
+                        chain_setting: BaseChainSetting,
+                        max_kdf_memory: Optional[int] = None) -> Iterator[SignedVoluntaryExit]:
+    """
+    Decrypt the keystores with `password` and sign the exit of their validators in a worker pool, yielding the
+    signed exits in the order of the keystores. Only as many keystores are decrypted at the same time as their
+    scrypt KDFs fit in `max_kdf_memory` bytes, which defaults to the available memory.
+    """
+    if len(validator_indices) != len(keystore_filefolders):
+        raise ValueError(f"The number of keystores ({len(keystore_filefolders)}) doesn't equal to the corresponding "
+                         f"validator indices ({len(validator_indices)}).")
+    tasks = [(filefolder, password, validator_index, epoch, chain_setting)
+             for filefolder, validator_index in zip(keystore_filefolders, validator_indices)]
+    with _kdf_limited_pool(max_concurrent_kdfs(max_kdf_memory=max_kdf_memory)) as executor:
+        for (_, _, validator_index, _, _), signature in zip(tasks, executor.map(_keystore_exit_signer, tasks)):
+            yield SignedVoluntaryExit(  # type: ignore[no-untyped-call]
+                message=VoluntaryExit(epoch=epoch, validator_index=validator_index),  # type: ignore[no-untyped-call]
+                signature=signature,
+            )
@@ -5,9 +5,11 @@ from multiprocessing import freeze_support
 
 from ethstaker_deposit.cli.existing_mnemonic import existing_mnemonic
 from ethstaker_deposit.cli.exit_transaction_keystore import exit_transaction_keystore
+from ethstaker_deposit.cli.exit_transaction_keystores import exit_transaction_keystores
 from ethstaker_deposit.cli.exit_transaction_mnemonic import exit_transaction_mnemonic
 from ethstaker_deposit.cli.generate_bls_to_execution_change import generate_bls_to_execution_change
 from ethstaker_deposit.cli.generate_bls_to_execution_change_keystore import generate_bls_to_execution_change_keystore
+from ethstaker_deposit.cli.merge_deposit_data import merge_deposit_data
 from ethstaker_deposit.cli.new_mnemonic import new_mnemonic
 from ethstaker_deposit.cli.partial_deposit import partial_deposit
 from ethstaker_deposit.cli.test_keystore import test_keystore
@@ -57,9 +59,11 @@ def check_connectivity() -> None:
 commands = [
     new_mnemonic,
     existing_mnemonic,
+    merge_deposit_data,
     generate_bls_to_execution_change,
     generate_bls_to_execution_change_keystore,
     exit_transaction_keystore,
+    exit_transaction_keystores,
     exit_transaction_mnemonic,
     partial_deposit,
     test_keystore,
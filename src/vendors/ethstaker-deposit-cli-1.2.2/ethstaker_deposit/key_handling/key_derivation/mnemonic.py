@@ -1,15 +1,26 @@
 from collections import defaultdict
+import concurrent.futures
+from functools import lru_cache
+from itertools import combinations
 import os
 from unicodedata import normalize
 from secrets import randbits
 from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    Mapping,
+    NamedTuple,
     Optional,
     Sequence,
 )
 
 from ethstaker_deposit.exceptions import MultiLanguageError
 from ethstaker_deposit.utils.constants import (
+    BLS_WITHDRAWAL_PREFIX,
     MNEMONIC_LANG_OPTIONS,
+    VALIDATOR_KEY_PATH_PREFIX,
 )
 from ethstaker_deposit.utils.crypto import (
     SHA256,
@@ -31,6 +42,74 @@ def _get_word_list(language: str, path: str) -> Sequence[str]:
     return [word.replace('\n', '') for word in dirty_list]
 
 
+def _abbreviate_word(word: str) -> str:
+    return normalize('NFKC', word)[:4]
+
+
+class LanguageLexicon(NamedTuple):
+    """
+    The BIP39 word list of a language, indexed by full word and by 4-character NFKC prefix.
+    """
+    words: Sequence[str]
+    word_indices: Mapping[str, int]
+    prefix_indices: Mapping[str, int]
+
+
+class MnemonicLexicon:
+    """
+    Index of the BIP39 word lists found in a word lists directory. Each language is read and indexed the
+    first time it is used, and the prefix to (language, index) inverted map across all languages is built
+    the first time a mnemonic language has to be determined.
+    """
+    def __init__(self, words_path: str):
+        self.words_path = words_path
+        self._languages: dict[str, LanguageLexicon] = {}
+        self._prefix_languages: Optional[dict[str, list[tuple[str, int]]]] = None
+
+    def language(self, language: str) -> LanguageLexicon:
+        """
+        Return the indexed word list of `language`.
+        """
+        if language not in self._languages:
+            words = tuple(_get_word_list(language, self.words_path))
+            word_indices: dict[str, int] = {}
+            prefix_indices: dict[str, int] = {}
+            for index, word in enumerate(words):
+                # Keep the first index of a word or prefix as `list.index` would
+                word_indices.setdefault(word, index)
+                prefix_indices.setdefault(_abbreviate_word(word), index)
+            self._languages[language] = LanguageLexicon(
+                words=words,
+                word_indices=word_indices,
+                prefix_indices=prefix_indices,
+            )
+        return self._languages[language]
+
+    def prefix_languages(self, prefix: str) -> Sequence[tuple[str, int]]:
+        """
+        Return every (language, index) pair whose word starts with the 4-character NFKC `prefix`.
+        """
+        if self._prefix_languages is None:
+            prefix_languages = defaultdict(list)
+            for lang in MNEMONIC_LANG_OPTIONS.keys():
+                for word_prefix, index in self.language(lang).prefix_indices.items():
+                    prefix_languages[word_prefix].append((lang, index))
+            self._prefix_languages = dict(prefix_languages)
+        return self._prefix_languages.get(prefix, [])
+
+
+@lru_cache(maxsize=None)
+def _get_lexicon(words_path: str) -> MnemonicLexicon:
+    return MnemonicLexicon(words_path)
+
+
+def get_lexicon(words_path: str) -> MnemonicLexicon:
+    """
+    Return the process-wide `MnemonicLexicon` of the word lists directory at `words_path`.
+    """
+    return _get_lexicon(resource_path(words_path))
+
+
 def _index_to_word(word_list: Sequence[str], index: int) -> str:
     """
     Return the corresponding word for the supplied index while stripping out '\\n' chars.
@@ -40,10 +119,10 @@ def _index_to_word(word_list: Sequence[str], index: int) -> str:
     return word_list[index]
 
 
-def _word_to_index(word_list: Sequence[str], word: str) -> int:
+def _word_to_index(word_indices: Mapping[str, int], word: str) -> int:
     try:
-        return word_list.index(word)
-    except ValueError:
+        return word_indices[word]
+    except KeyError:
         raise ValueError('Word %s not in BIP39 word-list' % word)
 
 
@@ -65,28 +144,16 @@ def get_seed(*, mnemonic: str, password: str) -> bytes:
 def determine_mnemonic_language(mnemonic: str, words_path: str) -> Sequence[str]:
     """
     Given a `mnemonic` determine what language[s] it is written in.
-    First create a map of every word in all supported languages and what languages those words belong to.
-    Then go through each word in the provided mnemonic and determine its potential languages.
+    Look up the 4-character prefix of each word in the provided mnemonic in the lexicon of all supported
+    languages to determine its potential languages.
     Return a list of all potential languages.
     """
-    languages = MNEMONIC_LANG_OPTIONS.keys()
-    word_language_map = defaultdict(list)
-    for lang, word in ((lang, word) for lang in languages for word in _get_word_list(lang, words_path)):
-        word_language_map[word].append(lang)
-
-    try:
-        mnemonic_list = [normalize('NFKC', word)[:4] for word in mnemonic.lower().split(' ')]
-        word_languages = [
-            [
-                lang for word, langs in word_language_map.items()
-                for lang in langs
-                if normalize('NFKC', word)[:4] == abbrev
-            ]
-            for abbrev in mnemonic_list
-        ]
-        return list(set(sum(word_languages, [])))
-    except KeyError:
-        raise ValueError('Word not found in mnemonic word lists for any language.')
+    lexicon = get_lexicon(words_path)
+    return list({
+        lang
+        for abbrev in abbreviate_words(mnemonic.lower().split(' '))
+        for lang, _ in lexicon.prefix_languages(abbrev)
+    })
 
 
 def _validate_entropy_length(entropy: bytes) -> None:
@@ -108,7 +175,7 @@ def abbreviate_words(words: Sequence[str]) -> list[str]:
     """
     Given a series of word strings, return the 4-letter version of each word (which is unique according to BIP39)
     """
-    return [normalize('NFKC', word)[:4] for word in words]
+    return [_abbreviate_word(word) for word in words]
 
 
 def reconstruct_mnemonic(mnemonic: str, words_path: str, language: Optional[str] = None) -> Optional[str]:
@@ -122,22 +189,23 @@ def reconstruct_mnemonic(mnemonic: str, words_path: str, language: Optional[str]
         return None
     valid_languages = []
     reconstructed_mnemonic = None
+    abbrev_mnemonic_list = abbreviate_words(mnemonic.lower().split(' '))
+    if len(abbrev_mnemonic_list) not in range(12, 25, 3):
+        return None
+    lexicon = get_lexicon(words_path)
     for language in languages:
         try:
-            abbrev_word_list = abbreviate_words(_get_word_list(language, words_path))
-            abbrev_mnemonic_list = abbreviate_words(mnemonic.lower().split(' '))
-            if len(abbrev_mnemonic_list) not in range(12, 25, 3):
-                return None
-            word_indices = [_word_to_index(abbrev_word_list, word) for word in abbrev_mnemonic_list]
+            language_lexicon = lexicon.language(language)
+            word_indices = [_word_to_index(language_lexicon.prefix_indices, word) for word in abbrev_mnemonic_list]
             mnemonic_int = _uint11_array_to_uint(word_indices)
             checksum_length = len(abbrev_mnemonic_list) // 3
             checksum = mnemonic_int & 2**checksum_length - 1
             entropy = (mnemonic_int - checksum) >> checksum_length
             entropy_bits = entropy.to_bytes(checksum_length * 4, 'big')
-            full_word_list = _get_word_list(language, words_path)
             if _get_checksum(entropy_bits) == checksum:
                 valid_languages.append(language)
-                reconstructed_mnemonic = ' '.join([_index_to_word(full_word_list, index) for index in word_indices])
+                reconstructed_mnemonic = ' '.join(
+                    [_index_to_word(language_lexicon.words, index) for index in word_indices])
             else:
                 pass
         except ValueError:
@@ -165,9 +233,250 @@ def get_mnemonic(*, language: str, words_path: str, entropy: Optional[bytes] = N
     entropy_bits += checksum
     entropy_length += checksum_length
     mnemonic = []
-    word_list = _get_word_list(language, words_path)
+    word_list = get_lexicon(words_path).language(language).words
     for i in range(entropy_length // 11 - 1, -1, -1):
         index = (entropy_bits >> i * 11) & 2**11 - 1
         word = _index_to_word(word_list, index)
         mnemonic.append(word)
     return ' '.join(mnemonic)
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """
+    Return the Levenshtein distance between `a` and `b`.
+    """
+    if a == b:
+        return 0
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def _is_valid_checksum(word_indices: Sequence[int]) -> bool:
+    mnemonic_int = _uint11_array_to_uint(word_indices)
+    checksum_length = len(word_indices) // 3
+    checksum = mnemonic_int & 2**checksum_length - 1
+    entropy = (mnemonic_int - checksum) >> checksum_length
+    return _get_checksum(entropy.to_bytes(checksum_length * 4, 'big')) == checksum
+
+
+class MnemonicRepairFamily(NamedTuple):
+    """
+    A set of candidate corrections of a mnemonic: every combination of the word indices allowed at each position.
+    """
+    language: str
+    choices: Sequence[Sequence[int]]
+
+    @property
+    def size(self) -> int:
+        size = 1
+        for position_choices in self.choices:
+            size *= len(position_choices)
+        return size
+
+
+class MnemonicRepairSpace:
+    """
+    The ordered search space of the corrections of a mnemonic that fails `reconstruct_mnemonic`: one or two missing
+    words, a single mistyped word replaced by the words within `max_edit_distance` of it and two adjacent words
+    swapped. Candidates are numbered from 0 to `size` so that a search can be split in ranges and resumed.
+    """
+    def __init__(self, families: Sequence[MnemonicRepairFamily], words_path: str):
+        self.families = families
+        self.words_path = words_path
+        self.size = sum(family.size for family in families)
+
+    def candidates(self, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        """
+        Return the candidates numbered from `start` to `stop` with a valid BIP39 checksum.
+        """
+        stop = self.size if stop is None else min(stop, self.size)
+        lexicon = get_lexicon(self.words_path)
+        offset = 0
+        for family in self.families:
+            if offset + family.size <= start:
+                offset += family.size
+                continue
+            if offset >= stop:
+                break
+            words = lexicon.language(family.language).words
+            # Decode the first candidate of the range in the mixed radix of the family choices
+            digits = [0] * len(family.choices)
+            rest = max(start - offset, 0)
+            for position in range(len(family.choices) - 1, -1, -1):
+                rest, digits[position] = divmod(rest, len(family.choices[position]))
+            for _ in range(max(start - offset, 0), min(stop - offset, family.size)):
+                word_indices = [choices[digit] for choices, digit in zip(family.choices, digits)]
+                if _is_valid_checksum(word_indices):
+                    yield ' '.join(words[index] for index in word_indices)
+                for position in range(len(digits) - 1, -1, -1):
+                    digits[position] += 1
+                    if digits[position] < len(family.choices[position]):
+                        break
+                    digits[position] = 0
+            offset += family.size
+
+
+def get_mnemonic_repair_space(mnemonic: str, words_path: str, language: Optional[str] = None,
+                              max_missing_words: int = 2, max_edit_distance: int = 2) -> MnemonicRepairSpace:
+    """
+    Return the search space of the corrections of `mnemonic`, in the given `language` or in every language its
+    words may belong to.
+    """
+    lexicon = get_lexicon(words_path)
+    typed_words = [normalize('NFKC', word) for word in mnemonic.lower().split()]
+    abbrev_words = abbreviate_words(typed_words)
+    languages = [language] if language else sorted(
+        determine_mnemonic_language(' '.join(typed_words), words_path),
+        key=lambda x: list(MNEMONIC_LANG_OPTIONS.keys()).index(x),
+    )
+    all_indices = tuple(range(2048))
+
+    families = []
+    for lang in languages:
+        language_lexicon = lexicon.language(lang)
+        known = [language_lexicon.prefix_indices.get(word) for word in abbrev_words]
+        unknown_positions = [position for position, index in enumerate(known) if index is None]
+
+        if len(typed_words) in range(12, 25, 3):
+            # A single mistyped word, which has to be the only unknown one if there is any
+            for position, typed_word in enumerate(typed_words):
+                if unknown_positions not in ([], [position]):
+                    continue
+                choices = tuple(
+                    index for index, word in enumerate(language_lexicon.words)
+                    if index != known[position] and abs(len(word) - len(typed_word)) <= max_edit_distance
+                    and _edit_distance(typed_word, normalize('NFKC', word)) <= max_edit_distance
+                )
+                if choices:
+                    families.append(MnemonicRepairFamily(lang, [
+                        choices if i == position else (index,) for i, index in enumerate(known)
+                    ]))
+            # Two adjacent words swapped
+            if not unknown_positions:
+                for position in range(len(known) - 1):
+                    if known[position] != known[position + 1]:
+                        swapped = list(known)
+                        swapped[position], swapped[position + 1] = swapped[position + 1], swapped[position]
+                        families.append(MnemonicRepairFamily(lang, [(index,) for index in swapped]))
+
+        # Missing words, at any position
+        if not unknown_positions:
+            for num_missing in range(1, max_missing_words + 1):
+                num_words = len(known) + num_missing
+                if num_words not in range(12, 25, 3):
+                    continue
+                for missing_positions in combinations(range(num_words), num_missing):
+                    given = iter(known)
+                    families.append(MnemonicRepairFamily(lang, [
+                        all_indices if i in missing_positions else (next(given),)
+                        for i in range(num_words)
+                    ]))
+
+    return MnemonicRepairSpace(families, words_path)
+
+
+# Search state shared by every task of a mnemonic repair worker pool, installed once per worker process
+_repair_worker_kwargs: Dict[str, Any] = {}
+
+
+def _init_repair_worker(shared_kwargs: Dict[str, Any]) -> None:
+    _repair_worker_kwargs.clear()
+    _repair_worker_kwargs.update(shared_kwargs)
+
+
+def _matches_repair_target(mnemonic: str, pubkey: Optional[bytes], withdrawal_credentials: Optional[bytes],
+                           account_indices: Sequence[int]) -> bool:
+    # Imported here as the key derivation path utilities depend on this module, and to keep py_ecc out of the
+    # mnemonic only code paths
+    from ethstaker_deposit.key_handling.key_derivation.path import DerivationContext
+    from ethstaker_deposit.utils.bls import SkToPk
+
+    context = DerivationContext(mnemonic=mnemonic, password='')
+    for index in account_indices:
+        withdrawal_path = f'{VALIDATOR_KEY_PATH_PREFIX}/{index}/0'
+        if withdrawal_credentials is not None:
+            withdrawal_pubkey = SkToPk(context.derive(withdrawal_path))
+            if BLS_WITHDRAWAL_PREFIX + SHA256(withdrawal_pubkey)[1:] == withdrawal_credentials:
+                return True
+        if pubkey is not None and SkToPk(context.derive(f'{withdrawal_path}/0')) == pubkey:
+            return True
+    return False
+
+
+def _repair_search_range(task: tuple[int, int]) -> Optional[str]:
+    kwargs = _repair_worker_kwargs
+    space: MnemonicRepairSpace = kwargs['space']
+    for candidate in space.candidates(*task):
+        if _matches_repair_target(candidate, kwargs['pubkey'], kwargs['withdrawal_credentials'],
+                                  kwargs['account_indices']):
+            return candidate
+    return None
+
+
+def repair_mnemonic(mnemonic: str,
+                    words_path: str,
+                    *,
+                    pubkey: Optional[bytes] = None,
+                    withdrawal_credentials: Optional[bytes] = None,
+                    account_indices: Sequence[int] = (0,),
+                    language: Optional[str] = None,
+                    max_missing_words: int = 2,
+                    max_edit_distance: int = 2,
+                    start: int = 0,
+                    range_size: int = 4096,
+                    progress: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
+    """
+    Search the corrections of `mnemonic` for the one deriving the signing `pubkey` or the BLS
+    `withdrawal_credentials` of a validator at one of the `account_indices`, and return it or None.
+
+    The candidates are pruned by their BIP39 checksum before their keys are derived, spread across a process pool in
+    ranges of `range_size` candidates. The search stops at the first match. `progress` is called with the number of
+    candidates searched so far, all below that number, and the size of the search space; passing that number as
+    `start` to a new search with the same arguments resumes it.
+    """
+    if pubkey is None and withdrawal_credentials is None:
+        raise ValueError("Either `pubkey` or `withdrawal_credentials` should be given.")
+    if range_size < 1:
+        raise ValueError(f"`range_size` should be greater than or equal to 1. Got {range_size}.")
+
+    space = get_mnemonic_repair_space(mnemonic, words_path, language=language,
+                                      max_missing_words=max_missing_words, max_edit_distance=max_edit_distance)
+    shared_kwargs = {
+        'space': space,
+        'pubkey': pubkey,
+        'withdrawal_credentials': withdrawal_credentials,
+        'account_indices': tuple(account_indices),
+    }
+    ranges = ((offset, min(offset + range_size, space.size)) for offset in range(start, space.size, range_size))
+    max_pending = 2 * (os.cpu_count() or 1)
+    pending: Dict[concurrent.futures.Future[Optional[str]], int] = {}
+    searched: set[int] = set()
+    searched_up_to = start
+
+    executor = concurrent.futures.ProcessPoolExecutor(initializer=_init_repair_worker, initargs=(shared_kwargs,))
+    try:
+        while True:
+            for task in ranges:
+                pending[executor.submit(_repair_search_range, task)] = task[0]
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                return None
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                searched.add(pending.pop(future))
+                if future.result() is not None:
+                    return future.result()
+            while searched_up_to in searched:
+                searched.remove(searched_up_to)
+                searched_up_to = min(searched_up_to + range_size, space.size)
+            if progress is not None:
+                progress(searched_up_to, space.size)
+    finally:
+        # Do not wait for the ranges still being searched after a match
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,3 +1,21 @@
+from collections import OrderedDict
+import concurrent.futures
+from functools import lru_cache
+import os
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    Optional,
+)
+
+from ethstaker_deposit.utils.bls import SkToPk
+from ethstaker_deposit.utils.constants import (
+    BLS_WITHDRAWAL_PREFIX,
+    VALIDATOR_KEY_PATH_PREFIX,
+)
+from ethstaker_deposit.utils.crypto import SHA256
+
 from .mnemonic import get_seed
 from .tree import (
     derive_master_SK,
@@ -22,6 +40,59 @@ def path_to_nodes(path: str) -> list[int]:
     return [int(index) for index in indices]
 
 
+class DerivationContext:
+    """
+    Derives many keys from a single mnemonic while only running the BIP39 seed derivation
+    and the EIP-2333 master SK derivation once. Intermediate tree nodes are kept in an LRU
+    cache keyed by path so that keys sharing a prefix (eg. `m/12381/3600/i/0` and
+    `m/12381/3600/i/0/0`) only pay for the child steps that are not yet known.
+    """
+    def __init__(self, *, mnemonic: str, password: str, cache_size: int = 16):
+        if cache_size < 1:
+            raise ValueError(f"`cache_size` should be greater than or equal to 1. Got {cache_size}.")
+        self.master_SK = derive_master_SK(get_seed(mnemonic=mnemonic, password=password))
+        self.cache_size = cache_size
+        self._nodes: OrderedDict[tuple[int, ...], int] = OrderedDict()
+
+    def _cache(self, nodes: tuple[int, ...], sk: int) -> None:
+        self._nodes[nodes] = sk
+        self._nodes.move_to_end(nodes)
+        while len(self._nodes) > self.cache_size:
+            self._nodes.popitem(last=False)
+
+    def derive_nodes(self, nodes: tuple[int, ...]) -> int:
+        """
+        Return the SK at the position described by `nodes`, starting from the deepest cached ancestor.
+        """
+        depth = len(nodes)
+        while depth > 0 and nodes[:depth] not in self._nodes:
+            depth -= 1
+        if depth > 0:
+            sk = self._nodes[nodes[:depth]]
+            self._nodes.move_to_end(nodes[:depth])
+        else:
+            sk = self.master_SK
+        for i in range(depth, len(nodes)):
+            sk = derive_child_SK(parent_SK=sk, index=nodes[i])
+            self._cache(nodes[:i + 1], sk)
+        return sk
+
+    def derive(self, path: str) -> int:
+        """
+        Return the SK at position `path`.
+        """
+        return self.derive_nodes(tuple(path_to_nodes(path)))
+
+
+@lru_cache(maxsize=1)
+def get_derivation_context(*, mnemonic: str, password: str) -> DerivationContext:
+    """
+    Return the process-wide `DerivationContext` for `mnemonic` so that every key derived from
+    the same mnemonic in this process shares the seed, master SK and cached tree nodes.
+    """
+    return DerivationContext(mnemonic=mnemonic, password=password)
+
+
 def mnemonic_and_path_to_key(*, mnemonic: str, path: str, password: str) -> int:
     """
     Return the SK at position `path`, derived from `mnemonic`. The password is to be
@@ -32,3 +103,106 @@ def mnemonic_and_path_to_key(*, mnemonic: str, path: str, password: str) -> int:
     for node in path_to_nodes(path):
         sk = derive_child_SK(parent_SK=sk, index=node)
     return sk
+
+
+# Number of account indices derived by each task of an account index discovery
+ACCOUNT_DISCOVERY_BATCH_SIZE = 16
+
+# Targets of the account index discovery, installed once per worker process by `_init_discovery_worker`
+_discovery_worker_kwargs: Dict[str, Any] = {}
+
+
+def _init_discovery_worker(shared_kwargs: Dict[str, Any]) -> None:
+    _discovery_worker_kwargs.clear()
+    _discovery_worker_kwargs.update(shared_kwargs)
+    get_derivation_context(
+        mnemonic=shared_kwargs['mnemonic'],
+        password=shared_kwargs['password'],
+    ).derive(VALIDATOR_KEY_PATH_PREFIX)
+
+
+def _discover_account_batch(task: tuple[int, int]) -> dict[int, tuple[bytes, tuple[bytes, ...]]]:
+    """
+    Return the signing pubkey of every matching account index of the batch, with the targets it matches.
+    """
+    kwargs = _discovery_worker_kwargs
+    context = get_derivation_context(mnemonic=kwargs['mnemonic'], password=kwargs['password'])
+    matches: dict[int, tuple[bytes, tuple[bytes, ...]]] = {}
+    for index in range(*task):
+        withdrawal_path = f'{VALIDATOR_KEY_PATH_PREFIX}/{index}/0'
+        pubkey = SkToPk(context.derive(f'{withdrawal_path}/0'))
+        # A validator can be the target of both its pubkey and its withdrawal credentials
+        targets: tuple[bytes, ...] = (pubkey,) if pubkey in kwargs['pubkeys'] else ()
+        if kwargs['withdrawal_credentials']:
+            withdrawal_credentials = BLS_WITHDRAWAL_PREFIX + SHA256(SkToPk(context.derive(withdrawal_path)))[1:]
+            if withdrawal_credentials in kwargs['withdrawal_credentials']:
+                targets += (withdrawal_credentials,)
+        if targets:
+            matches[index] = (pubkey, targets)
+    return matches
+
+
+def discover_account_indices(*,
+                             mnemonic: str,
+                             password: str,
+                             pubkeys: Collection[bytes] = (),
+                             withdrawal_credentials: Collection[bytes] = (),
+                             start_index: int = 0,
+                             gap_limit: int = 100,
+                             stop_index: Optional[int] = None) -> dict[int, bytes]:
+    """
+    Scan the account indices of `mnemonic` from `start_index`, in parallel, for the validators whose signing
+    pubkey is in `pubkeys` or whose BLS withdrawal credentials are in `withdrawal_credentials`, and return the
+    signing pubkey of every matching account index.
+
+    The scan stops once every target is found, after `gap_limit` consecutive account indices without a match,
+    or at `stop_index`.
+    """
+    if gap_limit < 1:
+        raise ValueError(f"`gap_limit` should be greater than or equal to 1. Got {gap_limit}.")
+    shared_kwargs = {
+        'mnemonic': mnemonic,
+        'password': password,
+        'pubkeys': frozenset(pubkeys),
+        'withdrawal_credentials': frozenset(withdrawal_credentials),
+    }
+    num_targets = len(shared_kwargs['pubkeys']) + len(shared_kwargs['withdrawal_credentials'])
+    matches: dict[int, bytes] = {}
+    if num_targets == 0:
+        return matches
+    found_targets: set[bytes] = set()
+
+    max_pending = 2 * (os.cpu_count() or 1)
+    pending: Dict[concurrent.futures.Future[dict[int, tuple[bytes, tuple[bytes, ...]]]], int] = {}
+    completed: dict[int, dict[int, tuple[bytes, tuple[bytes, ...]]]] = {}
+    next_batch = scanned_up_to = last_match = start_index
+
+    executor = concurrent.futures.ProcessPoolExecutor(initializer=_init_discovery_worker, initargs=(shared_kwargs,))
+    try:
+        # Batches complete out of order, the gap is only measured over the contiguously scanned indices
+        while scanned_up_to - last_match < gap_limit and len(found_targets) < num_targets:
+            while len(pending) < max_pending and (stop_index is None or next_batch < stop_index):
+                batch_stop = next_batch + ACCOUNT_DISCOVERY_BATCH_SIZE
+                if stop_index is not None:
+                    batch_stop = min(batch_stop, stop_index)
+                pending[executor.submit(_discover_account_batch, (next_batch, batch_stop))] = next_batch
+                next_batch = batch_stop
+            if not pending:
+                break
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                completed[pending.pop(future)] = future.result()
+            while scanned_up_to in completed:
+                batch_matches = completed.pop(scanned_up_to)
+                for index in range(scanned_up_to, min(scanned_up_to + ACCOUNT_DISCOVERY_BATCH_SIZE, next_batch)):
+                    if index in batch_matches:
+                        matches[index], targets = batch_matches[index]
+                        found_targets.update(targets)
+                        last_match = index + 1
+                    elif index - last_match >= gap_limit:
+                        break
+                scanned_up_to = min(scanned_up_to + ACCOUNT_DISCOVERY_BATCH_SIZE, next_batch)
+    finally:
+        # Do not wait for the batches still being scanned after an early termination
+        executor.shutdown(wait=False, cancel_futures=True)
+    return matches
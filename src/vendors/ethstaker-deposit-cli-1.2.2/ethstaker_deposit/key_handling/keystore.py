@@ -6,12 +6,12 @@ from dataclasses import (
 )
 import json
 
-from py_ecc.bls import G2ProofOfPossession as bls
 from secrets import randbits
-from typing import Any, Dict, Union, Optional
+from typing import Any, Dict, Tuple, Union, Optional
 from unicodedata import normalize
 from uuid import uuid4
 
+from ethstaker_deposit.utils.bls import SkToPk
 from ethstaker_deposit.utils.crypto import (
     AES_128_CTR,
     PBKDF2,
@@ -127,6 +127,15 @@ class Keystore(BytesDataclass):
         password = ''.join(c for c in password if ord(c) not in UNICODE_CONTROL_CHARS)
         return password.encode('UTF-8')
 
+    def derive_decryption_key(self, password: str) -> bytes:
+        """
+        Run the KDF of the self keystore over `password`.
+        """
+        return self.kdf(
+            password=self._process_password(password),
+            **self.crypto.kdf.params
+        )
+
     @classmethod
     def encrypt(cls, *, secret: bytes, password: str, path: str = '',
                 kdf_salt: Optional[bytes] = None,
@@ -134,29 +143,40 @@ class Keystore(BytesDataclass):
         """
         Encrypt a secret (BLS SK) as an EIP 2335 Keystore.
         """
+        keystore, _ = cls.encrypt_with_decryption_key(
+            secret=secret, password=password, path=path, kdf_salt=kdf_salt, aes_iv=aes_iv)
+        return keystore
+
+    @classmethod
+    def encrypt_with_decryption_key(cls, *, secret: bytes, password: str, path: str = '',
+                                    kdf_salt: Optional[bytes] = None,
+                                    aes_iv: Optional[bytes] = None) -> Tuple['Keystore', bytes]:
+        """
+        Encrypt a secret (BLS SK) as an EIP 2335 Keystore, also returning the decryption key derived
+        from `password` so that the keystore can be checked without running the KDF again.
+        """
         keystore = cls()
         keystore.uuid = str(uuid4())
         keystore.crypto.kdf.params['salt'] = kdf_salt if kdf_salt is not None else randbits(256).to_bytes(32, 'big')
-        decryption_key = keystore.kdf(
-            password=cls._process_password(password),
-            **keystore.crypto.kdf.params
-        )
+        decryption_key = keystore.derive_decryption_key(password)
         keystore.crypto.cipher.params['iv'] = aes_iv if aes_iv is not None else randbits(128).to_bytes(16, 'big')
         cipher = AES_128_CTR(key=decryption_key[:16], **keystore.crypto.cipher.params)
         keystore.crypto.cipher.message = cipher.encrypt(secret)
         keystore.crypto.checksum.message = SHA256(decryption_key[16:32] + keystore.crypto.cipher.message)
-        keystore.pubkey = bls.SkToPk(int.from_bytes(secret, 'big')).hex()
+        keystore.pubkey = SkToPk(int.from_bytes(secret, 'big')).hex()
         keystore.path = path
-        return keystore
+        return keystore, decryption_key
 
     def decrypt(self, password: str) -> bytes:
         """
         Retrieve the secret (BLS SK) from the self keystore by decrypting it with `password`
         """
-        decryption_key = self.kdf(
-            password=self._process_password(password),
-            **self.crypto.kdf.params
-        )
+        return self.decrypt_with_decryption_key(self.derive_decryption_key(password))
+
+    def decrypt_with_decryption_key(self, decryption_key: bytes) -> bytes:
+        """
+        Retrieve the secret (BLS SK) from the self keystore with a decryption key already derived by its KDF
+        """
         if SHA256(decryption_key[16:32] + self.crypto.cipher.message) != self.crypto.checksum.message:
             raise ValueError("Checksum message error")
 
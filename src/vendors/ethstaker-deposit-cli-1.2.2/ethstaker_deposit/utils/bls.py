@@ -0,0 +1,49 @@
+from functools import lru_cache
+from typing import Tuple
+
+from eth_typing import BLSPubkey
+from eth_utils import ValidationError
+from py_ecc.bls.g2_primitives import G1_to_pubkey
+from py_ecc.fields import optimized_bls12_381_FQ as FQ
+from py_ecc.optimized_bls12_381 import G1, Z1, add, curve_order, double
+from py_ecc.typing import Optimized_Point3D
+
+# Number of secret key bits handled by each row of the G1 generator table
+G1_TABLE_WINDOW_BITS = 6
+
+_G1Point = Optimized_Point3D[FQ]
+
+
+@lru_cache(maxsize=1)
+def g1_generator_table() -> Tuple[Tuple[_G1Point, ...], ...]:
+    """
+    Return the table of `j * 2**(w * i) * G1` for every `w`-bit window `i` of a secret key and every digit `j`,
+    built once per process.
+    """
+    table = []
+    base = G1
+    for _ in range(-(-curve_order.bit_length() // G1_TABLE_WINDOW_BITS)):
+        row = [Z1, base]
+        for _ in range(2, 2**G1_TABLE_WINDOW_BITS):
+            row.append(add(row[-1], base))
+        table.append(tuple(row))
+        for _ in range(G1_TABLE_WINDOW_BITS):
+            base = double(base)
+    return tuple(table)
+
+
+def SkToPk(privkey: int) -> BLSPubkey:
+    """
+    Drop-in replacement for `G2ProofOfPossession.SkToPk` that computes `privkey * G1` with the precomputed
+    generator table, costing one point addition per window instead of a full double-and-add.
+    """
+    if not (isinstance(privkey, int) and 0 < privkey < curve_order):
+        raise ValidationError(f"Invalid private key {privkey}")
+    point = Z1
+    mask = 2**G1_TABLE_WINDOW_BITS - 1
+    for row in g1_generator_table():
+        digit = privkey & mask
+        if digit:
+            point = add(point, row[digit])
+        privkey >>= G1_TABLE_WINDOW_BITS
+    return G1_to_pubkey(point)
@@ -15,6 +15,10 @@ BLS_WITHDRAWAL_PREFIX = bytes.fromhex('00')
 EXECUTION_ADDRESS_WITHDRAWAL_PREFIX = bytes.fromhex('01')
 COMPOUNDING_WITHDRAWAL_PREFIX = bytes.fromhex('02')
 
+# EIP-2334 path prefix (purpose and coin type) shared by every validator key
+# https://eips.ethereum.org/EIPS/eip-2334
+VALIDATOR_KEY_PATH_PREFIX = 'm/12381/3600'
+
 ETH2GWEI = 10 ** 9
 DEFAULT_ACTIVATION_AMOUNT = 2 ** 5
 MAX_DEPOSIT_AMOUNT = 2 ** 11 * ETH2GWEI
@@ -26,6 +30,7 @@ DEFAULT_BLS_TO_EXECUTION_CHANGES_FOLDER_NAME = 'bls_to_execution_changes'
 DEFAULT_BLS_TO_EXECUTION_CHANGES_KEYSTORE_FOLDER_NAME = 'bls_to_execution_changes_keystore'
 DEFAULT_EXIT_TRANSACTION_FOLDER_NAME = 'exit_transactions'
 DEFAULT_PARTIAL_DEPOSIT_FOLDER_NAME = 'partial_deposits'
+KEY_GENERATION_JOURNAL_FILE_NAME = 'generate_keys_journal.ndjson'
 
 # Internationalisation constants
 INTL_CONTENT_PATH = os.path.join('ethstaker_deposit', 'intl')
@@ -1,13 +1,325 @@
+import hashlib
 import json
 import os
+import re
+from types import TracebackType
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
 
 from ethstaker_deposit.utils.file_handling import (
     sensitive_opener,
 )
 
+# Number of characters read at once by `iter_deposit_data_json`
+DEPOSIT_DATA_READ_SIZE = 2**16
+
+# Prefixes of the deposit data JSON files, the top-up deposits of the keys being kept apart from their deposits so
+# that a deposit data file has a single deposit for every key
+DEPOSIT_DATA_FILE_PREFIX = 'deposit_data'
+TOP_UP_DEPOSIT_DATA_FILE_PREFIX = 'top_up_deposit_data'
+
+# Name of the deposit data JSON file of a shard, holding the shard, its first and last account indices and its run
+SHARD_DEPOSIT_DATA_FILE_NAME = re.compile(
+    r'^(?:top_up_)?deposit_data-\d+-shard-(\d+)-of-(\d+)-indices-(\d+)-(\d+)-run-([0-9a-f]{8})\.json$')
+
+# Field holding the run of a shard in each of its deposits, checked and dropped by `merge_deposit_data_json`
+SHARD_RUN_FIELD = 'shard_run'
+
+# Byte length of the hex encoded fields of a deposit read by `merge_deposit_data_json`
+DEPOSIT_DATUM_FIELD_LENGTHS = {
+    'pubkey': 48,
+    'withdrawal_credentials': 32,
+    'signature': 96,
+    'deposit_message_root': 32,
+    'deposit_data_root': 32,
+    'fork_version': 4,
+}
+
+
+class DepositDataShard(NamedTuple):
+    """
+    The k-th of N shards of a key generation, counting from 1, which covers the account indices in `index_range`.
+    Every shard of a key generation has the same `run`, derived from the pubkey at its first account index.
+    """
+    k: int
+    n: int
+    index_range: range
+    run: str
+
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """
+    Parse a `k/N` shard, the k-th of N shards counting from 1, into `(k, N)`.
+    """
+    try:
+        k, n = (int(part) for part in shard.split('/'))
+    except ValueError:
+        raise ValueError(f"The shard {shard} should be in the form k/N, eg. 1/4.")
+    if not 1 <= k <= n:
+        raise ValueError(f"The shard {shard} should be between 1/{n} and {n}/{n}.")
+    return k, n
+
+
+def get_shard_run(first_pubkey: bytes) -> str:
+    """
+    Return the run of the shards of a key generation, given the signing pubkey at its first account index.
+    """
+    return hashlib.sha256(first_pubkey).hexdigest()[:8]
+
+
+def get_deposit_data_shard(start_index: int, num_keys: int, shard: Tuple[int, int],
+                           first_pubkey: bytes) -> DepositDataShard:
+    """
+    Return the k-th of N shards of the `num_keys` account indices from `start_index`, whose signing pubkey is
+    `first_pubkey`. The shards are contiguous, cover every index exactly once and their sizes differ by at most one.
+    """
+    k, n = shard
+    if num_keys < n:
+        raise ValueError(f"The {num_keys} keys can not be split into {n} shards.")
+    return DepositDataShard(k, n, range(start_index + (k - 1) * num_keys // n, start_index + k * num_keys // n),
+                            get_shard_run(first_pubkey))
+
+
+def deposit_data_file_name(timestamp: float, shard: Optional[DepositDataShard] = None, top_ups: bool = False) -> str:
+    prefix = TOP_UP_DEPOSIT_DATA_FILE_PREFIX if top_ups else DEPOSIT_DATA_FILE_PREFIX
+    if shard is None:
+        return '%s-%i.json' % (prefix, timestamp)
+    return '%s-%i-shard-%i-of-%i-indices-%i-%i-run-%s.json' % (
+        prefix, timestamp, shard.k, shard.n, shard.index_range.start, shard.index_range.stop - 1, shard.run)
+
+
+def is_top_up_deposit_data_file(filefolder: str) -> bool:
+    return os.path.basename(filefolder).startswith(TOP_UP_DEPOSIT_DATA_FILE_PREFIX + '-')
+
+
+def shard_deposit_datum(deposit_datum: dict[str, Any], shard: Optional[DepositDataShard]) -> dict[str, Any]:
+    """
+    Return the deposit as written to the deposit data JSON file of `shard`, tagged with its run.
+    """
+    if shard is None:
+        return deposit_datum
+    return {**deposit_datum, SHARD_RUN_FIELD: shard.run}
+
+
+def _encode_deposit_datum(deposit_datum: dict[str, bytes]) -> str:
+    return json.dumps(deposit_datum, default=lambda x: x.hex())
+
+
+class DepositDataWriter:
+    """
+    Write a deposit data JSON file one deposit at a time, producing the same file as a single `json.dump` of
+    every deposit while only holding the current one in memory. The file of a `shard` is named after it, and
+    each of its deposits is tagged with the run of the shard. With `top_ups`, it is the file of the top-up deposits.
+
+    The deposits are written to a temporary file, created with the `sensitive_opener` permissions, which only
+    replaces the deposit data file once `close` is called. When used as a context manager, the temporary file
+    is removed instead if the block raises an exception.
+    """
+    def __init__(self, folder: str, timestamp: float, shard: Optional[DepositDataShard] = None,
+                 top_ups: bool = False):
+        self.filefolder = os.path.join(folder, deposit_data_file_name(timestamp, shard, top_ups))
+        self.shard = shard
+        self._temp_filefolder = self.filefolder + '.partial'
+        self._file = open(self._temp_filefolder, 'w', encoding='utf-8', opener=sensitive_opener)
+        self._file.write('[')
+        self.count = 0
+
+    def write(self, deposit_datum: dict[str, bytes]) -> None:
+        if self.count:
+            self._file.write(', ')
+        self._file.write(_encode_deposit_datum(shard_deposit_datum(deposit_datum, self.shard)))
+        self.count += 1
+
+    def close(self) -> str:
+        """
+        Finish the JSON array and atomically move the file in place, returning its path.
+        """
+        self._file.write(']')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._temp_filefolder, self.filefolder)
+        return self.filefolder
+
+    def abort(self) -> None:
+        """
+        Discard the deposits written so far.
+        """
+        self._file.close()
+        os.remove(self._temp_filefolder)
+
+    def __enter__(self) -> 'DepositDataWriter':
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def export_deposit_data_json(folder: str, timestamp: float, deposit_data: Iterable[dict[str, bytes]],
+                             shard: Optional[DepositDataShard] = None, top_ups: bool = False) -> str:
+    with DepositDataWriter(folder, timestamp, shard, top_ups) as writer:
+        for deposit_datum in deposit_data:
+            writer.write(deposit_datum)
+    return writer.filefolder
+
+
+def iter_deposit_data_json(filefolder: str) -> Iterator[dict[str, Any]]:
+    """
+    Parse the deposits of a deposit data JSON file one at a time, only holding the current one in memory.
+    """
+    decoder = json.JSONDecoder()
+    with open(filefolder, 'r', encoding='utf-8') as f:
+        buffer = ''
+        position = 0
+        started = False
+        eof = False
+        while True:
+            # Skip the whitespace and the array punctuation between two deposits
+            while position < len(buffer) and (buffer[position].isspace() or (started and buffer[position] == ',')):
+                position += 1
+            if position < len(buffer):
+                if not started:
+                    if buffer[position] != '[':
+                        raise ValueError(f"The deposit data JSON file {filefolder} should contain a JSON array.")
+                    started = True
+                    position += 1
+                    continue
+                if buffer[position] == ']':
+                    return
+                try:
+                    deposit_datum, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    if not isinstance(deposit_datum, dict):
+                        raise ValueError(f"The deposit data JSON file {filefolder} should only contain objects.")
+                    yield deposit_datum
+                    position = end
+                    continue
+            elif eof:
+                raise ValueError(f"The deposit data JSON file {filefolder} is truncated.")
+            # Only the part of the buffer which is not parsed yet is kept
+            chunk = f.read(DEPOSIT_DATA_READ_SIZE)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+
+
+def get_deposit_data_file_shard(filefolder: str) -> DepositDataShard:
+    """
+    Return the shard of a deposit data JSON file, from its name.
+    """
+    match = SHARD_DEPOSIT_DATA_FILE_NAME.match(os.path.basename(filefolder))
+    if match is None:
+        raise ValueError(f"The deposit data JSON file {filefolder} is not the file of a shard.")
+    k, n, first_index, last_index = (int(group) for group in match.groups()[:4])
+    return DepositDataShard(k, n, range(first_index, last_index + 1), match.group(5))
+
+
+def _check_deposit_datum(deposit_datum: dict[str, Any], filefolder: str) -> None:
+    for field, length in DEPOSIT_DATUM_FIELD_LENGTHS.items():
+        value = deposit_datum.get(field)
+        try:
+            valid = isinstance(value, str) and len(bytes.fromhex(value)) == length
+        except ValueError:
+            valid = False
+        if not valid:
+            raise ValueError(f"A deposit in {filefolder} has no valid {field}.")
+    if not isinstance(deposit_datum.get('amount'), int):
+        raise ValueError(f"A deposit in {filefolder} has no valid amount.")
+
+
+def merge_deposit_data_json(filefolders: Sequence[str], folder: str, timestamp: float) -> Tuple[str, range]:
+    """
+    Merge the deposit data JSON files of the N shards of a key generation into a single deposit data JSON file,
+    ordered by account index, returning its path and the account indices it covers. The top-up deposit data JSON
+    files of the shards are merged the same way, apart from their deposit data JSON files.
+
+    Every shard must be given once, the shards and each of their deposits must be of the same run, the shards
+    must cover contiguous account indices without any missing or duplicate key, and the deposits must be for the
+    same network and withdrawal credentials type, and to the same withdrawal address if any. A key has a single
+    deposit in a deposit data file, and may have several top-up deposits, which must follow each other, in a
+    top-up deposit data file. The deposits are streamed, only their pubkeys are held in memory.
+    """
+    if not filefolders:
+        raise ValueError("There are no deposit data JSON files to merge.")
+    top_ups = is_top_up_deposit_data_file(filefolders[0])
+    if any(is_top_up_deposit_data_file(filefolder) != top_ups for filefolder in filefolders):
+        raise ValueError("The deposit data and top-up deposit data JSON files of the shards should be merged apart.")
+    shards = sorted(((get_deposit_data_file_shard(filefolder), filefolder) for filefolder in filefolders),
+                    key=lambda shard: shard[0].k)
+    n = shards[0][0].n
+    if [shard.k for shard, _ in shards] != list(range(1, n + 1)) or any(shard.n != n for shard, _ in shards):
+        raise ValueError(f"The deposit data JSON files should be the shards 1/{n} to {n}/{n}, got "
+                         f"{', '.join('%i/%i' % shard[:2] for shard, _ in shards)}.")
+    run = shards[0][0].run
+    if any(shard.run != run for shard, _ in shards):
+        raise ValueError(f"The deposit data JSON files are shards of different key generations, got the runs "
+                         f"{', '.join(shard.run for shard, _ in shards)}.")
+    for (shard, filefolder), (next_shard, next_filefolder) in zip(shards, shards[1:]):
+        if next_shard.index_range.start != shard.index_range.stop:
+            raise ValueError(f"The account indices of {filefolder} and {next_filefolder} are not contiguous.")
 
-def export_deposit_data_json(folder: str, timestamp: float, deposit_data: list[dict[str, bytes]]) -> str:
-    file_folder = os.path.join(folder, 'deposit_data-%i.json' % timestamp)
-    with open(file_folder, 'w', encoding='utf-8', opener=sensitive_opener) as f:
-        json.dump(deposit_data, f, default=lambda x: x.hex())
-    return file_folder
+    pubkeys: set[str] = set()
+    network = None
+    withdrawal_credentials = None
+    with DepositDataWriter(folder, timestamp, top_ups=top_ups) as writer:
+        for shard, filefolder in shards:
+            num_keys = len(shard.index_range)
+            count = 0
+            pubkey = None
+            for deposit_datum in iter_deposit_data_json(filefolder):
+                if deposit_datum.pop(SHARD_RUN_FIELD, None) != run:
+                    raise ValueError(f"A deposit in {filefolder} is not of the run {run}.")
+                _check_deposit_datum(deposit_datum, filefolder)
+                if not pubkeys and get_shard_run(bytes.fromhex(deposit_datum['pubkey'])) != run:
+                    raise ValueError(f"The first deposit of {filefolder} is not the first key of the run {run}.")
+                # The further top-up deposits of a key follow its first one
+                if deposit_datum['pubkey'] == pubkey and not top_ups:
+                    raise ValueError(f"The deposit data JSON file {filefolder} has several deposits of pubkey "
+                                     f"{pubkey}.")
+                if deposit_datum['pubkey'] != pubkey:
+                    if count == num_keys:
+                        raise ValueError(f"The deposit data JSON file {filefolder} has the deposits of more than "
+                                         f"{num_keys} keys.")
+                    if deposit_datum['pubkey'] in pubkeys:
+                        raise ValueError(f"The deposit of pubkey {deposit_datum['pubkey']} in {filefolder} is a "
+                                         "duplicate.")
+                    pubkey = deposit_datum['pubkey']
+                    pubkeys.add(pubkey)
+                    count += 1
+                deposit_network = (deposit_datum.get('network_name'), deposit_datum['fork_version'])
+                if network is None:
+                    network = deposit_network
+                elif deposit_network != network:
+                    raise ValueError(f"The deposits in {filefolder} are for network {deposit_network[0]} with fork "
+                                     f"version {deposit_network[1]} rather than {network[0]} with fork version "
+                                     f"{network[1]}.")
+                # The BLS withdrawal credentials differ for every key, the others hold the withdrawal address
+                deposit_withdrawal_credentials = deposit_datum['withdrawal_credentials']
+                if deposit_withdrawal_credentials[:2] == '00':
+                    deposit_withdrawal_credentials = deposit_withdrawal_credentials[:2]
+                if withdrawal_credentials is None:
+                    withdrawal_credentials = deposit_withdrawal_credentials
+                elif deposit_withdrawal_credentials != withdrawal_credentials:
+                    raise ValueError(f"The deposit of pubkey {deposit_datum['pubkey']} in {filefolder} has the "
+                                     f"withdrawal credentials {deposit_datum['withdrawal_credentials']}, which do "
+                                     "not match the other deposits.")
+                writer.write(deposit_datum)
+            if count != num_keys:
+                raise ValueError(f"The deposit data JSON file {filefolder} has the deposits of {count} keys rather "
+                                 f"than {num_keys}.")
+    return writer.filefolder, range(shards[0][0].index_range.start, shards[-1][0].index_range.stop)
@@ -1,6 +1,7 @@
+import glob
 import json
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Iterable
 from py_ecc.bls import G2ProofOfPossession as bls
 
 from ethstaker_deposit.settings import BaseChainSetting
@@ -41,15 +42,17 @@ def exit_transaction_generation(
     return signed_exit
 
 
-def export_exit_transaction_json(folder: str, signed_exit: SignedVoluntaryExit, timestamp: float) -> str:
-    signed_exit_json: Dict[str, Any] = {}
-    message = {
-        'epoch': str(signed_exit.message.epoch),  # type: ignore[attr-defined]
-        'validator_index': str(signed_exit.message.validator_index),  # type: ignore[attr-defined]
+def _exit_transaction_dict(signed_exit: SignedVoluntaryExit) -> Dict[str, Any]:
+    return {
+        'message': {
+            'epoch': str(signed_exit.message.epoch),  # type: ignore[attr-defined]
+            'validator_index': str(signed_exit.message.validator_index),  # type: ignore[attr-defined]
+        },
+        'signature': '0x' + signed_exit.signature.hex(),  # type: ignore[attr-defined]
     }
-    signed_exit_json.update({'message': message})
-    signed_exit_json.update({'signature': '0x' + signed_exit.signature.hex()})  # type: ignore[attr-defined]
 
+
+def export_exit_transaction_json(folder: str, signed_exit: SignedVoluntaryExit, timestamp: float) -> str:
     filefolder = os.path.join(
         folder,
         'signed_exit_transaction-%s-%i.json' % (
@@ -59,5 +62,58 @@ def export_exit_transaction_json(folder: str, signed_exit: SignedVoluntaryExit,
     )
 
     with open(filefolder, 'w', encoding='utf-8', opener=sensitive_opener) as f:
-        json.dump(signed_exit_json, f)
+        json.dump(_exit_transaction_dict(signed_exit), f)
+    return filefolder
+
+
+def export_exit_transactions_json(folder: str, signed_exits: Iterable[SignedVoluntaryExit], timestamp: float) -> str:
+    """
+    Write the signed exits to a single JSON array, one exit at a time.
+    """
+    filefolder = os.path.join(folder, 'signed_exit_transactions-%i.json' % timestamp)
+    with open(filefolder, 'w', encoding='utf-8', opener=sensitive_opener) as f:
+        f.write('[')
+        for count, signed_exit in enumerate(signed_exits):
+            if count:
+                f.write(', ')
+            json.dump(_exit_transaction_dict(signed_exit), f)
+        f.write(']')
     return filefolder
+
+
+def find_keystore_files(keystores: str) -> list[str]:
+    """
+    Return the keystore files of the `keystores` folder, or matching the `keystores` glob pattern, by name.
+    """
+    if os.path.isdir(keystores):
+        keystores = os.path.join(keystores, 'keystore*.json')
+    filefolders = sorted(filefolder for filefolder in glob.glob(keystores) if os.path.isfile(filefolder))
+    if not filefolders:
+        raise ValueError(f"There are no keystore files matching {keystores}.")
+    return filefolders
+
+
+def _normalize_pubkey(pubkey: str) -> str:
+    pubkey = pubkey.lower()
+    return pubkey[2:] if pubkey.startswith('0x') else pubkey
+
+
+def load_validator_indices(filefolder: str) -> Dict[str, int]:
+    """
+    Load the validator index of every pubkey, as hex without the 0x prefix, from a JSON file holding either an
+    object mapping the pubkeys to their validator indices or the response of the beacon node API
+    `/eth/v1/beacon/states/{state_id}/validators` endpoint.
+    """
+    with open(filefolder, 'r', encoding='utf-8') as f:
+        content = json.load(f)
+    try:
+        if isinstance(content, dict) and isinstance(content.get('data'), list):
+            items = [(validator['validator']['pubkey'], validator['index']) for validator in content['data']]
+        elif isinstance(content, dict):
+            items = list(content.items())
+        else:
+            raise TypeError()
+        return {_normalize_pubkey(pubkey): int(index) for pubkey, index in items}
+    except (AttributeError, KeyError, TypeError, ValueError):
+        raise ValueError(f"The validator indices file {filefolder} should map the pubkeys to their validator "
+                         "indices.")
@@ -0,0 +1,132 @@
+import os
+import sqlite3
+from types import TracebackType
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Type,
+)
+
+from ethstaker_deposit.utils.constants import VALIDATOR_KEY_PATH_PREFIX
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS validators (
+    account_index INTEGER NOT NULL,
+    network_name TEXT NOT NULL,
+    derivation_path TEXT NOT NULL,
+    pubkey BLOB NOT NULL,
+    withdrawal_credentials BLOB NOT NULL,
+    keystore TEXT,
+    deposit_message_root BLOB NOT NULL,
+    deposit_data_root BLOB NOT NULL,
+    PRIMARY KEY (pubkey, network_name)
+);
+CREATE INDEX IF NOT EXISTS validators_account_index ON validators (account_index);
+CREATE INDEX IF NOT EXISTS validators_withdrawal_credentials ON validators (withdrawal_credentials);
+'''
+
+
+def _to_bytes(value: Any) -> bytes:
+    # The deposit data read back from a JSON file holds hex strings rather than bytes
+    return value if isinstance(value, bytes) else bytes.fromhex(value)
+
+
+class ValidatorInventoryEntry(NamedTuple):
+    """
+    What is known about a validator key when it is generated.
+    """
+    account_index: int
+    network_name: str
+    derivation_path: str
+    pubkey: bytes
+    withdrawal_credentials: bytes
+    keystore: Optional[str]
+    deposit_message_root: bytes
+    deposit_data_root: bytes
+
+    @classmethod
+    def from_deposit_datum(cls, account_index: int, keystore: Optional[str],
+                           deposit_datum: Dict[str, Any]) -> 'ValidatorInventoryEntry':
+        return cls(
+            account_index=account_index,
+            network_name=deposit_datum['network_name'],
+            derivation_path=f'{VALIDATOR_KEY_PATH_PREFIX}/{account_index}/0/0',
+            pubkey=_to_bytes(deposit_datum['pubkey']),
+            withdrawal_credentials=_to_bytes(deposit_datum['withdrawal_credentials']),
+            keystore=keystore,
+            deposit_message_root=_to_bytes(deposit_datum['deposit_message_root']),
+            deposit_data_root=_to_bytes(deposit_datum['deposit_data_root']),
+        )
+
+
+class ValidatorInventory:
+    """
+    Local SQLite index of the generated validator keys, keyed by signing pubkey and network, and looked up by
+    signing pubkey, account index or withdrawal credentials without deriving any key again.
+
+    It only holds public data, entries of keys generated again replace the previous ones. Keys of different
+    mnemonics can share an account index. Nothing in the inventory is authenticated, it must not replace
+    checking the keys themselves. Unless `create` is set, the inventory must already exist.
+    """
+    def __init__(self, filefolder: str, create: bool = True):
+        if not create and not os.path.isfile(filefolder):
+            raise ValueError(f"There is no validator inventory at {filefolder}.")
+        self.filefolder = filefolder
+        self._connection = sqlite3.connect(filefolder)
+        self._connection.executescript(_SCHEMA)
+
+    def add(self, entries: Iterable[ValidatorInventoryEntry]) -> None:
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?, ?, ?, ?, ?)', entries)
+
+    def _get(self, where: str, parameters: Iterable[Any]) -> List[ValidatorInventoryEntry]:
+        rows = self._connection.execute(
+            f'SELECT * FROM validators WHERE {where} ORDER BY network_name, pubkey', tuple(parameters)).fetchall()
+        return [ValidatorInventoryEntry(*row) for row in rows]
+
+    def get_by_account_index(self, account_index: int,
+                             network_name: Optional[str] = None) -> List[ValidatorInventoryEntry]:
+        """
+        Return the entries of the keys at `account_index`, for `network_name` or any network, from every mnemonic
+        the inventory holds keys of.
+        """
+        if network_name is None:
+            return self._get('account_index = ?', (account_index,))
+        return self._get('account_index = ? AND network_name = ?', (account_index, network_name))
+
+    def get_by_pubkey(self, pubkey: bytes, network_name: Optional[str] = None) -> Optional[ValidatorInventoryEntry]:
+        """
+        Return the entry of the key with the signing `pubkey`, for `network_name` or any network.
+        """
+        entries = (self._get('pubkey = ?', (pubkey,)) if network_name is None
+                   else self._get('pubkey = ? AND network_name = ?', (pubkey, network_name)))
+        return entries[0] if entries else None
+
+    def get_by_withdrawal_credentials(self, withdrawal_credentials: bytes,
+                                      network_name: Optional[str] = None) -> List[ValidatorInventoryEntry]:
+        """
+        Return the entries of the keys with `withdrawal_credentials`, for `network_name` or any network.
+        """
+        if network_name is None:
+            return self._get('withdrawal_credentials = ?', (withdrawal_credentials,))
+        return self._get('withdrawal_credentials = ? AND network_name = ?', (withdrawal_credentials, network_name))
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> 'ValidatorInventory':
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.close()
+
+
+def export_inventory(filefolder: str, entries: Iterable[ValidatorInventoryEntry]) -> None:
+    with ValidatorInventory(filefolder) as inventory:
+        inventory.add(entries)
@@ -0,0 +1,240 @@
+import json
+import os
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from ethstaker_deposit.utils.constants import KEY_GENERATION_JOURNAL_FILE_NAME
+
+
+def _encode_line(value: Dict[str, Any]) -> bytes:
+    return (json.dumps(value, default=lambda x: x.hex()) + '\n').encode('utf-8')
+
+
+def _entry_deposit_datum(entry: Dict[str, Any], network: int) -> Dict[str, Any]:
+    deposit_datum: Dict[str, Any] = (
+        entry['deposit_datum'] if network == 0 else entry['additional_deposit_data'][network - 1])
+    return deposit_datum
+
+
+def _entry_deposit_data(entry: Dict[str, Any], network: int) -> list[Dict[str, Any]]:
+    top_up_deposit_data: list[Dict[str, Any]] = (
+        entry['top_up_deposit_data'][network] if 'top_up_deposit_data' in entry else [])
+    return [_entry_deposit_datum(entry, network), *top_up_deposit_data]
+
+
+class KeyGenerationJournal:
+    """
+    Append-only record, kept in the output folder, of the validator keys of a key generation whose keystore
+    and deposit have been saved and verified, so that an interrupted key generation can be resumed.
+
+    The first line holds the settings and the timestamp of the key generation. Every following line holds the
+    account index, the keystore file and the deposit datum of a completed key, or the account indices whose
+    keys have to be generated again. Each line is synced to disk before the next key is recorded.
+
+    A key generation for several networks records the deposit datum of the key on every additional network as
+    well. The deposit data are read back by `network`, 0 being the main network of the key generation and the
+    additional networks following in their order. The top-up deposit data of a key, on every network, are
+    recorded next to its deposit datum.
+
+    The keys recorded by this process were verified before being recorded, while the keys loaded from the journal
+    of an interrupted key generation only count as verified once they are marked so with `mark_verified`.
+    """
+    def __init__(self, filefolder: str, settings: Dict[str, Any], timestamp: float):
+        self.filefolder = filefolder
+        self.settings = settings
+        self.timestamp = timestamp
+        # Offset in the journal of the line of every completed account index, in the order they were recorded
+        self._offsets: Dict[int, int] = {}
+        self._keystores: Dict[int, str] = {}
+        self._verified: Set[int] = set()
+        self._file = open(filefolder, 'ab')
+
+    @staticmethod
+    def journal_filefolder(folder: str) -> str:
+        return os.path.join(folder, KEY_GENERATION_JOURNAL_FILE_NAME)
+
+    @classmethod
+    def create(cls, folder: str, settings: Dict[str, Any], timestamp: float) -> 'KeyGenerationJournal':
+        """
+        Start the journal of a new key generation, replacing any previous journal in `folder`.
+        """
+        filefolder = cls.journal_filefolder(folder)
+        with open(filefolder, 'wb') as f:
+            f.write(_encode_line({'settings': settings, 'timestamp': timestamp}))
+            f.flush()
+            os.fsync(f.fileno())
+        return cls(filefolder, settings, timestamp)
+
+    @classmethod
+    def resume(cls, folder: str, settings: Dict[str, Any]) -> 'KeyGenerationJournal':
+        """
+        Load the journal of the interrupted key generation in `folder`, which must have been started with the
+        same `settings`.
+        """
+        filefolder = cls.journal_filefolder(folder)
+        if not os.path.exists(filefolder):
+            raise ValueError(f"There is no key generation to resume in {folder}.")
+
+        with open(filefolder, 'rb') as f:
+            header = json.loads(f.readline())
+            # Compare the settings as they are encoded in the journal
+            if header['settings'] != json.loads(_encode_line(settings)):
+                raise ValueError(f"The key generation in {folder} was started with different settings.")
+            offsets: Dict[int, int] = {}
+            keystores: Dict[int, str] = {}
+            offset = f.tell()
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # The last line was only partially written, it is truncated below
+                    break
+                entry = json.loads(line)
+                if 'discard' in entry:
+                    for index in entry['discard']:
+                        offsets.pop(index, None)
+                        keystores.pop(index, None)
+                else:
+                    offsets.pop(entry['index'], None)
+                    offsets[entry['index']] = offset
+                    keystores[entry['index']] = os.path.join(folder, entry['keystore'])
+                offset += len(line)
+
+        # Drop a partially written last line so that the next line starts cleanly
+        with open(filefolder, 'r+b') as f:
+            f.truncate(offset)
+
+        journal = cls(filefolder, settings, header['timestamp'])
+        journal._offsets = offsets
+        journal._keystores = keystores
+        return journal
+
+    @property
+    def completed_indices(self) -> list[int]:
+        """
+        The completed account indices, in the order they were recorded.
+        """
+        return list(self._offsets)
+
+    @property
+    def keystore_filefolders(self) -> Dict[int, str]:
+        """
+        The keystore file of every completed account index.
+        """
+        return dict(self._keystores)
+
+    @property
+    def unverified_indices(self) -> list[int]:
+        """
+        The completed account indices loaded from the journal that have not been verified again, in the order
+        they were recorded.
+        """
+        return [index for index in self._offsets if index not in self._verified]
+
+    def mark_verified(self, indices: Iterable[int]) -> None:
+        self._verified.update(index for index in indices if index in self._offsets)
+
+    def _append(self, value: Dict[str, Any]) -> int:
+        offset = self._file.tell()
+        self._file.write(_encode_line(value))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return offset
+
+    def record(self, index: int, keystore_filefolder: str, deposit_datum: Dict[str, Any],
+               additional_deposit_data: Sequence[Dict[str, Any]] = (),
+               top_up_deposit_data: Sequence[Sequence[Dict[str, Any]]] = ()) -> None:
+        entry = {
+            'index': index,
+            # Relative to the output folder, which may be moved before the key generation is resumed
+            'keystore': os.path.basename(keystore_filefolder),
+            'deposit_datum': deposit_datum,
+        }
+        if additional_deposit_data:
+            entry['additional_deposit_data'] = list(additional_deposit_data)
+        if top_up_deposit_data:
+            entry['top_up_deposit_data'] = [list(network_deposit_data) for network_deposit_data in top_up_deposit_data]
+        self._offsets.pop(index, None)
+        self._offsets[index] = self._append(entry)
+        self._keystores[index] = keystore_filefolder
+        self._verified.add(index)
+
+    def discard(self, indices: Iterable[int]) -> None:
+        """
+        Mark the keys of `indices` as not completed and remove their keystore files.
+        """
+        indices = [index for index in indices if index in self._offsets]
+        if not indices:
+            return
+        self._append({'discard': indices})
+        for index in indices:
+            del self._offsets[index]
+            self._verified.discard(index)
+            keystore_filefolder = self._keystores.pop(index)
+            if os.path.exists(keystore_filefolder):
+                os.remove(keystore_filefolder)
+
+    def remove_unrecorded_keystores(self, folder: str) -> None:
+        """
+        Remove the keystore files written by this key generation for keys that were not recorded as completed,
+        so that they can be written again.
+        """
+        recorded = {os.path.basename(keystore_filefolder) for keystore_filefolder in self._keystores.values()}
+        suffix = '-%i.json' % self.timestamp
+        for file_name in os.listdir(folder):
+            if file_name.startswith('keystore-') and file_name.endswith(suffix) and file_name not in recorded:
+                os.remove(os.path.join(folder, file_name))
+
+    def deposit_datum(self, index: int, network: int = 0) -> Dict[str, Any]:
+        with open(self.filefolder, 'rb') as f:
+            f.seek(self._offsets[index])
+            return _entry_deposit_datum(json.loads(f.readline()), network)
+
+    def key_deposit_data(self, index: int, network: int = 0) -> list[Dict[str, Any]]:
+        """
+        Return the deposit datum of the key at `index` followed by its top-up deposit data.
+        """
+        with open(self.filefolder, 'rb') as f:
+            f.seek(self._offsets[index])
+            return _entry_deposit_data(json.loads(f.readline()), network)
+
+    def deposit_data(self, network: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Return the deposit data of the completed keys by account index, only reading one at a time.
+        """
+        with open(self.filefolder, 'rb') as f:
+            for index in sorted(self._offsets):
+                f.seek(self._offsets[index])
+                yield _entry_deposit_datum(json.loads(f.readline()), network)
+
+    def top_up_deposit_data(self, network: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Return the top-up deposit data of the completed keys by account index, only reading one key at a time.
+        """
+        with open(self.filefolder, 'rb') as f:
+            for index in sorted(self._offsets):
+                f.seek(self._offsets[index])
+                yield from _entry_deposit_data(json.loads(f.readline()), network)[1:]
+
+    def completed_keys(self, network: int = 0) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+        """
+        Return the account index, keystore file and deposit datum of the completed keys by account index.
+        """
+        keystore_filefolders = self.keystore_filefolders
+        for index, deposit_datum in zip(sorted(keystore_filefolders), self.deposit_data(network)):
+            yield index, keystore_filefolders[index], deposit_datum
+
+    def close(self) -> None:
+        self._file.close()
+
+    def remove(self) -> None:
+        """
+        Remove the journal once the key generation has completed.
+        """
+        self.close()
+        os.remove(self.filefolder)
@@ -0,0 +1,84 @@
+"""
+Hash tree roots of the fixed-layout SSZ containers signed by this CLI, computed directly with SHA256
+instead of going through the generic py-ssz merkleization.
+Ref: https://github.com/ethereum/consensus-specs/blob/dev/ssz/simple-serialize.md#merkleization
+"""
+from hashlib import sha256
+
+ZERO_CHUNK = bytes(32)
+
+
+def _hash(left: bytes, right: bytes) -> bytes:
+    return sha256(left + right).digest()
+
+
+def _check_length(name: str, value: bytes, length: int) -> None:
+    if len(value) != length:
+        raise ValueError(f"`{name}` should be in {length} bytes. Got {len(value)}.")
+
+
+def _uint64_chunk(name: str, value: int) -> bytes:
+    if not 0 <= value < 2**64:
+        raise ValueError(f"`{name}` should be an uint64. Got {value}.")
+    return value.to_bytes(8, 'little') + bytes(24)
+
+
+def _bytes48_root(value: bytes) -> bytes:
+    return _hash(value[:32], value[32:] + bytes(16))
+
+
+def _bytes96_root(value: bytes) -> bytes:
+    return _hash(_hash(value[:32], value[32:64]), _hash(value[64:], ZERO_CHUNK))
+
+
+def deposit_message_root(pubkey: bytes, withdrawal_credentials: bytes, amount: int) -> bytes:
+    """
+    Return the hash tree root of a `DepositMessage`.
+    """
+    _check_length('pubkey', pubkey, 48)
+    _check_length('withdrawal_credentials', withdrawal_credentials, 32)
+    return _hash(
+        _hash(_bytes48_root(pubkey), withdrawal_credentials),
+        _hash(_uint64_chunk('amount', amount), ZERO_CHUNK),
+    )
+
+
+def deposit_data_root(pubkey: bytes, withdrawal_credentials: bytes, amount: int, signature: bytes) -> bytes:
+    """
+    Return the hash tree root of a `DepositData`.
+    """
+    _check_length('pubkey', pubkey, 48)
+    _check_length('withdrawal_credentials', withdrawal_credentials, 32)
+    _check_length('signature', signature, 96)
+    return _hash(
+        _hash(_bytes48_root(pubkey), withdrawal_credentials),
+        _hash(_uint64_chunk('amount', amount), _bytes96_root(signature)),
+    )
+
+
+def signing_data_root(object_root: bytes, domain: bytes) -> bytes:
+    """
+    Return the hash tree root of a `SigningData`.
+    """
+    _check_length('object_root', object_root, 32)
+    _check_length('domain', domain, 32)
+    return _hash(object_root, domain)
+
+
+def voluntary_exit_root(epoch: int, validator_index: int) -> bytes:
+    """
+    Return the hash tree root of a `VoluntaryExit`.
+    """
+    return _hash(_uint64_chunk('epoch', epoch), _uint64_chunk('validator_index', validator_index))
+
+
+def bls_to_execution_change_root(validator_index: int, from_bls_pubkey: bytes, to_execution_address: bytes) -> bytes:
+    """
+    Return the hash tree root of a `BLSToExecutionChange`.
+    """
+    _check_length('from_bls_pubkey', from_bls_pubkey, 48)
+    _check_length('to_execution_address', to_execution_address, 20)
+    return _hash(
+        _hash(_uint64_chunk('validator_index', validator_index), _bytes48_root(from_bls_pubkey)),
+        _hash(to_execution_address + bytes(12), ZERO_CHUNK),
+    )
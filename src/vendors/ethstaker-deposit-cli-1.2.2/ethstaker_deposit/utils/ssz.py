@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Any, cast
+
 from ssz import (
     ByteVector,
     Serializable,
@@ -7,6 +10,14 @@ from ssz import (
     bytes48,
     bytes96
 )
+from ethstaker_deposit.settings import ALL_CHAINS
+from ethstaker_deposit.utils.merkleization import (
+    bls_to_execution_change_root,
+    deposit_data_root,
+    deposit_message_root,
+    signing_data_root,
+    voluntary_exit_root,
+)
 from ethstaker_deposit.utils.constants import (
     DOMAIN_BLS_TO_EXECUTION_CHANGE,
     DOMAIN_BLS_TO_EXECUTION_CHANGE_KEYSTORE,
@@ -47,48 +58,63 @@ def compute_fork_data_root(current_version: bytes, genesis_validators_root: byte
     ).hash_tree_root
 
 
-def compute_deposit_domain(fork_version: bytes) -> bytes:
+@lru_cache(maxsize=None)
+def compute_domain(domain_type: bytes, fork_version: bytes, genesis_validators_root: bytes) -> bytes:
     """
-    Deposit-only `compute_domain`
+    Return the signing domain of `domain_type`, memoized as it only depends on the fork version and
+    the genesis validators root of the chain.
+    https://github.com/ethereum/consensus-specs/blob/dev/specs/phase0/beacon-chain.md#compute_domain
     """
     if len(fork_version) != 4:
         raise ValueError(f"Fork version should be in 4 bytes. Got {len(fork_version)}.")
-    domain_type = DOMAIN_DEPOSIT
-    fork_data_root = compute_deposit_fork_data_root(fork_version)
+    fork_data_root = compute_fork_data_root(fork_version, genesis_validators_root)
     return domain_type + fork_data_root[:28]
 
 
+def compute_deposit_domain(fork_version: bytes) -> bytes:
+    """
+    Deposit-only `compute_domain`
+    """
+    return compute_domain(DOMAIN_DEPOSIT, fork_version, ZERO_BYTES32)  # For deposit, the root is a fixed value
+
+
 def compute_voluntary_exit_domain(fork_version: bytes, genesis_validators_root: bytes) -> bytes:
     """
     VOLUNTARY_EXIT-only `compute_domain`
     """
-    if len(fork_version) != 4:
-        raise ValueError(f"Fork version should be in 4 bytes. Got {len(fork_version)}.")
-    domain_type = DOMAIN_VOLUNTARY_EXIT
-    fork_data_root = compute_fork_data_root(fork_version, genesis_validators_root)
-    return domain_type + fork_data_root[:28]
+    return compute_domain(DOMAIN_VOLUNTARY_EXIT, fork_version, genesis_validators_root)
 
 
 def compute_bls_to_execution_change_domain(fork_version: bytes, genesis_validators_root: bytes) -> bytes:
     """
     BLS_TO_EXECUTION_CHANGE-only `compute_domain`
     """
-    if len(fork_version) != 4:
-        raise ValueError(f"Fork version should be in 4 bytes. Got {len(fork_version)}.")
-    domain_type = DOMAIN_BLS_TO_EXECUTION_CHANGE
-    fork_data_root = compute_fork_data_root(fork_version, genesis_validators_root)
-    return domain_type + fork_data_root[:28]
+    return compute_domain(DOMAIN_BLS_TO_EXECUTION_CHANGE, fork_version, genesis_validators_root)
 
 
 def compute_bls_to_execution_change_keystore_domain(fork_version: bytes, genesis_validators_root: bytes) -> bytes:
     """
     BLS_TO_EXECUTION_CHANGE_KEYSTORE-only `compute_domain`
     """
-    if len(fork_version) != 4:
-        raise ValueError(f"Fork version should be in 4 bytes. Got {len(fork_version)}.")
-    domain_type = DOMAIN_BLS_TO_EXECUTION_CHANGE_KEYSTORE
-    fork_data_root = compute_fork_data_root(fork_version, genesis_validators_root)
-    return domain_type + fork_data_root[:28]
+    return compute_domain(DOMAIN_BLS_TO_EXECUTION_CHANGE_KEYSTORE, fork_version, genesis_validators_root)
+
+
+def _warm_domain_cache() -> None:
+    """
+    Compute the signing domains of every built-in chain, devnet domains are added on first use.
+    """
+    for chain_setting in ALL_CHAINS.values():
+        compute_deposit_domain(chain_setting.GENESIS_FORK_VERSION)
+        if chain_setting.GENESIS_VALIDATORS_ROOT is None:
+            continue
+        compute_voluntary_exit_domain(chain_setting.EXIT_FORK_VERSION, chain_setting.GENESIS_VALIDATORS_ROOT)
+        compute_bls_to_execution_change_domain(chain_setting.GENESIS_FORK_VERSION,
+                                               chain_setting.GENESIS_VALIDATORS_ROOT)
+        compute_bls_to_execution_change_keystore_domain(chain_setting.GENESIS_FORK_VERSION,
+                                                        chain_setting.GENESIS_VALIDATORS_ROOT)
+
+
+_warm_domain_cache()
 
 
 def compute_deposit_fork_data_root(current_version: bytes) -> bytes:
@@ -107,11 +133,27 @@ def compute_signing_root(ssz_object: Serializable, domain: bytes) -> bytes:
     """
     if len(domain) != 32:
         raise ValueError(f"Domain should be in 32 bytes. Got {len(domain)}.")
-    domain_wrapped_object = SigningData(  # type: ignore[no-untyped-call]
-        object_root=ssz_object.hash_tree_root,
-        domain=domain,
-    )
-    return domain_wrapped_object.hash_tree_root
+    return signing_data_root(hash_tree_root(ssz_object), domain)
+
+
+def hash_tree_root(ssz_object: Serializable) -> bytes:
+    """
+    Return the hash tree root of `ssz_object`, computed by `merkleization` for the fixed-layout containers
+    this CLI signs and by py-ssz for any other object.
+    """
+    fields = cast(Any, ssz_object)
+    if isinstance(ssz_object, DepositMessage):
+        return deposit_message_root(fields.pubkey, fields.withdrawal_credentials, fields.amount)
+    if isinstance(ssz_object, DepositData):
+        return deposit_data_root(fields.pubkey, fields.withdrawal_credentials, fields.amount, fields.signature)
+    if isinstance(ssz_object, SigningData):
+        return signing_data_root(fields.object_root, fields.domain)
+    if isinstance(ssz_object, VoluntaryExit):
+        return voluntary_exit_root(fields.epoch, fields.validator_index)
+    if isinstance(ssz_object, BLSToExecutionChange):
+        return bls_to_execution_change_root(
+            fields.validator_index, fields.from_bls_pubkey, fields.to_execution_address)
+    return ssz_object.hash_tree_root
 
 
 class DepositMessage(Serializable):
@@ -1,13 +1,14 @@
+from collections import deque
 from decimal import Decimal, InvalidOperation
-import click
+from itertools import islice, zip_longest
 import json
+import math
+import os
 import re
 import sys
 import concurrent.futures
-from typing import Any, Dict, Sequence, Optional
-
-from click.types import BoolParamType
-from click.exceptions import BadParameter
+from secrets import randbelow
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Sequence, Optional, Tuple
 
 from eth_typing import (
     BLSPubkey,
@@ -15,7 +16,12 @@ from eth_typing import (
     HexAddress,
 )
 from eth_utils import is_hex_address, is_checksum_address, to_normalized_address, decode_hex
+from eth_utils import ValidationError as EthUtilsValidationError
 from py_ecc.bls import G2ProofOfPossession as bls
+from py_ecc.bls.g2_primitives import pubkey_to_G1, signature_to_G2, subgroup_check
+from py_ecc.bls.hash_to_curve import hash_to_G2
+from py_ecc.fields import optimized_bls12_381_FQ12 as FQ12
+from py_ecc.optimized_bls12_381 import G1, Z2, add, final_exponentiate, multiply, neg, pairing
 
 from ethstaker_deposit.exceptions import ValidationError
 from ethstaker_deposit.key_handling.keystore import Keystore
@@ -33,9 +39,7 @@ from ethstaker_deposit.utils.ssz import (
     compute_deposit_domain,
     compute_signing_root,
     compute_voluntary_exit_domain,
-)
-from ethstaker_deposit.credentials import (
-    Credential,
+    hash_tree_root,
 )
 from ethstaker_deposit.utils.constants import (
     BLS_WITHDRAWAL_PREFIX,
@@ -45,7 +49,21 @@ from ethstaker_deposit.utils.constants import (
     MAX_DEPOSIT_AMOUNT,
 )
 from ethstaker_deposit.utils.crypto import SHA256
-from ethstaker_deposit.settings import BaseChainSetting, get_chain_setting, get_devnet_chain_setting
+from ethstaker_deposit.utils.deposit import (
+    DepositDataShard,
+    iter_deposit_data_json,
+    parse_shard,
+    shard_deposit_datum,
+)
+from ethstaker_deposit.settings import ALL_CHAIN_KEYS, BaseChainSetting, get_chain_setting, get_devnet_chain_setting
+
+# The credentials are only imported for type checking, so that the credentials module can import this one, and
+# click only by the functions that use it. py_ecc, eth_utils and ssz stay eager, as the settings, ssz and keystore
+# modules needed by the signatures and the validators here import them anyway.
+if TYPE_CHECKING:
+    import click
+
+    from ethstaker_deposit.credentials import Credential
 
 
 #
@@ -53,35 +71,94 @@ from ethstaker_deposit.settings import BaseChainSetting, get_chain_setting, get_
 #
 
 
-def verify_deposit_data_json(filefolder: str, credentials: Sequence[Credential],
+# Upper bound on the number of deposits batch verified by a single worker task
+DEPOSIT_VERIFICATION_BATCH_SIZE = 128
+
+
+def verify_deposit_data_json(filefolder: str, credentials: Sequence['Credential'],
                              chain_setting: BaseChainSetting) -> bool:
     """
     Validate every deposit found in the deposit-data JSON file folder.
+    The deposits are verified in batches as they are parsed, so only the batches being verified are held in memory.
     """
+    import click
+
     all_valid_deposits = True
-    deposit_json = []
-    with open(filefolder, 'r', encoding='utf-8') as f:
-        deposit_json = json.load(f)
 
-    with click.progressbar(length=len(deposit_json),  # type: ignore[var-annotated]
+    # As before batching, only the deposits that have a matching credential are validated
+    num_deposits = len(credentials)
+    batch_size = max(1, min(DEPOSIT_VERIFICATION_BATCH_SIZE, math.ceil(num_deposits / (os.cpu_count() or 1))))
+    max_pending_batches = 2 * (os.cpu_count() or 1)
+
+    with click.progressbar(length=num_deposits,  # type: ignore[var-annotated]
                            label=load_text(['msg_deposit_verification']),
                            show_percent=False, show_pos=True) as bar:
 
         with concurrent.futures.ProcessPoolExecutor() as executor:
-            chain_settings = [chain_setting] * len(deposit_json)
-            for valid_deposit in executor.map(validate_deposit, deposit_json, chain_settings, credentials):
-                all_valid_deposits &= valid_deposit
-                bar.update(1)
+            pending: deque[concurrent.futures.Future[list[bool]]] = deque()
+            deposits = zip(iter_deposit_data_json(filefolder), credentials)
+            while True:
+                batch = list(islice(deposits, batch_size))
+                if batch:
+                    deposit_batch, credential_batch = zip(*batch)
+                    pending.append(executor.submit(validate_deposits, deposit_batch, chain_setting, credential_batch))
+                if pending and (not batch or len(pending) >= max_pending_batches):
+                    valid_deposits = pending.popleft().result()
+                    all_valid_deposits &= all(valid_deposits)
+                    bar.update(len(valid_deposits))
+                elif not batch:
+                    break
 
     return all_valid_deposits
 
 
+def verify_deposit_data_json_matching(filefolder: str, deposit_data: Iterable[Dict[str, Any]],
+                                      shard: Optional[DepositDataShard] = None) -> bool:
+    """
+    Check that the deposit-data JSON file, of `shard` if any, holds exactly `deposit_data`, in order, as they are
+    encoded in the file. The deposits were already validated, so reading the file back is enough to verify it
+    without deriving any key.
+    """
+    encoded_deposit_data = (json.loads(json.dumps(shard_deposit_datum(deposit_datum, shard),
+                                                  default=lambda x: x.hex()))
+                            for deposit_datum in deposit_data)
+    sentinel = object()
+    return all(file_datum == deposit_datum for file_datum, deposit_datum in zip_longest(
+        iter_deposit_data_json(filefolder), encoded_deposit_data, fillvalue=sentinel))
+
+
 def validate_deposit(deposit_data_dict: Dict[str, Any], chain_setting: BaseChainSetting,
-                     credential: Credential = None) -> bool:
+                     credential: 'Credential' = None) -> bool:
     '''
     Checks whether a deposit is valid based on the staking deposit rules.
     https://github.com/ethereum/consensus-specs/blob/dev/specs/phase0/beacon-chain.md#deposits
     '''
+    signature_set = _deposit_signature_set(deposit_data_dict, chain_setting, credential)
+    return signature_set is not None and bls.Verify(*signature_set)
+
+
+def validate_deposits(deposit_data_dicts: Sequence[Dict[str, Any]], chain_setting: BaseChainSetting,
+                      credentials: Optional[Sequence['Credential']] = None) -> list[bool]:
+    '''
+    Checks whether each deposit is valid like `validate_deposit` does, verifying all the deposit signatures
+    as a single batch.
+    '''
+    if credentials is None:
+        credentials = [None] * len(deposit_data_dicts)
+    signature_sets = [
+        _deposit_signature_set(deposit_data_dict, chain_setting, credential)
+        for deposit_data_dict, credential in zip(deposit_data_dicts, credentials)
+    ]
+    valid_signatures = iter(batch_verify_signatures([s for s in signature_sets if s is not None]))
+    return [signature_set is not None and next(valid_signatures) for signature_set in signature_sets]
+
+
+def _deposit_signature_set(deposit_data_dict: Dict[str, Any], chain_setting: BaseChainSetting,
+                           credential: 'Credential' = None) -> Optional[Tuple[BLSPubkey, bytes, BLSSignature]]:
+    '''
+    Runs every deposit check except for the signature verification, returning the pubkey, signing root and
+    signature that remain to be verified or None if the deposit is invalid.
+    '''
     pubkey = BLSPubkey(bytes.fromhex(deposit_data_dict['pubkey']))
     withdrawal_credentials = bytes.fromhex(deposit_data_dict['withdrawal_credentials'])
     amount = deposit_data_dict['amount']
@@ -91,38 +168,38 @@ def validate_deposit(deposit_data_dict: Dict[str, Any], chain_setting: BaseChain
 
     # Verify pubkey
     if len(pubkey) != 48:
-        return False
+        return None
     if credential and pubkey != credential.signing_pk:
-        return False
+        return None
 
     # Verify withdrawal credential
     if len(withdrawal_credentials) != 32:
-        return False
+        return None
     if withdrawal_credentials[:1] == BLS_WITHDRAWAL_PREFIX:
         if credential and withdrawal_credentials[:1] != credential.withdrawal_prefix:
-            return False
+            return None
         if withdrawal_credentials[1:] != SHA256(credential.withdrawal_pk)[1:]:
-            return False
+            return None
     elif (
         withdrawal_credentials[:1] == EXECUTION_ADDRESS_WITHDRAWAL_PREFIX
         or withdrawal_credentials[:1] == COMPOUNDING_WITHDRAWAL_PREFIX
     ):
         if credential and withdrawal_credentials[:1] != credential.withdrawal_prefix:
-            return False
+            return None
         if withdrawal_credentials[1:12] != b'\x00' * 11:
-            return False
+            return None
         if credential and credential.withdrawal_address is None:
-            return False
+            return None
         if credential and withdrawal_credentials[12:] != credential.withdrawal_address:
-            return False
+            return None
     else:
-        return False
+        return None
 
     # Verify deposit amount
     # on deposit message, the amount should be multiplied by the multiplier
     min_amount = chain_setting.MIN_DEPOSIT_AMOUNT * chain_setting.MULTIPLIER * ETH2GWEI
     if not min_amount <= amount <= MAX_DEPOSIT_AMOUNT:
-        return False
+        return None
 
     # Verify deposit signature && pubkey
     deposit_message = DepositMessage(  # type: ignore[no-untyped-call]
@@ -133,8 +210,6 @@ def validate_deposit(deposit_data_dict: Dict[str, Any], chain_setting: BaseChain
 
     domain = compute_deposit_domain(fork_version)
     signing_root = compute_signing_root(deposit_message, domain)
-    if not bls.Verify(pubkey, signing_root, signature):
-        return False
 
     # Verify Deposit Root
     signed_deposit = DepositData(  # type: ignore[no-untyped-call]
@@ -143,7 +218,70 @@ def validate_deposit(deposit_data_dict: Dict[str, Any], chain_setting: BaseChain
         amount=amount,
         signature=signature,
     )
-    return signed_deposit.hash_tree_root == deposit_message_root
+    if hash_tree_root(signed_deposit) != deposit_message_root:
+        return None
+    return pubkey, signing_root, signature
+
+
+#
+# BLS signatures
+#
+
+# Bit length of the random weights given to each signature of a batch
+BATCH_VERIFICATION_WEIGHT_BITS = 64
+
+_SignaturePoints = Tuple[Any, Any, Any]
+
+
+def _signature_points(pubkey: BLSPubkey, message: bytes, signature: BLSSignature) -> Optional[_SignaturePoints]:
+    """
+    Decode and subgroup check the pubkey and signature and hash the message to G2, as `bls.Verify` does.
+    """
+    if len(pubkey) != 48 or len(signature) != 96 or not bls.KeyValidate(pubkey):
+        return None
+    try:
+        signature_point = signature_to_G2(signature)
+    except (EthUtilsValidationError, ValueError, AssertionError):
+        return None
+    if not subgroup_check(signature_point):
+        return None
+    message_point = hash_to_G2(message, bls.DST, bls.xmd_hash_function)  # type: ignore[arg-type]
+    return pubkey_to_G1(pubkey), message_point, signature_point
+
+
+def _verify_signature_points(signature_points: Sequence[_SignaturePoints]) -> bool:
+    """
+    Check e(G1, sum(r_i * S_i)) == prod(e(r_i * PK_i, H(m_i))) with random non-zero weights `r_i`, which only
+    holds for a batch of valid signatures except with negligible probability, using a single final exponentiation.
+    """
+    aggregate_signature = Z2
+    miller_loops = FQ12.one()
+    for pubkey_point, message_point, signature_point in signature_points:
+        weight = randbelow(2**BATCH_VERIFICATION_WEIGHT_BITS - 1) + 1
+        aggregate_signature = add(aggregate_signature, multiply(signature_point, weight))
+        miller_loops *= pairing(message_point, multiply(pubkey_point, weight), final_exponentiate=False)
+    miller_loops *= pairing(aggregate_signature, neg(G1), final_exponentiate=False)
+    return final_exponentiate(miller_loops) == FQ12.one()
+
+
+def _bisect_signature_points(signature_points: Sequence[_SignaturePoints]) -> list[bool]:
+    if _verify_signature_points(signature_points):
+        return [True] * len(signature_points)
+    if len(signature_points) == 1:
+        return [False]
+    middle = len(signature_points) // 2
+    return _bisect_signature_points(signature_points[:middle]) + _bisect_signature_points(signature_points[middle:])
+
+
+def batch_verify_signatures(signature_sets: Sequence[Tuple[BLSPubkey, bytes, BLSSignature]]) -> list[bool]:
+    """
+    Verify the (pubkey, message, signature) sets with one multi-pairing, returning whether each of them is valid.
+    When the batch fails it is split in halves until the invalid signatures are found.
+    """
+    signature_points = [_signature_points(*signature_set) for signature_set in signature_sets]
+    decoded_points = [points for points in signature_points if points is not None]
+    valid_points = iter(_bisect_signature_points(decoded_points) if decoded_points else [])
+    return [points is not None and next(valid_points) for points in signature_points]
 
 
 def validate_password_strength(password: str) -> str:
@@ -175,7 +313,9 @@ def validate_int_range(num: Any, low: int, high: int) -> int:
         raise ValidationError(load_text(['err_not_positive_integer']))
 
 
-def validate_withdrawal_address(cts: click.Context, param: Any, address: str, require: bool = False) -> HexAddress:
+def validate_withdrawal_address(cts: 'click.Context', param: Any, address: str, require: bool = False) -> HexAddress:
+    import click
+
     if address in ("", None):
         if require:
             raise ValidationError(load_text(['err_missing_address']))
@@ -190,11 +330,14 @@ def validate_withdrawal_address(cts: click.Context, param: Any, address: str, re
     return normalized_address
 
 
-def validate_yesno(ctx: click.Context, param: Any, value: str) -> bool:
+def validate_yesno(ctx: 'click.Context', param: Any, value: str) -> bool:
     '''
     Verifies that a value is part of the bool values accepted by click. The string values “1”, “true”,
     “t”, “yes”, “y”, and “on” convert to True. “0”, “false”, “f”, “no”, “n”, and “off” convert to False.
     '''
+    from click.exceptions import BadParameter
+    from click.types import BoolParamType
+
     try:
         param = BoolParamType()
         return param.convert(value, param, ctx)
@@ -246,7 +389,7 @@ def _bls_to_execution_change_validator(kwargs: Dict[str, Any]) -> bool:
 
 
 def verify_bls_to_execution_change_json(filefolder: str,
-                                        credentials: Sequence[Credential],
+                                        credentials: Sequence['Credential'],
                                         *,
                                         input_validator_indices: Sequence[int],
                                         input_withdrawal_address: str,
@@ -254,6 +397,8 @@ def verify_bls_to_execution_change_json(filefolder: str,
     """
     Validate every BLSToExecutionChange found in the bls_to_execution_change JSON file folder.
     """
+    import click
+
     btec_json = []
     with open(filefolder, 'r', encoding='utf-8') as f:
         btec_json = json.load(f)
@@ -280,7 +425,7 @@ def verify_bls_to_execution_change_json(filefolder: str,
 
 
 def validate_bls_to_execution_change(btec_dict: Dict[str, Any],
-                                     credential: Credential,
+                                     credential: 'Credential',
                                      *,
                                      input_validator_index: int,
                                      input_withdrawal_address: str,
@@ -376,7 +521,7 @@ def validate_validator_indices(input_validator_indices: str) -> Sequence[int]:
     return [validate_int_range(index, 0, 2**32) for index in normalized_list]
 
 
-def validate_bls_withdrawal_credentials_matching(bls_withdrawal_credentials: bytes, credential: Credential) -> None:
+def validate_bls_withdrawal_credentials_matching(bls_withdrawal_credentials: bytes, credential: 'Credential') -> None:
     if bls_withdrawal_credentials[1:] != SHA256(credential.withdrawal_pk)[1:]:
         raise ValidationError(load_text(['err_not_matching']) + '\n')
 
@@ -426,6 +571,32 @@ def validate_signed_exit(validator_index: str,
     return bls.Verify(bls_pubkey, signing_root, bls_signature)
 
 
+def verify_signed_exits_json(file_folder: str, pubkeys: Sequence[str], chain_setting: BaseChainSetting) -> list[bool]:
+    """
+    Verify the signed exits of a JSON array, each against the pubkey at the same position, in a single batch.
+    """
+    with open(file_folder, 'r', encoding='utf-8') as f:
+        signed_exits = json.load(f)
+    if len(signed_exits) != len(pubkeys):
+        return [False] * len(pubkeys)
+    domain = compute_voluntary_exit_domain(
+        fork_version=chain_setting.EXIT_FORK_VERSION,
+        genesis_validators_root=chain_setting.GENESIS_VALIDATORS_ROOT
+    )
+    signature_sets = []
+    for signed_exit, pubkey in zip(signed_exits, pubkeys):
+        message = VoluntaryExit(  # type: ignore[no-untyped-call]
+            epoch=int(signed_exit['message']['epoch']),
+            validator_index=int(signed_exit['message']['validator_index'])
+        )
+        signature_sets.append((
+            BLSPubkey(bytes.fromhex(pubkey)),
+            compute_signing_root(message, domain),
+            BLSSignature(decode_hex(signed_exit['signature'])),
+        ))
+    return batch_verify_signatures(signature_sets)
+
+
 #
 # BLS to Execution Change Keystore Validation
 #
@@ -466,11 +637,26 @@ def validate_bls_to_execution_change_keystore(validator_index: str,
     return bls.Verify(bls_pubkey, signing_root, bls_signature)
 
 
+#
+# Shard Validation
+#
+
+def validate_shard(ctx: 'click.Context', param: Any, value: Optional[str]) -> Optional[Tuple[int, int]]:
+    if value is None:
+        return None
+    try:
+        return parse_shard(value)
+    except ValueError:
+        raise ValidationError(load_text(['err_invalid_shard']) + '\n')
+
+
 #
 # Devnet Chain Setting Validation
 #
 
-def validate_devnet_chain_setting(ctx: click.Context, param: Any, value: Optional[str]) -> Optional[BaseChainSetting]:
+def validate_devnet_chain_setting(ctx: 'click.Context', param: Any, value: Optional[str]) -> Optional[BaseChainSetting]:
+    import click
+
     if value is None:
         return None
 
@@ -495,6 +681,35 @@ def validate_devnet_chain_setting(ctx: click.Context, param: Any, value: Optiona
         raise ValidationError(load_text(['err_invalid_devnet_chain_setting']) + '\n')
 
 
+def validate_additional_chains(ctx: 'click.Context', param: Any, value: Sequence[str]) -> list[BaseChainSetting]:
+    """
+    Return the chain settings of the additional chains, each given by name or as devnet chain setting JSON.
+    """
+    chain_settings = []
+    for chain in value:
+        if chain.lstrip().startswith('{'):
+            chain_setting = validate_devnet_chain_setting(ctx, param, chain)
+            assert chain_setting is not None
+            # The deposit data of an additional chain is saved in a folder named after its network
+            network_name = chain_setting.NETWORK_NAME
+            if network_name in ('', '.', '..') or any(separator in network_name for separator in ('/', '\\')):
+                raise ValidationError(load_text(['err_invalid_additional_chain_network_name']).format(
+                    network_name=network_name) + '\n')
+        elif chain in ALL_CHAIN_KEYS:
+            chain_setting = get_chain_setting(chain)
+        else:
+            raise ValidationError(load_text(['err_invalid_additional_chain']).format(chain=chain) + '\n')
+        chain_settings.append(chain_setting)
+    return chain_settings
+
+
+def validate_top_up_amounts(ctx: 'click.Context', param: Any, value: Sequence[str]) -> list[int]:
+    """
+    Return the top-up deposit amounts in gwei, each given in ether like the deposit amount.
+    """
+    return [validate_deposit_amount(amount, params=ctx.params) for amount in value]
+
+
 def validate_devnet_chain_setting_json(json_value: str) -> bool:
     try:
         devnet_chain_setting_dict = json.loads(json_value)
@@ -1,21 +1,31 @@
 import asyncio
 import json
 import os
+from typing import Any, Iterator
 
 import pytest
 from click.testing import CliRunner
 
 from eth_utils import decode_hex
 
+from ethstaker_deposit import credentials as credentials_module
+from ethstaker_deposit.cli import generate_keys as generate_keys_module
+from ethstaker_deposit.credentials import generate_keys_pipeline
 from ethstaker_deposit.deposit import cli
+from ethstaker_deposit.exceptions import ValidationError
+from ethstaker_deposit.settings import HoodiSetting, get_devnet_chain_setting
+from ethstaker_deposit.utils.intl import load_text
+from ethstaker_deposit.utils.inventory import ValidatorInventory
 from ethstaker_deposit.utils.constants import (
     DEFAULT_VALIDATOR_KEYS_FOLDER_NAME,
     EXECUTION_ADDRESS_WITHDRAWAL_PREFIX,
     COMPOUNDING_WITHDRAWAL_PREFIX,
     ETH2GWEI,
     DEFAULT_ACTIVATION_AMOUNT,
+    KEY_GENERATION_JOURNAL_FILE_NAME,
 )
-from .helpers import clean_key_folder, get_permissions, get_uuid
+from ethstaker_deposit.utils.validation import validate_deposit
+from .helpers import clean_folder, clean_key_folder, get_permissions, get_uuid
 
 
 def test_existing_mnemonic_bls_withdrawal() -> None:
@@ -287,6 +297,59 @@ def test_existing_mnemonic_compounding_cli_args() -> None:
     clean_key_folder(my_folder_path)
 
 
+def test_existing_mnemonic_compounding_top_ups() -> None:
+    # Prepare folder
+    my_folder_path = os.path.join(os.getcwd(), 'TESTING_TEMP_FOLDER')
+    clean_key_folder(my_folder_path)
+    if not os.path.exists(my_folder_path):
+        os.mkdir(my_folder_path)
+
+    runner = CliRunner()
+    arguments = [
+        '--language', 'english',
+        '--non_interactive',
+        'existing-mnemonic',
+        '--mnemonic', 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        '--validator_start_index', '0',
+        '--num_validators', '2',
+        '--folder', my_folder_path,
+        '--chain', 'mainnet',
+        '--keystore_password', 'MyPasswordIs',
+        '--withdrawal_address', '0x00000000219ab540356cBB839Cbe05303d7705Fa',
+        '--amount', '32',
+        '--top_up_amount', '1',
+        '--top_up_amount', '2.5',
+        '--pbkdf2',
+    ]
+    result = runner.invoke(cli, arguments + ['--compounding'])
+    assert result.exit_code == 0
+
+    validator_keys_folder_path = os.path.join(my_folder_path, DEFAULT_VALIDATOR_KEYS_FOLDER_NAME)
+    _, _, key_files = next(os.walk(validator_keys_folder_path))
+    [deposit_file] = [key_file for key_file in key_files if key_file.startswith('deposit_data')]
+    with open(validator_keys_folder_path + '/' + deposit_file, 'r', encoding='utf-8') as f:
+        deposits_dict = json.load(f)
+    [top_up_deposit_file] = [key_file for key_file in key_files if key_file.startswith('top_up_deposit_data')]
+    with open(validator_keys_folder_path + '/' + top_up_deposit_file, 'r', encoding='utf-8') as f:
+        top_up_deposits_dict = json.load(f)
+    # The deposit data file has one deposit for every key, their top-up deposits are in their own file
+    assert [deposit['amount'] for deposit in deposits_dict] == [32 * ETH2GWEI] * 2
+    assert [deposit['amount'] for deposit in top_up_deposits_dict] == [ETH2GWEI, 2.5 * ETH2GWEI] * 2
+    assert [deposit['pubkey'] for deposit in top_up_deposits_dict] == [
+        deposit['pubkey'] for deposit in deposits_dict for _ in range(2)]
+    assert deposits_dict[0]['pubkey'] != deposits_dict[1]['pubkey']
+    clean_key_folder(my_folder_path)
+
+    # Only compounding validators can be topped up
+    os.mkdir(my_folder_path)
+    result = runner.invoke(cli, arguments + ['--regular-withdrawal'])
+    assert result.exit_code == 1
+    generate_keys_json_file = os.path.join(os.getcwd(), 'ethstaker_deposit/cli/', 'generate_keys.json')
+    assert str(result.exception) == load_text(['err_top_up_amount_compounding'], generate_keys_json_file,
+                                              'generate_keys')
+    clean_key_folder(my_folder_path)
+
+
 def test_existing_mnemonic_withdrawal_address_bad_checksum() -> None:
     # Prepare folder
     my_folder_path = os.path.join(os.getcwd(), 'TESTING_TEMP_FOLDER')
@@ -424,6 +487,233 @@ def test_pbkdf2_new_mnemonic() -> None:
     clean_key_folder(scrypt_folder_path)
 
 
+def test_existing_mnemonic_resume(monkeypatch) -> None:
+    # Prepare folder
+    my_folder_path = os.path.join(os.getcwd(), 'TESTING_TEMP_FOLDER')
+    clean_key_folder(my_folder_path)
+    if not os.path.exists(my_folder_path):
+        os.mkdir(my_folder_path)
+
+    def interrupted_pipeline(**kwargs: Any) -> Iterator[Any]:
+        # Stop the key generation after the first key
+        yield next(generate_keys_pipeline(**kwargs))
+        raise KeyboardInterrupt
+
+    runner = CliRunner()
+    arguments = [
+        '--language', 'english',
+        '--non_interactive',
+        'existing-mnemonic',
+        '--mnemonic', 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        '--validator_start_index', '1',
+        '--num_validators', '3',
+        '--folder', my_folder_path,
+        '--chain', 'mainnet',
+        '--keystore_password', 'MyPasswordIs',
+        '--withdrawal_address', '',
+        '--pbkdf2',
+    ]
+    monkeypatch.setattr(generate_keys_module, 'generate_keys_pipeline', interrupted_pipeline)
+    result = runner.invoke(cli, arguments)
+    assert result.exit_code != 0
+
+    validator_keys_folder_path = os.path.join(my_folder_path, DEFAULT_VALIDATOR_KEYS_FOLDER_NAME)
+    _, _, key_files = next(os.walk(validator_keys_folder_path))
+    assert KEY_GENERATION_JOURNAL_FILE_NAME in key_files
+    assert not [key_file for key_file in key_files if key_file.startswith('deposit_data')]
+
+    monkeypatch.undo()
+    inventory_path = os.path.join(my_folder_path, 'inventory.sqlite')
+    result = runner.invoke(cli, arguments + ['--resume', '--inventory', inventory_path])
+    assert result.exit_code == 0
+
+    _, _, key_files = next(os.walk(validator_keys_folder_path))
+    assert KEY_GENERATION_JOURNAL_FILE_NAME not in key_files
+    deposit_files = [key_file for key_file in key_files if key_file.startswith('deposit_data')]
+    keystore_files = [key_file for key_file in key_files if key_file.startswith('keystore')]
+    assert len(deposit_files) == 1
+    assert len(keystore_files) == 3
+    with open(validator_keys_folder_path + '/' + deposit_files[0], 'r', encoding='utf-8') as f:
+        deposits_dict = json.load(f)
+    keystore_pubkeys = []
+    for key_file in sorted(keystore_files):
+        with open(validator_keys_folder_path + '/' + key_file, 'r', encoding='utf-8') as f:
+            keystore_pubkeys.append(json.load(f)['pubkey'])
+    assert [deposit['pubkey'] for deposit in deposits_dict] == keystore_pubkeys
+
+    # The keys generated before the interruption are in the inventory too
+    with ValidatorInventory(inventory_path, create=False) as inventory:
+        for index, deposit in enumerate(deposits_dict, start=1):
+            [entry] = inventory.get_by_account_index(index, 'mainnet')
+            assert entry.pubkey.hex() == deposit['pubkey']
+            assert entry.deposit_data_root.hex() == deposit['deposit_data_root']
+            assert entry.keystore is not None and os.path.exists(entry.keystore)
+    os.remove(inventory_path)
+
+    # Clean up
+    clean_key_folder(my_folder_path)
+
+
+def test_existing_mnemonic_resume_verifies_deposit_data(monkeypatch) -> None:
+    # Prepare folder
+    my_folder_path = os.path.join(os.getcwd(), 'TESTING_TEMP_FOLDER')
+    clean_key_folder(my_folder_path)
+    if not os.path.exists(my_folder_path):
+        os.mkdir(my_folder_path)
+
+    def interrupted_pipeline(**kwargs: Any) -> Iterator[Any]:
+        # Stop the key generation after the first two keys
+        pipeline = generate_keys_pipeline(**kwargs)
+        yield next(pipeline)
+        yield next(pipeline)
+        # Wait for the keystores being saved, which the resumed key generation removes
+        pipeline.close()
+        raise KeyboardInterrupt
+
+    runner = CliRunner()
+    arguments = [
+        '--language', 'english',
+        '--non_interactive',
+        'existing-mnemonic',
+        '--mnemonic', 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        '--validator_start_index', '1',
+        '--num_validators', '3',
+        '--folder', my_folder_path,
+        '--chain', 'mainnet',
+        '--keystore_password', 'MyPasswordIs',
+        '--withdrawal_address', '',
+        '--pbkdf2',
+    ]
+    monkeypatch.setattr(generate_keys_module, 'generate_keys_pipeline', interrupted_pipeline)
+    result = runner.invoke(cli, arguments)
+    assert result.exit_code != 0
+    monkeypatch.undo()
+
+    # Corrupt the deposit of the first key, which is not in the journal tail verified when resuming
+    validator_keys_folder_path = os.path.join(my_folder_path, DEFAULT_VALIDATOR_KEYS_FOLDER_NAME)
+    journal_path = os.path.join(validator_keys_folder_path, KEY_GENERATION_JOURNAL_FILE_NAME)
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    lines[1]['deposit_datum']['signature'] = lines[2]['deposit_datum']['signature']
+    with open(journal_path, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(line) + '\n' for line in lines)
+
+    monkeypatch.setattr(credentials_module, 'RESUME_VERIFICATION_TAIL', 1)
+    result = runner.invoke(cli, arguments + ['--resume'])
+    assert isinstance(result.exception, ValidationError)
+    generate_keys_json_file = os.path.join(os.getcwd(), 'ethstaker_deposit/cli/', 'generate_keys.json')
+    assert str(result.exception) == load_text(['err_verify_deposit'], generate_keys_json_file, 'generate_keys')
+
+    # Clean up
+    clean_key_folder(my_folder_path)
+
+
+def test_existing_mnemonic_additional_chain() -> None:
+    # Prepare folder
+    my_folder_path = os.path.join(os.getcwd(), 'TESTING_TEMP_FOLDER')
+    clean_key_folder(my_folder_path)
+    if not os.path.exists(my_folder_path):
+        os.mkdir(my_folder_path)
+
+    devnet_chain = {
+        "network_name": "hoodicopy",
+        "genesis_fork_version": "10000999",
+        "exit_fork_version": "40000910",
+    }
+
+    runner = CliRunner()
+    arguments = [
+        '--language', 'english',
+        '--non_interactive',
+        'existing-mnemonic',
+        '--mnemonic', 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        '--validator_start_index', '1',
+        '--num_validators', '2',
+        '--folder', my_folder_path,
+        '--chain', 'mainnet',
+        '--keystore_password', 'MyPasswordIs',
+        '--withdrawal_address', '0x00000000219ab540356cBB839Cbe05303d7705Fa',
+        '--additional_chain', 'hoodi',
+        '--additional_chain', json.dumps(devnet_chain),
+        '--pbkdf2',
+    ]
+    result = runner.invoke(cli, arguments)
+    assert result.exit_code == 0
+
+    # The keystores are only saved once
+    validator_keys_folder_path = os.path.join(my_folder_path, DEFAULT_VALIDATOR_KEYS_FOLDER_NAME)
+    key_files = os.listdir(validator_keys_folder_path)
+    assert len([key_file for key_file in key_files if key_file.startswith('keystore')]) == 2
+
+    # Every network has its own deposit data file, for the same keys
+    pubkeys = None
+    chain_settings = {
+        '': None,
+        'hoodi': HoodiSetting,
+        'hoodicopy': get_devnet_chain_setting(**devnet_chain, genesis_validator_root=None),
+    }
+    for network_folder, chain_setting in chain_settings.items():
+        folder_path = os.path.join(validator_keys_folder_path, network_folder)
+        deposit_files = [key_file for key_file in os.listdir(folder_path) if key_file.startswith('deposit_data')]
+        assert len(deposit_files) == 1
+        with open(os.path.join(folder_path, deposit_files[0]), 'r', encoding='utf-8') as f:
+            deposits_dict = json.load(f)
+        if pubkeys is None:
+            pubkeys = [deposit['pubkey'] for deposit in deposits_dict]
+            continue
+        assert [deposit['pubkey'] for deposit in deposits_dict] == pubkeys
+        for deposit in deposits_dict:
+            assert deposit['network_name'] == network_folder
+            assert validate_deposit(deposit, chain_setting)
+        clean_folder(my_folder_path, folder_path, ignore_primary=True)
+
+    # Clean up
+    clean_key_folder(my_folder_path)
+
+
+@pytest.mark.parametrize('network_name', ['..', '../hoodicopy', 'hoodi/copy', 'hoodi\\copy', ''])
+def test_existing_mnemonic_additional_chain_network_name(network_name: str) -> None:
+    # Prepare folder
+    my_folder_path = os.path.join(os.getcwd(), 'TESTING_TEMP_FOLDER')
+    clean_key_folder(my_folder_path)
+    if not os.path.exists(my_folder_path):
+        os.mkdir(my_folder_path)
+
+    devnet_chain = {
+        "network_name": network_name,
+        "genesis_fork_version": "10000999",
+        "exit_fork_version": "40000910",
+    }
+
+    runner = CliRunner()
+    arguments = [
+        '--language', 'english',
+        '--non_interactive',
+        'existing-mnemonic',
+        '--mnemonic', 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        '--validator_start_index', '1',
+        '--num_validators', '1',
+        '--folder', my_folder_path,
+        '--chain', 'mainnet',
+        '--keystore_password', 'MyPasswordIs',
+        '--withdrawal_address', '0x00000000219ab540356cBB839Cbe05303d7705Fa',
+        '--additional_chain', json.dumps(devnet_chain),
+        '--pbkdf2',
+    ]
+    result = runner.invoke(cli, arguments)
+    assert result.exit_code == 1
+
+    # Rejected before any key is generated
+    validation_json_file = os.path.join(os.getcwd(), 'ethstaker_deposit/utils/', 'validation.json')
+    assert str(result.exception) == load_text(
+        ['err_invalid_additional_chain_network_name'], validation_json_file, 'validate_additional_chains'
+    ).format(network_name=network_name) + '\n'
+    assert not os.path.exists(os.path.join(my_folder_path, DEFAULT_VALIDATOR_KEYS_FOLDER_NAME))
+
+    # Clean up
+    clean_key_folder(my_folder_path)
+
+
 @pytest.mark.asyncio
 async def test_script() -> None:
     my_folder_path = os.path.join(os.getcwd(), 'TESTING_TEMP_FOLDER')
@@ -0,0 +1,151 @@
+import glob
+import json
+import os
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from ethstaker_deposit.credentials import Credential
+from ethstaker_deposit.deposit import cli
+from ethstaker_deposit.settings import get_chain_setting
+from ethstaker_deposit.utils.constants import DEFAULT_EXIT_TRANSACTION_FOLDER_NAME
+from ethstaker_deposit.utils.intl import load_text
+from ethstaker_deposit.utils.validation import validate_signed_exit
+from tests.test_cli.helpers import (
+    clean_folder,
+    read_json_file,
+    verify_file_permission,
+)
+
+
+def _prepare_keystores(my_folder_path: str, keystore_password: str, num_keys: int) -> tuple[str, list[str]]:
+    keystores_folder_path = os.path.join(my_folder_path, 'keystores')
+    os.makedirs(keystores_folder_path)
+    pubkeys = []
+    for index in range(num_keys):
+        credential = Credential(
+            mnemonic='aban aban aban aban aban aban aban aban aban aban aban abou',
+            mnemonic_password='',
+            index=index,
+            amount=0,
+            chain_setting=get_chain_setting('mainnet'),
+            hex_withdrawal_address=None,
+            compounding=False,
+            use_pbkdf2=True,
+        )
+        credential.save_signing_keystore(keystore_password, keystores_folder_path, time.time())
+        pubkeys.append(credential.signing_pk.hex())
+    with open(os.path.join(my_folder_path, 'password.txt'), 'w', encoding='utf-8') as f:
+        f.write(keystore_password + '\n')
+    return keystores_folder_path, pubkeys
+
+
+def _clean_folder(my_folder_path: str) -> None:
+    clean_folder(my_folder_path, os.path.join(my_folder_path, DEFAULT_EXIT_TRANSACTION_FOLDER_NAME), True)
+    clean_folder(my_folder_path, os.path.join(my_folder_path, 'keystores'), True)
+    if os.path.exists(my_folder_path):
+        for file_name in os.listdir(my_folder_path):
+            os.remove(os.path.join(my_folder_path, file_name))
+        os.rmdir(my_folder_path)
+
+
+@pytest.mark.parametrize('per_validator_files', [False, True])
+def test_exit_transaction_keystores(per_validator_files: bool) -> None:
+    my_folder_path = os.path.join(os.getcwd(), 'TESTING_TEMP_FOLDER')
+    _clean_folder(my_folder_path)
+    exit_transaction_folder_path = os.path.join(my_folder_path, DEFAULT_EXIT_TRANSACTION_FOLDER_NAME)
+    keystores_folder_path, pubkeys = _prepare_keystores(my_folder_path, 'solo-stakers', 3)
+
+    # Beacon node API response, with an unrelated validator
+    validator_indices = {pubkey: 100 + i for i, pubkey in enumerate(pubkeys)}
+    with open(os.path.join(my_folder_path, 'validators.json'), 'w', encoding='utf-8') as f:
+        json.dump({'data': [{'index': str(index), 'validator': {'pubkey': '0x' + pubkey}}
+                            for pubkey, index in [*validator_indices.items(), ('ab' * 48, 7)]]}, f)
+
+    runner = CliRunner()
+    arguments = [
+        '--language', 'english',
+        '--non_interactive',
+        'exit-transaction-keystores',
+        '--output_folder', my_folder_path,
+        '--chain', 'mainnet',
+        '--keystores', keystores_folder_path,
+        '--keystore_password_file', os.path.join(my_folder_path, 'password.txt'),
+        '--validator_indices_file', os.path.join(my_folder_path, 'validators.json'),
+        '--epoch', '1234',
+    ]
+    if per_validator_files:
+        arguments.append('--per_validator_files')
+    result = runner.invoke(cli, arguments)
+    assert result.exit_code == 0
+
+    exit_transaction_files = sorted(os.listdir(exit_transaction_folder_path))
+    assert len(exit_transaction_files) == (4 if per_validator_files else 1)
+    assert exit_transaction_files[-1].startswith('signed_exit_transactions-')
+    verify_file_permission(os, folder_path=exit_transaction_folder_path, files=exit_transaction_files)
+
+    signed_exits = read_json_file(exit_transaction_folder_path, exit_transaction_files[-1])
+    # The keystores are named after their account index, so they are in the same order as the pubkeys
+    for signed_exit, pubkey in zip(signed_exits, pubkeys):
+        assert signed_exit['message'] == {'epoch': '1234', 'validator_index': str(validator_indices[pubkey])}
+        assert validate_signed_exit(signed_exit['message']['validator_index'], '1234', signed_exit['signature'],
+                                    pubkey, get_chain_setting('mainnet'))
+    if per_validator_files:
+        assert [read_json_file(exit_transaction_folder_path, file) for file in exit_transaction_files[:-1]] \
+            == signed_exits
+
+    _clean_folder(my_folder_path)
+
+
+@pytest.mark.parametrize(
+    'keystore_password, validator_indices, keystores, err',
+    [
+        ('solo-stakers', {}, 'keystore-*.json', 'err_unknown_validator_index'),
+        ('solo-stakers', {'ab' * 48: 1}, 'keystore-*.json', 'err_unknown_validator_index'),
+        ('solo-stakers', [1, 2], 'keystore-*.json', 'err_invalid_validator_indices'),
+        ('solo-stakers', {'ab' * 48: 'one'}, 'keystore-*.json', 'err_invalid_validator_indices'),
+        ('wrong-password', None, 'keystore-*.json', 'err_keystore_password'),
+        ('solo-stakers', None, 'missing-*.json', 'err_no_keystores'),
+    ]
+)
+def test_exit_transaction_keystores_invalid(keystore_password: str, validator_indices, keystores: str,
+                                            err: str) -> None:
+    my_folder_path = os.path.join(os.getcwd(), 'TESTING_TEMP_FOLDER')
+    _clean_folder(my_folder_path)
+    keystores_folder_path, pubkeys = _prepare_keystores(my_folder_path, 'solo-stakers', 2)
+    with open(os.path.join(my_folder_path, 'password.txt'), 'w', encoding='utf-8') as f:
+        f.write(keystore_password)
+    if validator_indices is None:
+        validator_indices = {'0x' + pubkey: i for i, pubkey in enumerate(pubkeys)}
+    with open(os.path.join(my_folder_path, 'validators.json'), 'w', encoding='utf-8') as f:
+        json.dump(validator_indices, f)
+
+    runner = CliRunner()
+    keystores = os.path.join(keystores_folder_path, keystores)
+    arguments = [
+        '--language', 'english',
+        '--non_interactive',
+        'exit-transaction-keystores',
+        '--output_folder', my_folder_path,
+        '--keystores', keystores,
+        '--keystore_password_file', os.path.join(my_folder_path, 'password.txt'),
+        '--validator_indices_file', os.path.join(my_folder_path, 'validators.json'),
+    ]
+    result = runner.invoke(cli, arguments)
+    assert result.exit_code == 1
+    assert not os.path.exists(os.path.join(my_folder_path, DEFAULT_EXIT_TRANSACTION_FOLDER_NAME)) \
+        or not os.listdir(os.path.join(my_folder_path, DEFAULT_EXIT_TRANSACTION_FOLDER_NAME))
+
+    # The first keystore is the one reported
+    keystore_filefolders = sorted(glob.glob(keystores))
+    exit_transaction_keystores_json_file = os.path.join(os.getcwd(), 'ethstaker_deposit/cli/',
+                                                        'exit_transaction_keystores.json')
+    message = load_text([err], exit_transaction_keystores_json_file, 'exit_transaction_keystores').format(
+        keystore=keystore_filefolders[0] if keystore_filefolders else None, keystores=keystores,
+        validator_indices_file=os.path.join(my_folder_path, 'validators.json'))
+    # Reported without a traceback
+    assert isinstance(result.exception, SystemExit)
+    assert message in result.output
+
+    _clean_folder(my_folder_path)
@@ -56,6 +56,45 @@ def test_exit_transaction_mnemonic() -> None:
     clean_exit_transaction_folder(my_folder_path)
 
 
+def test_exit_transaction_mnemonic_combined_output() -> None:
+    # Prepare folder
+    my_folder_path = os.path.join(os.getcwd(), 'TESTING_TEMP_FOLDER')
+    clean_exit_transaction_folder(my_folder_path)
+    if not os.path.exists(my_folder_path):
+        os.mkdir(my_folder_path)
+    exit_transaction_folder_path = os.path.join(my_folder_path, DEFAULT_EXIT_TRANSACTION_FOLDER_NAME)
+
+    runner = CliRunner()
+    arguments = [
+        '--language', 'english',
+        '--non_interactive',
+        'exit-transaction-mnemonic',
+        '--output_folder', my_folder_path,
+        '--chain', 'mainnet',
+        '--mnemonic', 'aban aban aban aban aban aban aban aban aban aban aban abou',
+        '--validator_start_index', '2',
+        '--validator_indices', '5,6,7',
+        '--epoch', '1234',
+    ]
+    result = runner.invoke(cli, arguments)
+    assert result.exit_code == 0
+    per_validator_files = sorted(os.listdir(exit_transaction_folder_path))
+    per_validator_exits = [read_json_file(exit_transaction_folder_path, file) for file in per_validator_files]
+
+    result = runner.invoke(cli, arguments + ['--combined_output'])
+    assert result.exit_code == 0
+
+    # The combined file holds the same exits as the per validator files
+    combined_files = [file for file in os.listdir(exit_transaction_folder_path) if file not in per_validator_files]
+    assert len(combined_files) == 1
+    assert combined_files[0].startswith('signed_exit_transactions-')
+    assert read_json_file(exit_transaction_folder_path, combined_files[0]) == per_validator_exits
+    verify_file_permission(os, folder_path=exit_transaction_folder_path, files=combined_files)
+
+    # Clean up
+    clean_exit_transaction_folder(my_folder_path)
+
+
 @pytest.mark.asyncio
 async def test_exit_transaction_mnemonic_multiple() -> None:
     # Prepare folder
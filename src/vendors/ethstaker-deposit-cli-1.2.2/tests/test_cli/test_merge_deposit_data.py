@@ -0,0 +1,85 @@
+import json
+import os
+
+from click.testing import CliRunner
+
+from ethstaker_deposit.deposit import cli
+from ethstaker_deposit.utils.constants import DEFAULT_VALIDATOR_KEYS_FOLDER_NAME
+from ethstaker_deposit.utils.deposit import get_shard_run
+from .helpers import clean_key_folder, get_permissions
+
+
+def _existing_mnemonic_arguments(folder_path: str) -> list[str]:
+    return [
+        '--language', 'english',
+        '--non_interactive',
+        'existing-mnemonic',
+        '--mnemonic', 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        '--validator_start_index', '2',
+        '--num_validators', '3',
+        '--folder', folder_path,
+        '--chain', 'mainnet',
+        '--keystore_password', 'MyPasswordIs',
+        '--withdrawal_address', '0x00000000219ab540356cBB839Cbe05303d7705Fa',
+        '--pbkdf2',
+    ]
+
+
+def _deposit_data_files(folder_path: str) -> list[str]:
+    validator_keys_folder_path = os.path.join(folder_path, DEFAULT_VALIDATOR_KEYS_FOLDER_NAME)
+    _, _, key_files = next(os.walk(validator_keys_folder_path))
+    return [
+        os.path.join(validator_keys_folder_path, key_file)
+        for key_file in key_files if key_file.startswith('deposit_data')
+    ]
+
+
+def test_merge_deposit_data() -> None:
+    # Prepare folders
+    my_folder_path = os.path.join(os.getcwd(), 'TESTING_TEMP_FOLDER')
+    shard_folder_paths = [os.path.join(os.getcwd(), 'TESTING_TEMP_FOLDER_SHARD_%i' % k) for k in (1, 2)]
+    for folder_path in [my_folder_path] + shard_folder_paths:
+        clean_key_folder(folder_path)
+        if not os.path.exists(folder_path):
+            os.mkdir(folder_path)
+
+    runner = CliRunner()
+    result = runner.invoke(cli, _existing_mnemonic_arguments(my_folder_path))
+    assert result.exit_code == 0
+    [expected_file] = _deposit_data_files(my_folder_path)
+    with open(expected_file, 'r', encoding='utf-8') as f:
+        expected_deposits = json.load(f)
+    os.remove(expected_file)
+
+    # Generate the keys of each shard in their own folder
+    shard_files = []
+    for k, folder_path in enumerate(shard_folder_paths, start=1):
+        result = runner.invoke(cli, _existing_mnemonic_arguments(folder_path) + ['--shard', '%i/2' % k])
+        assert result.exit_code == 0
+        [shard_file] = _deposit_data_files(folder_path)
+        shard_files.append(shard_file)
+    # Both shards are of the run of the key at account index 2
+    run = get_shard_run(bytes.fromhex(expected_deposits[0]['pubkey']))
+    assert os.path.basename(shard_files[0]).endswith(f'-shard-1-of-2-indices-2-2-run-{run}.json')
+    assert os.path.basename(shard_files[1]).endswith(f'-shard-2-of-2-indices-3-4-run-{run}.json')
+
+    arguments = ['--language', 'english', '--non_interactive', 'merge-deposit-data', '--output_folder', my_folder_path]
+    for shard_file in reversed(shard_files):
+        arguments += ['--deposit_data', shard_file]
+    result = runner.invoke(cli, arguments)
+    assert result.exit_code == 0
+
+    [merged_file] = _deposit_data_files(my_folder_path)
+    with open(merged_file, 'r', encoding='utf-8') as f:
+        merged_deposits = json.load(f)
+    assert merged_deposits == expected_deposits
+    if os.name == 'posix':
+        assert get_permissions(os.path.dirname(merged_file), os.path.basename(merged_file)) == '0o400'
+
+    # A missing shard is refused
+    result = runner.invoke(cli, arguments[:-2])
+    assert result.exit_code != 0
+
+    # Clean up
+    for folder_path in [my_folder_path] + shard_folder_paths:
+        clean_key_folder(folder_path)
@@ -1,7 +1,27 @@
+import concurrent.futures
+import json
+import os
+import pickle
 import pytest
+import threading
+import time
+from typing import Any
 
-from ethstaker_deposit.credentials import CredentialList
-from ethstaker_deposit.settings import MainnetSetting
+from ethstaker_deposit import credentials as credentials_module
+from ethstaker_deposit.credentials import (
+    Credential,
+    CredentialList,
+    credentials_at_account_indices,
+    credentials_from_mnemonic,
+    generate_keys_pipeline,
+    open_key_generation_journal,
+    verify_journal_deposit_data,
+)
+from ethstaker_deposit.key_handling.key_derivation.path import mnemonic_and_path_to_key
+from ethstaker_deposit.settings import GnosisSetting, HoodiSetting, MainnetSetting
+from ethstaker_deposit.utils.constants import ETH2GWEI, VALIDATOR_KEY_PATH_PREFIX
+from ethstaker_deposit.utils.deposit import export_deposit_data_json, get_deposit_data_shard
+from ethstaker_deposit.utils.validation import verify_deposit_data_json, verify_deposit_data_json_matching
 
 
 def test_from_mnemonic() -> None:
@@ -16,3 +36,492 @@ def test_from_mnemonic() -> None:
             hex_withdrawal_address=None,
             compounding=False,
         )
+
+
+@pytest.mark.parametrize(
+    'hex_withdrawal_address, compounding',
+    [
+        (None, False),
+        ('0x00000000219ab540356cbb839cbe05303d7705fa', False),
+        ('0x00000000219ab540356cbb839cbe05303d7705fa', True),
+    ]
+)
+def test_withdrawal_key(hex_withdrawal_address, compounding) -> None:
+    mnemonic = 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about'
+    credential = Credential(
+        mnemonic=mnemonic,
+        mnemonic_password='',
+        index=1,
+        amount=32 * ETH2GWEI,
+        chain_setting=MainnetSetting,
+        hex_withdrawal_address=hex_withdrawal_address,
+        compounding=compounding,
+    )
+    assert credential.withdrawal_sk == mnemonic_and_path_to_key(
+        mnemonic=mnemonic, path='m/12381/3600/1/0', password='')
+    # The mnemonic is not kept on the credential, nor sent along with it to other processes
+    assert mnemonic not in pickle.dumps(credential).decode('latin-1')
+
+
+def test_cached_artifacts_survive_pickling(monkeypatch) -> None:
+    credential = Credential(
+        mnemonic='abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        mnemonic_password='',
+        index=0,
+        amount=32 * ETH2GWEI,
+        chain_setting=MainnetSetting,
+        hex_withdrawal_address=None,
+    )
+    deposit_datum = credential.deposit_datum_dict
+    assert not hasattr(credential, '__dict__')
+
+    restored = pickle.loads(pickle.dumps(credential))
+    assert restored._deposit_message is None
+    assert restored._signed_deposit is None
+
+    def _fail(*args, **kwargs):
+        raise AssertionError('cached artifacts should not be recomputed')
+
+    monkeypatch.setattr(credentials_module, 'SkToPk', _fail)
+    monkeypatch.setattr(credentials_module.bls, 'Sign', _fail)
+    assert restored.deposit_datum_dict == deposit_datum
+
+
+def test_generate_keys_pipeline(tmp_path) -> None:
+    results = list(generate_keys_pipeline(
+        mnemonic='abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        mnemonic_password='',
+        num_keys=1,
+        amounts=[32 * ETH2GWEI],
+        chain_setting=MainnetSetting,
+        start_index=2,
+        hex_withdrawal_address='0x00000000219ab540356cbb839cbe05303d7705fa',
+        use_pbkdf2=True,
+        password='MyPasswordIs',
+        folder=str(tmp_path),
+        timestamp=0,
+    ))
+    assert len(results) == 1
+    result = results[0]
+    assert result.key_index == 2
+    assert result.valid_keystore and result.valid_deposit
+    assert os.path.exists(result.keystore_filefolder)
+    assert result.deposit_datum['withdrawal_credentials'][:1] == b'\x01'
+
+
+def test_generate_keys_pipeline_additional_chains(tmp_path) -> None:
+    kwargs: dict[str, Any] = dict(
+        mnemonic='abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        mnemonic_password='',
+        num_keys=2,
+        amounts=[32 * ETH2GWEI] * 2,
+        chain_setting=MainnetSetting,
+        start_index=0,
+        hex_withdrawal_address='0x00000000219ab540356cbb839cbe05303d7705fa',
+        use_pbkdf2=True,
+        password='MyPasswordIs',
+        folder=str(tmp_path),
+        timestamp=0,
+    )
+    results = list(generate_keys_pipeline(**kwargs, additional_chain_settings=[HoodiSetting]))
+    # One keystore per key, whichever the number of chains
+    assert len(os.listdir(str(tmp_path))) == 2
+    for result in results:
+        assert result.valid_keystore and result.valid_deposit
+        credential = Credential(mnemonic=kwargs['mnemonic'], mnemonic_password='', index=result.key_index,
+                                amount=32 * ETH2GWEI, chain_setting=HoodiSetting,
+                                hex_withdrawal_address=kwargs['hex_withdrawal_address'])
+        assert result.additional_deposit_data == (credential.deposit_datum_dict,)
+        assert result.deposit_datum['signature'] != credential.deposit_datum_dict['signature']
+
+    with pytest.raises(ValueError):
+        # The same network twice
+        list(generate_keys_pipeline(**kwargs, additional_chain_settings=[HoodiSetting, HoodiSetting]))
+    with pytest.raises(ValueError):
+        # Deposits in a different unit
+        list(generate_keys_pipeline(**kwargs, additional_chain_settings=[GnosisSetting]))
+
+
+def test_generate_keys_pipeline_top_ups(tmp_path) -> None:
+    mnemonic = 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about'
+    withdrawal_address = '0x00000000219ab540356cbb839cbe05303d7705fa'
+    results = list(generate_keys_pipeline(
+        mnemonic=mnemonic,
+        mnemonic_password='',
+        num_keys=2,
+        amounts=[32 * ETH2GWEI] * 2,
+        chain_setting=MainnetSetting,
+        start_index=0,
+        hex_withdrawal_address=withdrawal_address,
+        compounding=True,
+        use_pbkdf2=True,
+        password='MyPasswordIs',
+        folder=str(tmp_path),
+        timestamp=0,
+        additional_chain_settings=[HoodiSetting],
+        top_up_amounts=[1 * ETH2GWEI, 2 * ETH2GWEI],
+    ))
+    for result in results:
+        assert result.valid_keystore and result.valid_deposit
+        # The top-up deposits on the main chain, then on the additional chain
+        assert [[deposit_datum['amount'] for deposit_datum in top_up_deposit_data]
+                for top_up_deposit_data in result.top_up_deposit_data] == [[ETH2GWEI, 2 * ETH2GWEI]] * 2
+        assert [top_up_deposit_data[0]['network_name'] for top_up_deposit_data in result.top_up_deposit_data] == [
+            'mainnet', 'hoodi']
+        assert all(deposit_datum['pubkey'] == result.deposit_datum['pubkey']
+                   for top_up_deposit_data in result.top_up_deposit_data for deposit_datum in top_up_deposit_data)
+        credential = Credential(mnemonic=mnemonic, mnemonic_password='', index=result.key_index,
+                                amount=2 * ETH2GWEI, chain_setting=MainnetSetting,
+                                hex_withdrawal_address=withdrawal_address, compounding=True)
+        assert result.top_up_deposit_data[0][1] == credential.deposit_datum_dict
+
+
+def test_resume_key_generation(tmp_path) -> None:
+    kwargs: dict[str, Any] = dict(
+        mnemonic='abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        mnemonic_password='',
+        num_keys=4,
+        amounts=[32 * ETH2GWEI] * 4,
+        chain_setting=MainnetSetting,
+        start_index=0,
+        hex_withdrawal_address='0x00000000219ab540356cbb839cbe05303d7705fa',
+        use_pbkdf2=True,
+        password='MyPasswordIs',
+        folder=str(tmp_path),
+    )
+    expected = [result.deposit_datum for result in generate_keys_pipeline(**kwargs, timestamp=0)]
+    for file_name in os.listdir(str(tmp_path)):
+        os.remove(os.path.join(str(tmp_path), file_name))
+
+    # Interrupt the key generation after three keys, two of which have a corrupted keystore
+    journal = open_key_generation_journal(**kwargs, timestamp=1)
+    for result in generate_keys_pipeline(**kwargs, timestamp=journal.timestamp):
+        journal.record(result.key_index, result.keystore_filefolder, result.deposit_datum)
+        if len(journal.completed_indices) == 3:
+            break
+    journal.close()
+    os.chmod(journal.keystore_filefolders[1], 0o600)
+    with open(journal.keystore_filefolders[1], 'w') as f:
+        f.write('{"crypto"')
+    # A keystore which still parses but fails its checksum is regenerated too
+    with open(journal.keystore_filefolders[2], 'r') as f:
+        keystore = json.load(f)
+    keystore['crypto']['checksum']['message'] = '00' * 32
+    os.chmod(journal.keystore_filefolders[2], 0o600)
+    with open(journal.keystore_filefolders[2], 'w') as f:
+        json.dump(keystore, f)
+
+    with pytest.raises(ValueError):
+        open_key_generation_journal(**{**kwargs, 'password': 'MyOtherPassword'}, timestamp=2, resume=True)
+    journal = open_key_generation_journal(**kwargs, timestamp=2, resume=True)
+    assert journal.timestamp == 1
+    assert journal.completed_indices == [0]
+    assert journal.unverified_indices == []
+    results = list(generate_keys_pipeline(**kwargs, timestamp=journal.timestamp,
+                                          skip_indices=journal.completed_indices))
+    assert [result.key_index for result in results] == [1, 2, 3]
+    for result in results:
+        journal.record(result.key_index, result.keystore_filefolder, result.deposit_datum)
+    assert list(journal.deposit_data()) == [
+        json.loads(json.dumps(deposit_datum, default=lambda x: x.hex())) for deposit_datum in expected
+    ]
+    journal.remove()
+    assert sorted(os.listdir(str(tmp_path))) == sorted(
+        os.path.basename(filefolder) for filefolder in journal.keystore_filefolders.values())
+
+
+def test_verify_journal_deposit_data(monkeypatch, tmp_path) -> None:
+    kwargs: dict[str, Any] = dict(
+        mnemonic='abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        mnemonic_password='',
+        num_keys=3,
+        amounts=[32 * ETH2GWEI] * 3,
+        chain_setting=MainnetSetting,
+        start_index=0,
+        hex_withdrawal_address='0x00000000219ab540356cbb839cbe05303d7705fa',
+        use_pbkdf2=True,
+    )
+    key_generation_kwargs: dict[str, Any] = dict(**kwargs, password='MyPasswordIs', folder=str(tmp_path))
+    journal = open_key_generation_journal(**key_generation_kwargs, timestamp=1)
+    for result in generate_keys_pipeline(**key_generation_kwargs, timestamp=journal.timestamp):
+        journal.record(result.key_index, result.keystore_filefolder, result.deposit_datum)
+    # The recorded keys were verified by the pipeline
+    assert journal.unverified_indices == []
+    assert verify_journal_deposit_data(journal, **kwargs)
+    journal.close()
+
+    # Only the keys before the journal tail are verified again, without their keystores
+    monkeypatch.setattr(credentials_module, 'RESUME_VERIFICATION_TAIL', 1)
+    journal = open_key_generation_journal(**key_generation_kwargs, timestamp=2, resume=True)
+    assert journal.unverified_indices == [0, 1]
+    assert verify_journal_deposit_data(journal, **kwargs)
+    assert journal.unverified_indices == []
+
+    # The written deposit data file is verified against the journal
+    filefolder = export_deposit_data_json(str(tmp_path), journal.timestamp, journal.deposit_data())
+    assert verify_deposit_data_json_matching(filefolder, journal.deposit_data())
+    with open(filefolder, 'r', encoding='utf-8') as f:
+        deposit_data = json.load(f)
+    with open(filefolder, 'w', encoding='utf-8') as f:
+        json.dump(deposit_data[:-1], f)
+    assert not verify_deposit_data_json_matching(filefolder, journal.deposit_data())
+
+    # The deposits of a shard are compared with their run
+    shard = get_deposit_data_shard(0, 2, (1, 1), bytes(48))
+    filefolder = export_deposit_data_json(str(tmp_path), journal.timestamp, journal.deposit_data(), shard)
+    assert verify_deposit_data_json_matching(filefolder, journal.deposit_data(), shard)
+    assert not verify_deposit_data_json_matching(filefolder, journal.deposit_data())
+    journal.remove()
+
+
+def test_credential_list_export(tmp_path) -> None:
+    credentials = CredentialList.from_mnemonic(
+        mnemonic='abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        mnemonic_password='',
+        num_keys=2,
+        amounts=[32 * ETH2GWEI] * 2,
+        chain_setting=MainnetSetting,
+        start_index=0,
+        hex_withdrawal_address=None,
+        use_pbkdf2=True,
+    )
+    keystore_filefolders = credentials.export_keystores(password='MyPasswordIs', folder=str(tmp_path), timestamp=0)
+    assert len(keystore_filefolders) == 2
+    assert credentials.verify_keystores(keystore_filefolders=keystore_filefolders, password='MyPasswordIs')
+    assert not credentials.verify_keystores(keystore_filefolders=keystore_filefolders[::-1], password='MyPasswordIs')
+    deposits_file = credentials.export_deposit_data_json(folder=str(tmp_path), timestamp=0)
+    assert verify_deposit_data_json(deposits_file, credentials.credentials, MainnetSetting)
+
+
+def test_init_worker() -> None:
+    mnemonic = 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about'
+    credentials_module._init_worker({
+        'mnemonic': mnemonic,
+        'mnemonic_password': '',
+        'chain_setting': MainnetSetting,
+        'hex_withdrawal_address': None,
+        'compounding': False,
+        'use_pbkdf2': True,
+    })
+    context = credentials_module.get_derivation_context(mnemonic=mnemonic, password='')
+    assert (12381, 3600) in context._nodes
+    assert context.derive(VALIDATOR_KEY_PATH_PREFIX) == mnemonic_and_path_to_key(
+        mnemonic=mnemonic, path=VALIDATOR_KEY_PATH_PREFIX, password='')
+
+    # Tasks only carry the account index and the amount
+    credential = credentials_module._pooled_credential_builder((3, 32 * ETH2GWEI))
+    assert credential.signing_key_path == 'm/12381/3600/3/0/0'
+    assert credential.amount == 32 * ETH2GWEI
+
+
+def test_credentials_from_mnemonic() -> None:
+    mnemonic = 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about'
+    credentials = list(credentials_from_mnemonic(
+        mnemonic=mnemonic,
+        mnemonic_password='',
+        num_keys=2,
+        amounts=[32 * ETH2GWEI, 1 * ETH2GWEI],
+        chain_setting=MainnetSetting,
+        start_index=1,
+        hex_withdrawal_address=None,
+    ))
+    assert [c.amount for c in credentials] == [32 * ETH2GWEI, 1 * ETH2GWEI]
+    for index, credential in enumerate(credentials, start=1):
+        assert credential.signing_sk == mnemonic_and_path_to_key(
+            mnemonic=mnemonic, path=f'm/12381/3600/{index}/0/0', password='')
+
+
+def test_credentials_at_account_indices() -> None:
+    mnemonic = 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about'
+    credentials = list(credentials_at_account_indices(
+        mnemonic=mnemonic,
+        mnemonic_password='',
+        account_indices=[7, 2],
+        amounts=[32 * ETH2GWEI, 1 * ETH2GWEI],
+        chain_setting=MainnetSetting,
+        hex_withdrawal_address=None,
+    ))
+    assert [c.signing_key_path for c in credentials] == ['m/12381/3600/7/0/0', 'm/12381/3600/2/0/0']
+    assert [c.amount for c in credentials] == [32 * ETH2GWEI, 1 * ETH2GWEI]
+
+    with pytest.raises(ValueError):
+        credentials_at_account_indices(
+            mnemonic=mnemonic,
+            mnemonic_password='',
+            account_indices=[7, 2],
+            amounts=[32 * ETH2GWEI],
+            chain_setting=MainnetSetting,
+            hex_withdrawal_address=None,
+        )
+
+
+def _session_worker_state(_: int) -> tuple[dict[str, Any], int]:
+    return dict(credentials_module._worker_kwargs), credentials_module.get_derivation_context.cache_info().currsize
+
+
+def test_credential_pool_session() -> None:
+    mnemonic = 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about'
+    with credentials_module.credential_pool_session() as pool:
+        for start_index in (0, 2):
+            credentials = list(credentials_from_mnemonic(
+                mnemonic=mnemonic,
+                mnemonic_password='',
+                num_keys=2,
+                amounts=[32 * ETH2GWEI] * 2,
+                chain_setting=MainnetSetting,
+                start_index=start_index,
+                hex_withdrawal_address=None,
+            ))
+            for index, credential in enumerate(credentials, start=start_index):
+                assert credential.signing_sk == mnemonic_and_path_to_key(
+                    mnemonic=mnemonic, path=f'm/12381/3600/{index}/0/0', password='')
+            # The workers drop the mnemonic and the keys derived from it once the request is done
+            states = pool.map(_session_worker_state, range(credentials_module._session_workers))
+            assert all(state == ({}, 0) for state in states)
+
+        # Tasks of another request are refused
+        with pytest.raises(ValueError):
+            pool.submit(credentials_module._run_session_task, (_session_worker_state, 0, (0, 0))).result()
+
+
+def test_credential_pool_session_broken_barrier(monkeypatch) -> None:
+    mnemonic = 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about'
+    monkeypatch.setattr(credentials_module.os, 'cpu_count', lambda: 2)
+    with credentials_module.credential_pool_session() as pool:
+        # A worker that fails to switch requests releases the others, which get a broken barrier
+        with pytest.raises((KeyError, RuntimeError)):
+            credentials_module._broadcast_session_request(0, {})
+        # The session goes on with a new pool
+        session_pool = credentials_module.get_session_pool()
+        assert session_pool is not None and session_pool is not pool
+        [credential] = credentials_from_mnemonic(
+            mnemonic=mnemonic,
+            mnemonic_password='',
+            num_keys=1,
+            amounts=[32 * ETH2GWEI],
+            chain_setting=MainnetSetting,
+            start_index=0,
+            hex_withdrawal_address=None,
+        )
+        assert credential.signing_sk == mnemonic_and_path_to_key(
+            mnemonic=mnemonic, path='m/12381/3600/0/0/0', password='')
+    assert credentials_module.get_session_pool() is None
+
+
+def test_credential_pool_session_kdf_limit(monkeypatch, tmp_path) -> None:
+    map_in_flight = credentials_module._map_in_flight
+    limits = []
+
+    def recording_map_in_flight(executor: Any, func: Any, tasks: Any, max_in_flight: Any) -> Any:
+        limits.append(max_in_flight)
+        return map_in_flight(executor, func, tasks, max_in_flight)
+
+    monkeypatch.setattr(credentials_module, '_map_in_flight', recording_map_in_flight)
+    with credentials_module.credential_pool_session(max_kdf_memory=4 * credentials_module.SCRYPT_KDF_MEMORY):
+        results = list(generate_keys_pipeline(
+            mnemonic='abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+            mnemonic_password='',
+            num_keys=1,
+            amounts=[32 * ETH2GWEI],
+            chain_setting=MainnetSetting,
+            start_index=0,
+            hex_withdrawal_address=None,
+            password='MyPasswordIs',
+            folder=str(tmp_path),
+            timestamp=0,
+            max_kdf_memory=credentials_module.SCRYPT_KDF_MEMORY,
+        ))
+    assert results[0].valid_keystore and results[0].valid_deposit
+    # The limit of the request applies within the session
+    assert limits == [1]
+
+
+def test_map_in_flight() -> None:
+    lock = threading.Lock()
+    in_flight = [0]
+    max_in_flight = [0]
+
+    def task(value: int) -> int:
+        with lock:
+            in_flight[0] += 1
+            max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+        return value * 2
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(credentials_module._map_in_flight(executor, task, range(10), 2)) == list(range(0, 20, 2))
+        assert max_in_flight[0] == 2
+        assert list(credentials_module._map_in_flight(executor, task, range(10), None)) == list(range(0, 20, 2))
+
+
+def test_max_concurrent_kdfs(monkeypatch) -> None:
+    monkeypatch.setattr(credentials_module, 'get_available_memory', lambda: 1024 * 2**20)
+    assert credentials_module.SCRYPT_KDF_MEMORY == 256 * 2**20
+    assert credentials_module.max_concurrent_kdfs() == 4
+    assert credentials_module.max_concurrent_kdfs(max_kdf_memory=600 * 2**20) == 2
+    assert credentials_module.max_concurrent_kdfs(max_kdf_memory=1) == 1
+    assert credentials_module.max_concurrent_kdfs(use_pbkdf2=True) is None
+
+    monkeypatch.setattr(credentials_module, 'get_available_memory', lambda: None)
+    assert credentials_module.max_concurrent_kdfs() is None
+
+
+def test_kdf_semaphore(monkeypatch) -> None:
+    monkeypatch.setattr(credentials_module.os, 'cpu_count', lambda: 8)
+    assert credentials_module._kdf_semaphore(None) is None
+    assert credentials_module._kdf_semaphore(8) is None
+
+    kdf_slots = credentials_module._kdf_semaphore(2)
+    assert kdf_slots is not None
+    credentials_module._init_kdf_worker(kdf_slots)
+    try:
+        with credentials_module._kdf_slot(), credentials_module._kdf_slot():
+            assert not kdf_slots.acquire(block=False)
+        assert kdf_slots.acquire(block=False)
+        kdf_slots.release()
+    finally:
+        credentials_module._init_kdf_worker(None)
+
+
+def test_save_and_verify_signing_keystore(monkeypatch, tmp_path) -> None:
+    credential = Credential(
+        mnemonic='abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        mnemonic_password='',
+        index=0,
+        amount=32 * ETH2GWEI,
+        chain_setting=MainnetSetting,
+        hex_withdrawal_address=None,
+        use_pbkdf2=True,
+    )
+    kdf_calls = []
+    kdf = credentials_module.Keystore.kdf
+
+    def counting_kdf(self, **kwargs):
+        kdf_calls.append(kwargs)
+        return kdf(self, **kwargs)
+
+    monkeypatch.setattr(credentials_module.Keystore, 'kdf', counting_kdf)
+    filefolder, valid_keystore = credential.save_and_verify_signing_keystore(
+        password='MyPasswordIs', folder=str(tmp_path), timestamp=0)
+    assert valid_keystore
+    assert len(kdf_calls) == 1
+    assert credential.verify_keystore(keystore_filefolder=filefolder, password='MyPasswordIs')
+
+    # A keystore saved with different KDF parameters can not be verified with the reused decryption key
+    original_save = credentials_module.Keystore.save
+
+    def tampered_save(self, filefolder):
+        original_save(self, filefolder)
+        os.chmod(filefolder, 0o600)
+        with open(filefolder, encoding='utf-8') as f:
+            keystore_json = json.load(f)
+        keystore_json['crypto']['kdf']['params']['c'] = 2
+        with open(filefolder, 'w', encoding='utf-8') as f:
+            json.dump(keystore_json, f)
+
+    monkeypatch.setattr(credentials_module.Keystore, 'save', tampered_save)
+    _, valid_keystore = credential.save_and_verify_signing_keystore(
+        password='MyPasswordIs', folder=str(tmp_path), timestamp=1)
+    assert not valid_keystore
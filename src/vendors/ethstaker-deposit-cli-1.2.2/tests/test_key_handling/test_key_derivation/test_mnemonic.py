@@ -14,10 +14,16 @@ from ethstaker_deposit.key_handling.key_derivation.mnemonic import (
     _get_word_list,
     abbreviate_words,
     determine_mnemonic_language,
+    get_lexicon,
+    get_mnemonic_repair_space,
     get_seed,
     get_mnemonic,
     reconstruct_mnemonic,
+    repair_mnemonic,
 )
+from ethstaker_deposit.key_handling.key_derivation.path import mnemonic_and_path_to_key
+from ethstaker_deposit.utils.bls import SkToPk
+from ethstaker_deposit.utils.crypto import SHA256
 
 
 WORD_LISTS_PATH = os.path.join(os.getcwd(), 'ethstaker_deposit', 'key_handling', 'key_derivation', 'word_lists')
@@ -119,3 +125,75 @@ def test_determine_mnemonic_language_error() -> None:
         determine_mnemonic_language('these are not words', WORD_LISTS_PATH)
     except ValueError as e:
         assert e
+
+
+@pytest.mark.parametrize(
+    'language', all_languages
+)
+def test_lexicon(language: str) -> None:
+    lexicon = get_lexicon(WORD_LISTS_PATH)
+    assert get_lexicon(WORD_LISTS_PATH) is lexicon
+
+    word_list = _get_word_list(language, WORD_LISTS_PATH)
+    language_lexicon = lexicon.language(language)
+    assert list(language_lexicon.words) == word_list
+    abbrev_word_list = abbreviate_words(word_list)
+    for word, abbrev in zip(word_list, abbrev_word_list):
+        assert language_lexicon.word_indices[word] == word_list.index(word)
+        assert language_lexicon.prefix_indices[abbrev] == abbrev_word_list.index(abbrev)
+        assert (language, abbrev_word_list.index(abbrev)) in lexicon.prefix_languages(abbrev)
+    assert lexicon.prefix_languages('zzzz') == []
+
+
+REPAIR_MNEMONIC = 'abandon amount liar amount expire adjust cage candy arch gather drum buyer'
+repair_words = REPAIR_MNEMONIC.split(' ')
+
+
+@pytest.mark.parametrize(
+    'broken_mnemonic',
+    [
+        ' '.join(['abxndon'] + repair_words[1:]),  # Typo
+        ' '.join(repair_words[:6] + ['cge'] + repair_words[7:]),  # Typo
+        ' '.join(repair_words[1:2] + repair_words[0:1] + repair_words[2:]),  # Swap
+        ' '.join(repair_words[:3] + repair_words[4:]),  # Missing word
+    ]
+)
+def test_mnemonic_repair_space(broken_mnemonic: str) -> None:
+    assert reconstruct_mnemonic(broken_mnemonic, WORD_LISTS_PATH) is None
+
+    space = get_mnemonic_repair_space(broken_mnemonic, WORD_LISTS_PATH)
+    candidates = list(space.candidates())
+    assert REPAIR_MNEMONIC in candidates
+    assert all(reconstruct_mnemonic(candidate, WORD_LISTS_PATH, 'english') == candidate for candidate in candidates)
+    ranges = [list(space.candidates(start, start + 1000)) for start in range(0, space.size, 1000)]
+    assert sum(ranges, []) == candidates
+
+
+def test_mnemonic_repair_space_missing_words() -> None:
+    space = get_mnemonic_repair_space(' '.join(repair_words[:10]), WORD_LISTS_PATH)
+    # Every pair of positions out of 12 for the 2 missing words
+    assert space.size == 66 * 2048**2
+    assert space.candidates(space.size - 2048**2, space.size)
+
+
+def test_repair_mnemonic() -> None:
+    broken_mnemonic = ' '.join(repair_words[:6] + ['cge'] + repair_words[7:])
+    pubkey = SkToPk(mnemonic_and_path_to_key(mnemonic=REPAIR_MNEMONIC, path='m/12381/3600/1/0/0', password=''))
+    withdrawal_pubkey = SkToPk(mnemonic_and_path_to_key(mnemonic=REPAIR_MNEMONIC, path='m/12381/3600/0/0', password=''))
+    withdrawal_credentials = b'\x00' + SHA256(withdrawal_pubkey)[1:]
+
+    assert repair_mnemonic(broken_mnemonic, WORD_LISTS_PATH, pubkey=pubkey, account_indices=[0, 1]) == REPAIR_MNEMONIC
+    assert repair_mnemonic(
+        broken_mnemonic, WORD_LISTS_PATH, withdrawal_credentials=withdrawal_credentials) == REPAIR_MNEMONIC
+
+    progress = []
+    space_size = get_mnemonic_repair_space(broken_mnemonic, WORD_LISTS_PATH).size
+    assert repair_mnemonic(broken_mnemonic, WORD_LISTS_PATH, pubkey=pubkey, range_size=1,
+                           progress=lambda searched, size: progress.append((searched, size))) is None
+    assert progress == sorted(set(progress))
+    assert progress[-1] == (space_size, space_size)
+
+    # Resuming after the last candidate
+    assert repair_mnemonic(broken_mnemonic, WORD_LISTS_PATH, pubkey=pubkey, start=space_size) is None
+    with pytest.raises(ValueError):
+        repair_mnemonic(broken_mnemonic, WORD_LISTS_PATH)
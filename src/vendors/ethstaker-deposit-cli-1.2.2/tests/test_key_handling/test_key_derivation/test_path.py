@@ -1,6 +1,8 @@
+import concurrent.futures
 import os
 import json
 import pytest
+from typing import Any
 
 from ethstaker_deposit.key_handling.key_derivation.tree import (
     _flip_bits_256,
@@ -10,9 +12,13 @@ from ethstaker_deposit.key_handling.key_derivation.tree import (
 )
 
 from ethstaker_deposit.key_handling.key_derivation.path import (
+    DerivationContext,
+    discover_account_indices,
     mnemonic_and_path_to_key,
     path_to_nodes,
 )
+from ethstaker_deposit.utils.bls import SkToPk
+from ethstaker_deposit.utils.crypto import SHA256
 
 test_vector_filefolder = os.path.join(os.getcwd(), 'tests', 'test_key_handling', 'test_key_derivation',
                                       'test_vectors', 'tree_kdf_intermediate.json')
@@ -79,6 +85,23 @@ def test_mnemonic_and_path_to_key(test_vector) -> None:
     assert mnemonic_and_path_to_key(mnemonic=mnemonic, path=path, password=password) == key
 
 
+@pytest.mark.parametrize(
+    'test_vector',
+    [test_vector_dict]
+)
+def test_derivation_context(test_vector) -> None:
+    context = DerivationContext(mnemonic=test_vector['mnemonic'], password=test_vector['password'])
+    assert context.derive(test_vector['path']) == test_vector['child_SK']
+
+
+def test_derivation_context_shared_prefix() -> None:
+    mnemonic = 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about'
+    context = DerivationContext(mnemonic=mnemonic, password='', cache_size=4)
+    for path in ('m/12381/3600/0/0', 'm/12381/3600/0/0/0', 'm/12381/3600/1/0/0', 'm/12381/3600/0/0/0'):
+        assert context.derive(path) == mnemonic_and_path_to_key(mnemonic=mnemonic, path=path, password='')
+    assert len(context._nodes) == 4
+
+
 @pytest.mark.parametrize(
     'path, valid',
     [
@@ -93,3 +116,60 @@ def test_path_to_nodes(path, valid):
     else:
         with pytest.raises(ValueError):
             path_to_nodes(path)
+
+
+def _account_pubkey(mnemonic: str, path: str) -> bytes:
+    return SkToPk(mnemonic_and_path_to_key(mnemonic=mnemonic, path=path, password=''))
+
+
+def test_discover_account_indices() -> None:
+    mnemonic = 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about'
+    pubkeys = {index: _account_pubkey(mnemonic, f'm/12381/3600/{index}/0/0') for index in (3, 5, 20)}
+    withdrawal_credentials = b'\x00' + SHA256(_account_pubkey(mnemonic, 'm/12381/3600/7/0'))[1:]
+    pubkey_7 = _account_pubkey(mnemonic, 'm/12381/3600/7/0/0')
+
+    assert discover_account_indices(
+        mnemonic=mnemonic,
+        password='',
+        pubkeys=[pubkeys[3], pubkeys[5]],
+        withdrawal_credentials=[withdrawal_credentials],
+    ) == {3: pubkeys[3], 5: pubkeys[5], 7: pubkey_7}
+
+    # Index 20 is more than `gap_limit` indices after the last match
+    assert discover_account_indices(
+        mnemonic=mnemonic,
+        password='',
+        pubkeys=[pubkeys[5], pubkeys[20]],
+        start_index=2,
+        gap_limit=10,
+    ) == {5: pubkeys[5]}
+    assert discover_account_indices(
+        mnemonic=mnemonic,
+        password='',
+        pubkeys=[pubkeys[20]],
+        start_index=3,
+        stop_index=20,
+    ) == {}
+    assert discover_account_indices(mnemonic=mnemonic, password='', pubkeys=[], withdrawal_credentials=[]) == {}
+
+
+def test_discover_account_indices_early_exit(monkeypatch) -> None:
+    mnemonic = 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about'
+    pubkey = _account_pubkey(mnemonic, 'm/12381/3600/7/0/0')
+    withdrawal_credentials = b'\x00' + SHA256(_account_pubkey(mnemonic, 'm/12381/3600/7/0'))[1:]
+
+    class BoundedExecutor(concurrent.futures.ThreadPoolExecutor):
+        # The scan should stop right after index 7, long before the gap limit
+        def submit(self, fn: Any, /, *args: Any, **kwargs: Any) -> Any:
+            assert args[0][0] < 1000
+            return super().submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', BoundedExecutor)
+    # Both targets are the same validator
+    assert discover_account_indices(
+        mnemonic=mnemonic,
+        password='',
+        pubkeys=[pubkey],
+        withdrawal_credentials=[withdrawal_credentials],
+        gap_limit=10**9,
+    ) == {7: pubkey}
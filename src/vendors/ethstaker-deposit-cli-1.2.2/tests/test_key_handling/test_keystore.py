@@ -66,6 +66,15 @@ def test_encrypt_decrypt_incorrect_password() -> None:
         generated_keystore.decrypt(incorrect_password)
 
 
+def test_encrypt_with_decryption_key() -> None:
+    generated_keystore, decryption_key = Pbkdf2Keystore.encrypt_with_decryption_key(
+        secret=test_vector_secret, password=test_vector_password)
+    assert decryption_key == generated_keystore.derive_decryption_key(test_vector_password)
+    assert generated_keystore.decrypt_with_decryption_key(decryption_key) == test_vector_secret
+    with pytest.raises(ValueError):
+        generated_keystore.decrypt_with_decryption_key(bytes(32))
+
+
 @pytest.mark.parametrize(
     'password,processed_password',
     [
@@ -0,0 +1,35 @@
+import pytest
+
+from eth_utils import ValidationError
+from py_ecc.bls import G2ProofOfPossession as bls
+from py_ecc.optimized_bls12_381 import curve_order
+
+from ethstaker_deposit.utils.bls import (
+    G1_TABLE_WINDOW_BITS,
+    SkToPk,
+)
+
+
+@pytest.mark.parametrize(
+    'privkey',
+    [
+        1,
+        2,
+        2**G1_TABLE_WINDOW_BITS - 1,
+        2**G1_TABLE_WINDOW_BITS,
+        curve_order - 1,
+        0x263dbd792f5b1be47ed85f8938c0f29586af0d3ac7b977f21c278fe1462040e3,
+        0x47b8192d77bf871b62e87859d653922725724a5c031afeabc60bcef5ff665138,
+        0x328388aff0d4a5b7dc9205abd374e7e98f3cd9f3418edb4eafda5fb16473d216,
+    ]
+)
+def test_sk_to_pk(privkey: int) -> None:
+    assert SkToPk(privkey) == bls.SkToPk(privkey)
+
+
+@pytest.mark.parametrize('privkey', [0, curve_order, -1])
+def test_sk_to_pk_invalid_privkey(privkey: int) -> None:
+    with pytest.raises(ValidationError):
+        bls.SkToPk(privkey)
+    with pytest.raises(ValidationError):
+        SkToPk(privkey)
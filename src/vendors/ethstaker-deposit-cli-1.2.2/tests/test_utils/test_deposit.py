@@ -0,0 +1,234 @@
+import json
+import os
+from typing import Any
+
+import pytest
+
+from ethstaker_deposit.utils import deposit as deposit_module
+from ethstaker_deposit.utils.deposit import (
+    DepositDataWriter,
+    export_deposit_data_json,
+    iter_deposit_data_json,
+    DepositDataShard,
+    get_deposit_data_shard,
+    get_shard_run,
+    merge_deposit_data_json,
+    parse_shard,
+)
+
+
+def _deposit_datum(index: int, network_name: str = 'mainnet',
+                   withdrawal_credentials: bytes = bytes(32)) -> dict[str, Any]:
+    return {
+        'pubkey': index.to_bytes(48, 'big'),
+        'withdrawal_credentials': withdrawal_credentials,
+        'amount': 32000000000,
+        'signature': index.to_bytes(96, 'big'),
+        'deposit_message_root': index.to_bytes(32, 'big'),
+        'deposit_data_root': index.to_bytes(32, 'big'),
+        'fork_version': bytes(4),
+        'network_name': network_name,
+    }
+
+
+# Run of the shards of the `_deposit_datum` key generations starting at account index 0
+RUN = get_shard_run((0).to_bytes(48, 'big'))
+
+
+@pytest.mark.parametrize('num_deposits', [0, 1, 7])
+def test_export_deposit_data_json(tmp_path, monkeypatch, num_deposits: int) -> None:
+    deposit_data = [_deposit_datum(index) for index in range(num_deposits)]
+    filefolder = export_deposit_data_json(str(tmp_path), 1234, iter(deposit_data))
+
+    assert filefolder == os.path.join(str(tmp_path), 'deposit_data-1234.json')
+    assert os.listdir(str(tmp_path)) == ['deposit_data-1234.json']
+    with open(filefolder, 'r', encoding='utf-8') as f:
+        content = f.read()
+    assert content == json.dumps(deposit_data, default=lambda x: x.hex())
+    if os.name == 'posix':
+        assert oct(os.stat(filefolder).st_mode & 0o777) == oct(0o400)
+
+    # Read back with a tiny buffer so that deposits are split across reads
+    monkeypatch.setattr(deposit_module, 'DEPOSIT_DATA_READ_SIZE', 5)
+    assert list(iter_deposit_data_json(filefolder)) == json.loads(content)
+
+
+def test_deposit_data_writer_abort(tmp_path) -> None:
+    with pytest.raises(RuntimeError):
+        with DepositDataWriter(str(tmp_path), 1234) as writer:
+            writer.write(_deposit_datum(1))
+            raise RuntimeError()
+    assert os.listdir(str(tmp_path)) == []
+
+
+@pytest.mark.parametrize(
+    'content',
+    ['{}', '[{"pubkey": "00"}, 1]', '[{"pubkey": "00"}, {"pubkey"', '[{"pubkey": "00"}']
+)
+def test_iter_deposit_data_json_invalid(tmp_path, content: str) -> None:
+    filefolder = os.path.join(str(tmp_path), 'deposit_data-1234.json')
+    with open(filefolder, 'w', encoding='utf-8') as f:
+        f.write(content)
+    with pytest.raises(ValueError):
+        list(iter_deposit_data_json(filefolder))
+
+
+@pytest.mark.parametrize(
+    'shard, valid',
+    [('1/1', True), ('3/4', True), ('4/4', True), ('0/4', False), ('5/4', False), ('1', False), ('a/b', False),
+     ('1/2/3', False)]
+)
+def test_parse_shard(shard: str, valid: bool) -> None:
+    if valid:
+        assert parse_shard(shard) == tuple(int(part) for part in shard.split('/'))
+    else:
+        with pytest.raises(ValueError):
+            parse_shard(shard)
+
+
+@pytest.mark.parametrize('num_keys, num_shards', [(1, 1), (7, 3), (10, 5), (1000, 7)])
+def test_get_deposit_data_shard(num_keys: int, num_shards: int) -> None:
+    shards = [get_deposit_data_shard(5, num_keys, (k, num_shards), bytes(48)) for k in range(1, num_shards + 1)]
+    assert [index for shard in shards for index in shard.index_range] == list(range(5, 5 + num_keys))
+    sizes = [len(shard.index_range) for shard in shards]
+    assert max(sizes) - min(sizes) <= 1
+    with pytest.raises(ValueError):
+        get_deposit_data_shard(5, num_shards - 1, (1, num_shards), bytes(48))
+
+
+def _export_shards(folder: str, shards: list[tuple[DepositDataShard, list[int]]], top_ups: bool = False) -> list[str]:
+    filefolders = []
+    for shard, indices in shards:
+        # Every shard is generated in its own folder
+        shard_folder = os.path.join(folder, str(len(filefolders)))
+        os.mkdir(shard_folder)
+        deposit_data = [_deposit_datum(index) for index in indices]
+        filefolders.append(export_deposit_data_json(shard_folder, 1234, deposit_data, shard, top_ups))
+    return filefolders
+
+
+def test_merge_deposit_data_json(tmp_path) -> None:
+    shards = [get_deposit_data_shard(0, 8, (k, 3), (0).to_bytes(48, 'big')) for k in (1, 2, 3)]
+    assert all(shard.run == RUN for shard in shards)
+    filefolders = _export_shards(str(tmp_path), [(shard, list(shard.index_range)) for shard in shards])
+    assert os.path.basename(filefolders[1]) == f'deposit_data-1234-shard-2-of-3-indices-2-4-run-{RUN}.json'
+
+    # Every deposit of a shard is tagged with its run
+    assert [deposit_datum['shard_run'] for deposit_datum in iter_deposit_data_json(filefolders[1])] == [RUN] * 3
+
+    filefolder, index_range = merge_deposit_data_json(filefolders[::-1], str(tmp_path), 5678)
+    assert filefolder == os.path.join(str(tmp_path), 'deposit_data-5678.json')
+    assert index_range == range(0, 8)
+    with open(filefolder, 'r', encoding='utf-8') as f:
+        assert f.read() == json.dumps([_deposit_datum(index) for index in range(8)], default=lambda x: x.hex())
+
+
+def test_merge_deposit_data_json_top_ups(tmp_path) -> None:
+    shards = [get_deposit_data_shard(0, 4, (k, 2), (0).to_bytes(48, 'big')) for k in (1, 2)]
+    # Every key has two top-up deposits
+    filefolders = _export_shards(str(tmp_path), [
+        (shard, [index for index in shard.index_range for _ in range(2)]) for shard in shards], top_ups=True)
+    assert os.path.basename(filefolders[0]) == f'top_up_deposit_data-1234-shard-1-of-2-indices-0-1-run-{RUN}.json'
+
+    filefolder, index_range = merge_deposit_data_json(filefolders, str(tmp_path), 5678)
+    assert filefolder == os.path.join(str(tmp_path), 'top_up_deposit_data-5678.json')
+    assert index_range == range(0, 4)
+    assert [deposit_datum['pubkey'] for deposit_datum in iter_deposit_data_json(filefolder)] == [
+        index.to_bytes(48, 'big').hex() for index in range(4) for _ in range(2)]
+
+    # The deposit data files have a single deposit for every key
+    os.mkdir(str(tmp_path / 'deposit_data'))
+    filefolders = _export_shards(str(tmp_path / 'deposit_data'), [
+        (shard, [index for index in shard.index_range for _ in range(2)]) for shard in shards])
+    with pytest.raises(ValueError):
+        merge_deposit_data_json(filefolders, str(tmp_path), 5678)
+    # And are not merged with top-up deposit data files
+    with pytest.raises(ValueError):
+        merge_deposit_data_json([filefolders[0], filefolders[1].replace('deposit_data-', 'top_up_deposit_data-')],
+                                str(tmp_path), 5678)
+
+
+@pytest.mark.parametrize(
+    'shards',
+    [
+        # Missing shard
+        [(DepositDataShard(1, 3, range(0, 2), RUN), [0, 1]), (DepositDataShard(2, 3, range(2, 3), RUN), [2])],
+        # Shards of different key generations
+        [(DepositDataShard(1, 2, range(0, 2), RUN), [0, 1]), (DepositDataShard(2, 3, range(2, 3), RUN), [2])],
+        # Missing account indices between the shards
+        [(DepositDataShard(1, 2, range(0, 2), RUN), [0, 1]), (DepositDataShard(2, 2, range(3, 4), RUN), [3])],
+        # Overlapping shards
+        [(DepositDataShard(1, 2, range(0, 2), RUN), [0, 1]), (DepositDataShard(2, 2, range(1, 3), RUN), [4, 5])],
+        # Missing and extra deposits in a shard
+        [(DepositDataShard(1, 2, range(0, 2), RUN), [0]), (DepositDataShard(2, 2, range(2, 3), RUN), [2])],
+        [(DepositDataShard(1, 2, range(0, 2), RUN), [0, 1, 2]), (DepositDataShard(2, 2, range(2, 3), RUN), [3])],
+        # Duplicate pubkey
+        [(DepositDataShard(1, 2, range(0, 2), RUN), [0, 1]), (DepositDataShard(2, 2, range(2, 3), RUN), [1])],
+        # Deposits of a key apart from each other
+        [(DepositDataShard(1, 2, range(0, 2), RUN), [0, 1, 0]), (DepositDataShard(2, 2, range(2, 3), RUN), [2])],
+        # Shard of another run
+        [(DepositDataShard(1, 2, range(0, 2), RUN), [0, 1]), (DepositDataShard(2, 2, range(2, 3), '00000000'), [2])],
+        # Shards whose first key is not the one of their run
+        [(DepositDataShard(1, 2, range(1, 3), RUN), [1, 2]), (DepositDataShard(2, 2, range(3, 4), RUN), [3])],
+    ]
+)
+def test_merge_deposit_data_json_invalid(tmp_path, shards: list[tuple[DepositDataShard, list[int]]]) -> None:
+    filefolders = _export_shards(str(tmp_path), shards)
+    with pytest.raises(ValueError):
+        merge_deposit_data_json(filefolders, str(tmp_path), 5678)
+    assert sorted(os.listdir(str(tmp_path))) == [str(k) for k in range(len(shards))]
+
+
+@pytest.mark.parametrize('shard_run', ['00000000', None])
+def test_merge_deposit_data_json_deposit_run_mismatch(tmp_path, shard_run) -> None:
+    shards = [get_deposit_data_shard(0, 4, (k, 2), (0).to_bytes(48, 'big')) for k in (1, 2)]
+    filefolders = _export_shards(str(tmp_path), [(shard, list(shard.index_range)) for shard in shards])
+    # A deposit of another run in the file of the second shard
+    with open(filefolders[1], 'r', encoding='utf-8') as f:
+        deposit_data = json.load(f)
+    deposit_data[1]['shard_run'] = shard_run
+    os.chmod(filefolders[1], 0o600)
+    with open(filefolders[1], 'w', encoding='utf-8') as f:
+        json.dump(deposit_data, f)
+    with pytest.raises(ValueError, match='not of the run'):
+        merge_deposit_data_json(filefolders, str(tmp_path), 5678)
+    assert sorted(os.listdir(str(tmp_path))) == ['0', '1']
+
+
+def test_merge_deposit_data_json_network_mismatch(tmp_path) -> None:
+    shards = [get_deposit_data_shard(0, 2, (k, 2), (0).to_bytes(48, 'big')) for k in (1, 2)]
+    filefolders = _export_shards(str(tmp_path), [(shard, list(shard.index_range)) for shard in shards])
+    export_deposit_data_json(os.path.dirname(filefolders[1]), 1234, [_deposit_datum(1, 'hoodi')], shards[1])
+    with pytest.raises(ValueError):
+        merge_deposit_data_json(filefolders, str(tmp_path), 5678)
+    with pytest.raises(ValueError):
+        # Not the deposit data file of a shard
+        merge_deposit_data_json([export_deposit_data_json(str(tmp_path), 1234, [])], str(tmp_path), 5678)
+
+
+@pytest.mark.parametrize(
+    'deposit_datum',
+    [
+        # Withdrawal credentials to another withdrawal address
+        _deposit_datum(1, withdrawal_credentials=b'\x01' + bytes(11) + b'\x01' * 20),
+        # Malformed deposits
+        {key: value for key, value in _deposit_datum(1).items() if key != 'fork_version'},
+        {**_deposit_datum(1), 'pubkey': 'not hex'},
+        {**_deposit_datum(1), 'deposit_data_root': bytes(31)},
+        {**_deposit_datum(1), 'amount': '32000000000'},
+    ]
+)
+def test_merge_deposit_data_json_invalid_deposit(tmp_path, deposit_datum: dict[str, Any]) -> None:
+    shards = [get_deposit_data_shard(0, 2, (k, 2), (0).to_bytes(48, 'big')) for k in (1, 2)]
+    withdrawal_credentials = b'\x01' + bytes(31)
+    filefolders = _export_shards(str(tmp_path), [(shard, []) for shard in shards])
+    export_deposit_data_json(os.path.dirname(filefolders[0]), 1234,
+                             [_deposit_datum(0, withdrawal_credentials=withdrawal_credentials)], shards[0])
+    export_deposit_data_json(os.path.dirname(filefolders[1]), 1234, [deposit_datum], shards[1])
+    with pytest.raises(ValueError):
+        merge_deposit_data_json(filefolders, str(tmp_path), 5678)
+
+    # The same address is fine
+    export_deposit_data_json(os.path.dirname(filefolders[1]), 1234,
+                             [_deposit_datum(1, withdrawal_credentials=withdrawal_credentials)], shards[1])
+    merge_deposit_data_json(filefolders, str(tmp_path), 5678)
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from ethstaker_deposit.utils.inventory import (
+    ValidatorInventory,
+    ValidatorInventoryEntry,
+    export_inventory,
+)
+
+
+def _entry(index: int, network_name: str = 'mainnet', keystore: str = 'keystore.json',
+           pubkey: bytes = b'', withdrawal_credentials: bytes = bytes(32)) -> ValidatorInventoryEntry:
+    return ValidatorInventoryEntry.from_deposit_datum(index, keystore, {
+        'pubkey': pubkey or index.to_bytes(48, 'big'),
+        'withdrawal_credentials': withdrawal_credentials,
+        # As read back from a deposit data JSON file
+        'deposit_message_root': index.to_bytes(32, 'big').hex(),
+        'deposit_data_root': (index + 1).to_bytes(32, 'big').hex(),
+        'network_name': network_name,
+    })
+
+
+def test_inventory(tmp_path) -> None:
+    filefolder = os.path.join(str(tmp_path), 'inventory.sqlite')
+    export_inventory(filefolder, [_entry(index) for index in range(3)])
+    # Entries of keys generated again replace the previous ones
+    export_inventory(filefolder, [_entry(2, keystore='other.json'), _entry(2, network_name='hoodi')])
+    # Keys of another mnemonic at the same account index are kept apart
+    other_pubkey = (1 << 300).to_bytes(48, 'big')
+    export_inventory(filefolder, [_entry(1, pubkey=other_pubkey)])
+    bls_withdrawal_credentials = b'\x00' + b'\x11' * 31
+    export_inventory(filefolder, [_entry(4, withdrawal_credentials=bls_withdrawal_credentials)])
+
+    with ValidatorInventory(filefolder, create=False) as inventory:
+        assert inventory.get_by_account_index(1) == [_entry(1), _entry(1, pubkey=other_pubkey)]
+        entry = _entry(1)
+        assert entry.derivation_path == 'm/12381/3600/1/0/0'
+        assert entry.deposit_data_root == (2).to_bytes(32, 'big')
+        assert inventory.get_by_pubkey((1).to_bytes(48, 'big')) == entry
+        assert inventory.get_by_pubkey(other_pubkey) == _entry(1, pubkey=other_pubkey)
+        assert inventory.get_by_account_index(2, 'mainnet') == [_entry(2, keystore='other.json')]
+        assert inventory.get_by_account_index(2) == [_entry(2, network_name='hoodi'), _entry(2, keystore='other.json')]
+        assert inventory.get_by_pubkey((2).to_bytes(48, 'big'), 'hoodi') == _entry(2, network_name='hoodi')
+        assert inventory.get_by_account_index(3) == []
+        assert inventory.get_by_account_index(1, 'hoodi') == []
+        assert inventory.get_by_pubkey((3).to_bytes(48, 'big')) is None
+        assert inventory.get_by_withdrawal_credentials(bls_withdrawal_credentials) == [
+            _entry(4, withdrawal_credentials=bls_withdrawal_credentials)]
+        assert inventory.get_by_withdrawal_credentials(bls_withdrawal_credentials, 'hoodi') == []
+        assert inventory.get_by_withdrawal_credentials(b'\x01' + b'\x11' * 31) == []
+
+
+def test_inventory_missing(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        ValidatorInventory(os.path.join(str(tmp_path), 'inventory.sqlite'), create=False)
@@ -0,0 +1,103 @@
+import os
+from typing import Any
+
+import pytest
+
+from ethstaker_deposit.utils.journal import KeyGenerationJournal
+
+SETTINGS = {'start_index': 0, 'num_keys': 3, 'fork_version': bytes.fromhex('00000000')}
+
+
+def _deposit_datum(index: int) -> dict[str, Any]:
+    return {'pubkey': index.to_bytes(48, 'big').hex(), 'amount': 32000000000}
+
+
+def _keystore(folder: str, index: int) -> str:
+    filefolder = os.path.join(folder, 'keystore-m_12381_3600_%i_0_0-1234.json' % index)
+    with open(filefolder, 'w') as f:
+        f.write('{}')
+    return filefolder
+
+
+def test_resume(tmp_path) -> None:
+    folder = str(tmp_path)
+    journal = KeyGenerationJournal.create(folder, SETTINGS, 1234.5)
+    for index in (1, 0):
+        journal.record(index, _keystore(folder, index), _deposit_datum(index))
+    journal.close()
+    # A key whose keystore was written but which was not recorded, and a torn last line
+    _keystore(folder, 2)
+    with open(journal.filefolder, 'ab') as f:
+        f.write(b'{"index": 2, "keys')
+
+    journal = KeyGenerationJournal.resume(folder, SETTINGS)
+    assert journal.timestamp == 1234.5
+    assert journal.completed_indices == [1, 0]
+    # The keys loaded from the journal are not verified yet
+    assert journal.unverified_indices == [1, 0]
+    assert journal.keystore_filefolders[1] == os.path.join(folder, 'keystore-m_12381_3600_1_0_0-1234.json')
+    assert list(journal.deposit_data()) == [_deposit_datum(0), _deposit_datum(1)]
+    journal.remove_unrecorded_keystores(folder)
+    assert not os.path.exists(os.path.join(folder, 'keystore-m_12381_3600_2_0_0-1234.json'))
+
+    journal.record(2, _keystore(folder, 2), _deposit_datum(2))
+    journal.discard([0, 5])
+    assert journal.unverified_indices == [1]
+    journal.mark_verified([1, 5])
+    assert journal.unverified_indices == []
+    journal.close()
+    assert not os.path.exists(os.path.join(folder, 'keystore-m_12381_3600_0_0_0-1234.json'))
+
+    journal = KeyGenerationJournal.resume(folder, SETTINGS)
+    assert journal.completed_indices == [1, 2]
+    assert journal.deposit_datum(2) == _deposit_datum(2)
+    journal.remove()
+    assert not os.path.exists(journal.filefolder)
+
+
+def test_additional_deposit_data(tmp_path) -> None:
+    folder = str(tmp_path)
+    journal = KeyGenerationJournal.create(folder, SETTINGS, 1234)
+    for index in (1, 0):
+        journal.record(index, _keystore(folder, index), _deposit_datum(index),
+                       [{**_deposit_datum(index), 'network': 1}, {**_deposit_datum(index), 'network': 2}])
+    journal.close()
+
+    journal = KeyGenerationJournal.resume(folder, SETTINGS)
+    assert list(journal.deposit_data()) == [_deposit_datum(0), _deposit_datum(1)]
+    assert list(journal.deposit_data(2)) == [{**_deposit_datum(0), 'network': 2}, {**_deposit_datum(1), 'network': 2}]
+    assert journal.deposit_datum(1, 1) == {**_deposit_datum(1), 'network': 1}
+    assert [key[2] for key in journal.completed_keys(1)] == [{**_deposit_datum(index), 'network': 1}
+                                                             for index in (0, 1)]
+    journal.remove()
+
+
+def test_top_up_deposit_data(tmp_path) -> None:
+    folder = str(tmp_path)
+    journal = KeyGenerationJournal.create(folder, SETTINGS, 1234)
+
+    def _top_up(index: int, network: int) -> dict[str, Any]:
+        return {**_deposit_datum(index), 'amount': 1000000000, 'network': network}
+
+    for index in (1, 0):
+        journal.record(index, _keystore(folder, index), _deposit_datum(index),
+                       [{**_deposit_datum(index), 'network': 1}], [[_top_up(index, 0)], [_top_up(index, 1)]])
+    journal.close()
+
+    journal = KeyGenerationJournal.resume(folder, SETTINGS)
+    # The top-up deposits are kept apart from the deposits
+    assert list(journal.deposit_data()) == [_deposit_datum(0), _deposit_datum(1)]
+    assert list(journal.top_up_deposit_data()) == [_top_up(0, 0), _top_up(1, 0)]
+    assert list(journal.top_up_deposit_data(1)) == [_top_up(0, 1), _top_up(1, 1)]
+    assert list(journal.deposit_data(1)) == [{**_deposit_datum(index), 'network': 1} for index in (0, 1)]
+    assert journal.key_deposit_data(1, 1) == [{**_deposit_datum(1), 'network': 1}, _top_up(1, 1)]
+    journal.remove()
+
+
+def test_resume_invalid(tmp_path) -> None:
+    folder = str(tmp_path)
+    with pytest.raises(ValueError):
+        KeyGenerationJournal.resume(folder, SETTINGS)
+    KeyGenerationJournal.create(folder, SETTINGS, 1234).close()
+    with pytest.raises(ValueError):
+        KeyGenerationJournal.resume(folder, {**SETTINGS, 'num_keys': 4})
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from ethstaker_deposit.utils.merkleization import (
+    bls_to_execution_change_root,
+    deposit_data_root,
+    deposit_message_root,
+    signing_data_root,
+    voluntary_exit_root,
+)
+from ethstaker_deposit.utils.ssz import (
+    BLSToExecutionChange,
+    DepositData,
+    DepositMessage,
+    SigningData,
+    VoluntaryExit,
+    hash_tree_root,
+)
+
+
+def _random_bytes(rng: random.Random, length: int) -> bytes:
+    return rng.getrandbits(8 * length).to_bytes(length, 'big')
+
+
+def _random_uint64(rng: random.Random) -> int:
+    return rng.choice([0, 1, 2**64 - 1, rng.getrandbits(64)])
+
+
+@pytest.mark.parametrize('seed', range(16))
+def test_roots_match_py_ssz(seed: int) -> None:
+    rng = random.Random(seed)
+    pubkey = _random_bytes(rng, 48)
+    withdrawal_credentials = _random_bytes(rng, 32)
+    amount = _random_uint64(rng)
+    signature = _random_bytes(rng, 96)
+
+    deposit_message = DepositMessage(pubkey=pubkey, withdrawal_credentials=withdrawal_credentials, amount=amount)
+    assert deposit_message_root(pubkey, withdrawal_credentials, amount) == deposit_message.hash_tree_root
+
+    deposit_data = DepositData(
+        pubkey=pubkey, withdrawal_credentials=withdrawal_credentials, amount=amount, signature=signature)
+    assert deposit_data_root(pubkey, withdrawal_credentials, amount, signature) == deposit_data.hash_tree_root
+
+    object_root = _random_bytes(rng, 32)
+    domain = _random_bytes(rng, 32)
+    signing_data = SigningData(object_root=object_root, domain=domain)
+    assert signing_data_root(object_root, domain) == signing_data.hash_tree_root
+
+    epoch = _random_uint64(rng)
+    validator_index = _random_uint64(rng)
+    voluntary_exit = VoluntaryExit(epoch=epoch, validator_index=validator_index)
+    assert voluntary_exit_root(epoch, validator_index) == voluntary_exit.hash_tree_root
+
+    to_execution_address = _random_bytes(rng, 20)
+    bls_to_execution_change = BLSToExecutionChange(
+        validator_index=validator_index, from_bls_pubkey=pubkey, to_execution_address=to_execution_address)
+    assert bls_to_execution_change_root(validator_index, pubkey, to_execution_address) == (
+        bls_to_execution_change.hash_tree_root
+    )
+
+    for ssz_object in (deposit_message, deposit_data, signing_data, voluntary_exit, bls_to_execution_change):
+        assert hash_tree_root(ssz_object) == ssz_object.hash_tree_root
+
+
+def test_invalid_fields() -> None:
+    with pytest.raises(ValueError):
+        deposit_message_root(b'\x12' * 47, b'\x12' * 32, 1)
+    with pytest.raises(ValueError):
+        deposit_data_root(b'\x12' * 48, b'\x12' * 32, 1, b'\x12' * 95)
+    with pytest.raises(ValueError):
+        signing_data_root(b'\x12' * 32, b'\x12' * 31)
+    with pytest.raises(ValueError):
+        voluntary_exit_root(-1, 0)
+    with pytest.raises(ValueError):
+        bls_to_execution_change_root(2**64, b'\x12' * 48, b'\x12' * 20)
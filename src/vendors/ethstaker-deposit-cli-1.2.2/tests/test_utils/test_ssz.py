@@ -1,10 +1,15 @@
 import pytest
 
+from ethstaker_deposit.settings import ALL_CHAINS, get_devnet_chain_setting
+from ethstaker_deposit.utils.constants import DOMAIN_DEPOSIT, DOMAIN_VOLUNTARY_EXIT
 from ethstaker_deposit.utils.ssz import (
     DepositMessage,
     compute_deposit_domain,
     compute_deposit_fork_data_root,
+    compute_domain,
+    compute_fork_data_root,
     compute_signing_root,
+    compute_voluntary_exit_domain,
 )
 
 
@@ -59,3 +64,28 @@ def test_compute_signing_root(domain, valid, result):
     else:
         with pytest.raises(ValueError):
             compute_signing_root(deposit_message, domain)
+
+
+def test_compute_domain_cache():
+    # The domains of the built-in chains are computed on import
+    for chain_setting in ALL_CHAINS.values():
+        hits = compute_domain.cache_info().hits
+        assert compute_deposit_domain(chain_setting.GENESIS_FORK_VERSION) == (
+            DOMAIN_DEPOSIT + compute_deposit_fork_data_root(chain_setting.GENESIS_FORK_VERSION)[:28]
+        )
+        assert compute_domain.cache_info().hits == hits + 1
+
+    # Devnet domains are computed on first use
+    devnet_chain_setting = get_devnet_chain_setting(
+        network_name='devnet',
+        genesis_fork_version='12345678',
+        exit_fork_version='12345679',
+        genesis_validator_root='ab' * 32,
+    )
+    domain = compute_voluntary_exit_domain(
+        devnet_chain_setting.EXIT_FORK_VERSION, devnet_chain_setting.GENESIS_VALIDATORS_ROOT)
+    assert domain == DOMAIN_VOLUNTARY_EXIT + compute_fork_data_root(
+        devnet_chain_setting.EXIT_FORK_VERSION, devnet_chain_setting.GENESIS_VALIDATORS_ROOT)[:28]
+    hits = compute_domain.cache_info().hits
+    compute_voluntary_exit_domain(devnet_chain_setting.EXIT_FORK_VERSION, devnet_chain_setting.GENESIS_VALIDATORS_ROOT)
+    assert compute_domain.cache_info().hits == hits + 1
@@ -1,17 +1,25 @@
 import pytest
+import subprocess
 import sys
 import json
 from typing import (
     Any,
 )
 
+from py_ecc.bls import G2ProofOfPossession as bls
+
+from ethstaker_deposit.credentials import Credential
 from ethstaker_deposit.exceptions import ValidationError
-from ethstaker_deposit.settings import get_chain_setting, get_devnet_chain_setting
+from ethstaker_deposit.settings import MainnetSetting, get_chain_setting, get_devnet_chain_setting
+from ethstaker_deposit.utils.constants import ETH2GWEI
 from ethstaker_deposit.utils.validation import (
+    batch_verify_signatures,
     normalize_input_list,
     validate_int_range,
     validate_deposit_amount,
     validate_password_strength,
+    validate_deposit,
+    validate_deposits,
     validate_signed_exit,
     validate_devnet_chain_setting_json,
 )
@@ -283,3 +291,43 @@ def test_validate_devnet_chain_setting_json() -> None:
     with pytest.raises(ValidationError):
         assert validate_devnet_chain_setting_json(
             json.dumps(invalid_devnet_chain_with_min_deposit_amount_and_wrong_key)) is False
+
+
+def test_batch_verify_signatures() -> None:
+    messages = [b'message %i' % i for i in range(5)]
+    signature_sets = [(bls.SkToPk(sk), message, bls.Sign(sk, message)) for sk, message in enumerate(messages, start=1)]
+    assert batch_verify_signatures(signature_sets) == [True] * 5
+
+    # A signature over another message and a signature that can not be decoded
+    signature_sets[1] = (signature_sets[1][0], messages[1], signature_sets[2][2])
+    signature_sets[3] = (signature_sets[3][0], messages[3], b'\x00' * 96)
+    assert batch_verify_signatures(signature_sets) == [True, False, True, False, True]
+    assert batch_verify_signatures([]) == []
+
+
+def test_validate_deposits() -> None:
+    credentials = [Credential(
+        mnemonic='abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about',
+        mnemonic_password='',
+        index=index,
+        amount=32 * ETH2GWEI,
+        chain_setting=MainnetSetting,
+        hex_withdrawal_address='0x00000000219ab540356cbb839cbe05303d7705fa',
+    ) for index in range(3)]
+    deposit_data = [json.loads(json.dumps(c.deposit_datum_dict, default=lambda x: x.hex())) for c in credentials]
+    deposit_data[1]['signature'] = deposit_data[2]['signature']
+
+    expected = [validate_deposit(d, MainnetSetting, c) for d, c in zip(deposit_data, credentials)]
+    assert expected == [True, False, True]
+    assert validate_deposits(deposit_data, MainnetSetting, credentials) == expected
+    assert validate_deposits(deposit_data, MainnetSetting) == expected
+
+
+def test_lazy_imports() -> None:
+    # A fresh interpreter is needed, as the other tests already loaded every module
+    modules = subprocess.run(
+        [sys.executable, '-c', 'import sys, ethstaker_deposit.utils.validation; print(" ".join(sys.modules))'],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    assert 'click' not in modules
+    assert 'ethstaker_deposit.credentials' not in modules